@@ -0,0 +1,20 @@
+import uvicorn
+
+from . import config
+
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "app.main:create_app",
+        factory=True,
+        host=config.HOST,
+        port=config.PORT,
+        # Several workers share the port, SIGHUP restarts them one at a time
+        workers=config.WEB_CONCURRENCY,
+        timeout_graceful_shutdown=config.GRACEFUL_TIMEOUT_SECONDS,
+        ws="websockets",
+        ws_per_message_deflate=config.WS_PER_MESSAGE_DEFLATE,
+        # Protocol-level pings drop dead TCP connections the app cannot see
+        ws_ping_interval=config.WS_PING_INTERVAL_SECONDS or None,
+        ws_ping_timeout=config.WS_PING_INTERVAL_SECONDS or None,
+    )
@@ -0,0 +1,315 @@
+"""Auction analytics for staff.
+
+Bid writes only mark their plate and bidder as dirty. rollup() recomputes the
+plate_stats rows of dirty plates and the user_stats rows of dirty users in one
+pass (periodically from the app lifespan, and before serving the summary).
+User totals count live and archived bids, so archiving needs no recompute. Histograms and time buckets are computed with
+NumPy over bid columns; NumPy is imported on first use so workers start lean.
+
+    python -m app.analytics rebuild   # recompute plate_stats and user_stats
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import Float, cast, delete, func, insert, select, union, union_all
+from sqlalchemy.orm import Session
+
+from . import config, models
+from .database import SessionLocal
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Plates and users whose bids changed since their stats row was last computed
+_dirty_plates: Set[int] = set()
+_dirty_users: Set[int] = set()
+_dirty_lock = threading.Lock()
+
+
+def mark_dirty(plate_id: int, user_id: Optional[int] = None):
+    """Called on every bid write, the aggregates are recomputed by rollup()"""
+    with _dirty_lock:
+        _dirty_plates.add(plate_id)
+        if user_id is not None:
+            _dirty_users.add(user_id)
+
+
+def _take_dirty(dirty: Set[int], ids: Optional[Iterable[int]] = None) -> List[int]:
+    """Take the dirty ids (or the given ones) out of the set for recomputing"""
+    with _dirty_lock:
+        if ids is None:
+            taken = list(dirty)
+            dirty.clear()
+        else:
+            taken = list(ids)
+            dirty.difference_update(taken)
+    return taken
+
+
+def _bid_arrays(db: Session, bid_model, condition):
+    """Fetch plate ids, amounts, opening amounts, timestamps and user ids of bids as NumPy arrays"""
+    import numpy as np
+
+    rows = db.execute(
+        select(bid_model.plate_id, cast(bid_model.amount, Float), cast(bid_model.opening_amount, Float),
+               bid_model.created_at, bid_model.user_id)
+        .where(condition)
+        .order_by(bid_model.plate_id, bid_model.created_at, bid_model.id)
+    ).all()
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        no_amounts = np.array([], dtype=np.float64)
+        return empty, no_amounts, no_amounts, np.array([], dtype="datetime64[s]"), empty
+    plate_ids, amounts, opening, created, user_ids = zip(*rows)
+    return (
+        np.asarray(plate_ids, dtype=np.int64),
+        np.asarray(amounts, dtype=np.float64),
+        np.asarray(opening, dtype=np.float64),
+        np.asarray(created, dtype="datetime64[s]"),
+        np.asarray(user_ids, dtype=np.int64),
+    )
+
+
+def _to_datetime(value: "np.datetime64") -> datetime:
+    return value.astype("datetime64[s]").astype(datetime)
+
+
+def rollup(db: Session, plate_ids: Optional[Iterable[int]] = None,
+           user_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute plate_stats and user_stats for dirty plates and users (or the given ones)"""
+    plate_ids = _take_dirty(_dirty_plates, plate_ids)
+    user_ids = _take_dirty(_dirty_users, user_ids)
+    if not plate_ids and not user_ids:
+        return 0
+    try:
+        if plate_ids:
+            _store_stats(db, plate_ids)
+        if user_ids:
+            _store_user_stats(db, user_ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        with _dirty_lock:
+            _dirty_plates.update(plate_ids)
+            _dirty_users.update(user_ids)
+        raise
+    return len(plate_ids)
+
+
+def _store_stats(db: Session, plate_ids: List[int]):
+    import numpy as np
+
+    ids, amounts, opening, created, _ = _bid_arrays(db, models.Bid, models.Bid.plate_id.in_(plate_ids))
+    now = datetime.now()
+    rows = []
+    if len(ids):
+        # Rows are sorted by plate then time, so each plate is one contiguous run
+        unique_ids, starts, counts = np.unique(ids, return_index=True, return_counts=True)
+        ends = starts + counts - 1
+        highest = np.maximum.reduceat(amounts, starts)
+        for index, plate_id in enumerate(unique_ids.tolist()):
+            rows.append({
+                "plate_id": plate_id,
+                "bid_count": int(counts[index]),
+                "first_bid": round(float(opening[starts[index]]), 2),
+                "highest_bid": round(float(highest[index]), 2),
+                "first_bid_at": _to_datetime(created[starts[index]]),
+                "last_bid_at": _to_datetime(created[ends[index]]),
+                "updated_at": now,
+            })
+
+    db.execute(delete(models.PlateStats).where(models.PlateStats.plate_id.in_(plate_ids)))
+    if rows:
+        db.execute(insert(models.PlateStats), rows)
+
+
+def _store_user_stats(db: Session, user_ids: List[int]):
+    live, archived = models.Bid, models.ArchivedBid
+    bids = union_all(
+        select(live.user_id, live.amount).where(live.user_id.in_(user_ids)),
+        select(archived.user_id, archived.amount).where(archived.user_id.in_(user_ids)),
+    ).subquery()
+    totals = db.execute(
+        select(bids.c.user_id, func.count(), func.sum(bids.c.amount)).group_by(bids.c.user_id)
+    ).all()
+    now = datetime.now()
+
+    db.execute(delete(models.UserStats).where(models.UserStats.user_id.in_(user_ids)))
+    if totals:
+        db.execute(insert(models.UserStats), [
+            {"user_id": user_id, "bid_count": count, "total_amount": total, "updated_at": now}
+            for user_id, count, total in totals
+        ])
+
+
+def rebuild(db: Session) -> int:
+    """Recompute plate_stats for every live plate and user_stats for every bidder"""
+    plate_ids = db.scalars(select(models.Bid.plate_id).distinct()).all()
+    user_ids = db.scalars(
+        union(select(models.Bid.user_id), select(models.ArchivedBid.user_id))
+    ).all()
+    db.execute(delete(models.PlateStats))
+    db.execute(delete(models.UserStats))
+    db.commit()
+    return rollup(db, plate_ids, user_ids)
+
+
+class TooManyBuckets(ValueError):
+    """A bid timeline would need more than ANALYTICS_MAX_BUCKETS time buckets"""
+
+
+def _histogram(values: "np.ndarray", bins: int) -> Dict:
+    import numpy as np
+
+    if not len(values):
+        return {"edges": [], "counts": []}
+    counts, edges = np.histogram(values, bins=bins)
+    return {"edges": np.round(edges, 2).tolist(), "counts": counts.tolist()}
+
+
+def _time_buckets(created: "np.ndarray", bucket_seconds: int) -> Dict:
+    import numpy as np
+
+    if not len(created):
+        return {"start": None, "bucket_seconds": bucket_seconds, "counts": []}
+    seconds = created.astype(np.int64)
+    start = seconds.min() - seconds.min() % bucket_seconds
+    buckets = (seconds.max() - start) // bucket_seconds + 1
+    if buckets > config.ANALYTICS_MAX_BUCKETS:
+        raise TooManyBuckets(
+            f"{buckets} time buckets exceed the limit of {config.ANALYTICS_MAX_BUCKETS}, "
+            "use a larger bucket_seconds"
+        )
+    counts = np.bincount((seconds - start) // bucket_seconds)
+    return {
+        "start": _to_datetime(np.datetime64(int(start), "s")),
+        "bucket_seconds": bucket_seconds,
+        "counts": counts.tolist(),
+    }
+
+
+def plate_analytics(db: Session, plate_id: int, bins: int = 20,
+                    bucket_seconds: int = 60, top: int = 10) -> Optional[Dict]:
+    import numpy as np
+
+    plate = db.get(models.AutoPlate, plate_id)
+    bid_model = models.Bid
+    if plate is None:
+        plate = db.get(models.ArchivedPlate, plate_id)
+        bid_model = models.ArchivedBid
+        if plate is None:
+            return None
+
+    _, amounts, opening, created, user_ids = _bid_arrays(db, bid_model, bid_model.plate_id == plate_id)
+    first_bid = float(opening[0]) if len(opening) else None
+    highest_bid = float(amounts.max()) if len(amounts) else None
+    order = np.argsort(-amounts, kind="stable")[:top]
+
+    return {
+        "plate_id": plate.id,
+        "plate_number": plate.plate_number,
+        "bid_count": int(len(amounts)),
+        "first_bid": first_bid,
+        "highest_bid": highest_bid,
+        "increase": round(highest_bid - first_bid, 2) if first_bid is not None else None,
+        "final_to_first_ratio": round(highest_bid / first_bid, 4) if first_bid else None,
+        "price_histogram": _histogram(amounts, bins),
+        "bids_per_bucket": _time_buckets(created, bucket_seconds),
+        "top_bidders": [
+            {"user_id": int(user_ids[index]), "amount": round(float(amounts[index]), 2)}
+            for index in order.tolist()
+        ],
+    }
+
+
+def summary(db: Session, bins: int = 20, window_minutes: int = 60, top: int = 10) -> Dict:
+    """Global statistics, served from plate_stats and user_stats plus a window of recent bids"""
+    import numpy as np
+
+    rollup(db)
+    stats = db.execute(
+        select(models.PlateStats.bid_count, cast(models.PlateStats.first_bid, Float),
+               cast(models.PlateStats.highest_bid, Float))
+    ).all()
+    if stats:
+        bid_counts, first_bids, highest_bids = (np.asarray(column, dtype=np.float64) for column in zip(*stats))
+    else:
+        bid_counts = first_bids = highest_bids = np.array([], dtype=np.float64)
+    ratios = highest_bids[first_bids > 0] / first_bids[first_bids > 0]
+
+    # The window moves with the clock rather than with bid writes, so it can't be
+    # rolled up per dirty plate. It is an index range scan over bids.created_at,
+    # capped at the newest ANALYTICS_RECENT_MAX_BIDS bids.
+    since = datetime.now() - timedelta(minutes=window_minutes)
+    recent = db.scalars(
+        select(models.Bid.created_at)
+        .where(models.Bid.created_at >= since)
+        .order_by(models.Bid.created_at.desc())
+        .limit(config.ANALYTICS_RECENT_MAX_BIDS)
+    ).all()
+    recent = np.asarray(recent, dtype="datetime64[s]")
+
+    top_bidders = db.execute(
+        select(models.UserStats.user_id, models.UserStats.bid_count, models.UserStats.total_amount)
+        .order_by(models.UserStats.bid_count.desc(), models.UserStats.user_id)
+        .limit(top)
+    ).all()
+
+    return {
+        "plates_with_bids": int(len(bid_counts)),
+        "total_bids": int(bid_counts.sum()),
+        "mean_bids_per_plate": round(float(bid_counts.mean()), 2) if len(bid_counts) else None,
+        "highest_bid_histogram": _histogram(highest_bids, bins),
+        "final_to_first_ratio": {
+            "median": round(float(np.median(ratios)), 4) if len(ratios) else None,
+            "mean": round(float(ratios.mean()), 4) if len(ratios) else None,
+        },
+        "recent_bids_per_minute": _time_buckets(recent, 60),
+        "top_bidders": [
+            {"user_id": user_id, "bids": bids, "total": float(total)}
+            for user_id, bids, total in top_bidders
+        ],
+    }
+
+
+async def rollup_periodically(interval: float):
+    """Background loop started by the app lifespan"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(_rollup_job)
+        except Exception:
+            logger.exception("Analytics rollup failed")
+
+
+def _rollup_job():
+    db = SessionLocal()
+    try:
+        rollup(db)
+    finally:
+        db.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.analytics")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        plates = rebuild(db)
+    finally:
+        db.close()
+    print(f"Rebuilt statistics for {plates} plates and their bidders")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Move closed auctions out of the hot tables.
+
+    python -m app.archive [--older-than-hours 24]
+
+Plates whose deadline passed more than ARCHIVE_AFTER_HOURS ago are copied with
+their bids to archived_plates/archived_bids and deleted from auto_plates/bids,
+so listings, plate number checks and max-bid queries only touch live auctions.
+Archived plates are still served by GET /plates/{id}.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, false, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from . import config, models
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def archive_closed_plates(db: Session, before: Optional[datetime] = None,
+                          batch_size: int = config.ARCHIVE_BATCH_SIZE) -> int:
+    """Archive plates with a deadline before `before`, one transaction per batch"""
+    if before is None:
+        before = datetime.now() - timedelta(hours=config.ARCHIVE_AFTER_HOURS)
+    plate, bid = models.AutoPlate, models.Bid
+    archived = 0
+
+    while True:
+        plate_ids = db.scalars(
+            select(plate.id).where(plate.deadline < before).order_by(plate.id).limit(batch_size)
+        ).all()
+        if not plate_ids:
+            break
+
+        bid_stats = (
+            select(
+                bid.plate_id,
+                func.max(bid.amount).label("highest_bid"),
+                func.count(bid.id).label("bid_count"),
+            )
+            .where(bid.plate_id.in_(plate_ids))
+            .group_by(bid.plate_id)
+            .subquery()
+        )
+        db.execute(insert(models.ArchivedPlate).from_select(
+            ["id", "plate_number", "description", "deadline", "is_active", "created_by_id",
+             "highest_bid", "bid_count", "archived_at"],
+            select(
+                plate.id, plate.plate_number, plate.description, plate.deadline, false(),
+                plate.created_by_id, bid_stats.c.highest_bid,
+                func.coalesce(bid_stats.c.bid_count, 0), literal(datetime.now()),
+            )
+            .outerjoin(bid_stats, bid_stats.c.plate_id == plate.id)
+            .where(plate.id.in_(plate_ids)),
+        ))
+        db.execute(insert(models.ArchivedBid).from_select(
+            ["id", "amount", "opening_amount", "user_id", "plate_id", "created_at"],
+            select(bid.id, bid.amount, bid.opening_amount, bid.user_id, bid.plate_id, bid.created_at)
+            .where(bid.plate_id.in_(plate_ids)),
+        ))
+        db.execute(delete(models.ProxyBid).where(models.ProxyBid.plate_id.in_(plate_ids)))
+        db.execute(delete(bid).where(bid.plate_id.in_(plate_ids)))
+        db.execute(delete(plate).where(plate.id.in_(plate_ids)))
+        db.commit()
+        archived += len(plate_ids)
+
+    return archived
+
+
+def run_archive_job() -> int:
+    db = SessionLocal()
+    try:
+        return archive_closed_plates(db)
+    finally:
+        db.close()
+
+
+async def archive_periodically(interval: float):
+    """Background loop started by the app lifespan when ARCHIVE_INTERVAL_SECONDS is set"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            archived = await asyncio.to_thread(run_archive_job)
+            if archived:
+                logger.info("Archived %d closed plates", archived)
+        except Exception:
+            logger.exception("Archiving closed plates failed")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.archive")
+    parser.add_argument("--older-than-hours", type=float, default=config.ARCHIVE_AFTER_HOURS,
+                        help="archive plates whose deadline passed at least this long ago")
+    parser.add_argument("--batch-size", type=int, default=config.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        archived = archive_closed_plates(
+            db, datetime.now() - timedelta(hours=args.older_than_hours), args.batch_size
+        )
+    finally:
+        db.close()
+    print(f"Archived {archived} plates")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
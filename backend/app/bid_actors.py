@@ -0,0 +1,224 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import config, crud, models, schemas
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PlateState:
+    """Authoritative bidding state of one plate, owned by its actor"""
+    deadline: datetime
+    is_active: bool
+    highest: Optional[Decimal]
+    bidders: Set[int]
+
+
+@dataclass
+class CreateBid:
+    bid: schemas.BidCreate
+    user_id: int
+    future: asyncio.Future
+
+    @property
+    def plate_id(self) -> int:
+        return self.bid.plate_id
+
+
+@dataclass
+class Execute:
+    """Run `fn(db)` in order with the plate's other writes, then reload its state"""
+    plate_id: int
+    fn: Callable[[Session], Any]
+    future: Optional[asyncio.Future] = None
+
+
+@dataclass
+class PlateActor:
+    """Processes all bid writes for the plates of one shard, strictly in order"""
+    shard: int
+    batch_size: int
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    plates: Dict[int, PlateState] = field(default_factory=dict)
+
+    async def run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                outcomes = await asyncio.to_thread(self._process, batch)
+            except Exception as exc:
+                logger.exception("Bid actor %s failed to process a batch", self.shard)
+                self.plates.clear()
+                outcomes = [exc] * len(batch)
+            for message, outcome in zip(batch, outcomes):
+                if message.future is None or message.future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    message.future.set_exception(outcome)
+                else:
+                    message.future.set_result(outcome)
+
+    def _load(self, db: Session, plate_id: int) -> PlateState:
+        state = self.plates.get(plate_id)
+        if state is None:
+            plate = crud.get_plate(db, plate_id)
+            if not plate:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Plate not found"
+                )
+            highest = db.query(func.max(models.Bid.amount)).filter(
+                models.Bid.plate_id == plate_id
+            ).scalar()
+            bidders = db.query(models.Bid.user_id).filter(models.Bid.plate_id == plate_id).all()
+            state = PlateState(
+                deadline=plate.deadline,
+                is_active=plate.is_active,
+                highest=highest,
+                bidders={user_id for user_id, in bidders},
+            )
+            self.plates[plate_id] = state
+        return state
+
+    def _validate(self, state: PlateState, message: CreateBid):
+        # Same rules and messages as crud.create_bid
+        if not state.is_active or state.deadline <= datetime.now():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Bidding is closed"
+            )
+        if message.user_id in state.bidders:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You already have a bid on this plate"
+            )
+        if state.highest and message.bid.amount <= state.highest:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Bid must exceed current highest bid"
+            )
+
+    def _process(self, batch: List) -> List:
+        outcomes: List[Any] = [None] * len(batch)
+        accepted = []
+        db = SessionLocal()
+        try:
+            for index, message in enumerate(batch):
+                if isinstance(message, Execute):
+                    # Commit what was accepted so far to keep the plate's order
+                    self._commit(db, accepted, outcomes)
+                    accepted = []
+                    outcomes[index] = self._execute(message)
+                    self.plates.pop(message.plate_id, None)
+                    continue
+                try:
+                    state = self._load(db, message.plate_id)
+                    self._validate(state, message)
+                except HTTPException as exc:
+                    outcomes[index] = exc
+                    continue
+                db_bid = models.Bid(
+                    amount=message.bid.amount,
+                    user_id=message.user_id,
+                    plate_id=message.plate_id
+                )
+                db.add(db_bid)
+                state.highest = message.bid.amount
+                state.bidders.add(message.user_id)
+                accepted.append((index, message, db_bid))
+            self._commit(db, accepted, outcomes)
+        finally:
+            db.close()
+        return outcomes
+
+    def _execute(self, message: Execute) -> Any:
+        # Own session, so what `fn` returns stays loaded after later commits
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            return message.fn(db)
+        except Exception as exc:
+            db.rollback()
+            return exc
+        finally:
+            db.close()
+
+    def _commit(self, db: Session, accepted: List, outcomes: List):
+        """Group-commit the accepted bids in one transaction"""
+        if not accepted:
+            return
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Fall back to one transaction per bid so only the offending bid fails
+            for index, message, _ in accepted:
+                self.plates.pop(message.plate_id, None)
+                bid_db = SessionLocal(expire_on_commit=False)
+                try:
+                    outcomes[index] = crud.create_bid(bid_db, message.bid, message.user_id)
+                except Exception as exc:
+                    bid_db.rollback()
+                    outcomes[index] = exc
+                finally:
+                    bid_db.close()
+            return
+        # Load the server-side defaults (created_at) of the whole batch at once,
+        # then detach the bids so the batch's later commits don't expire them
+        ids = [db_bid.id for _, _, db_bid in accepted]
+        db.query(models.Bid).filter(models.Bid.id.in_(ids)).all()
+        for index, _, db_bid in accepted:
+            db.expunge(db_bid)
+            outcomes[index] = db_bid
+
+
+class BidActorPool:
+    """Routes bid writes to per-plate actors sharded by plate id. Bids on
+    different shards are validated in parallel, bids on one plate stay ordered."""
+
+    def __init__(self, shards: int, batch_size: int):
+        self.shards = shards
+        self.batch_size = batch_size
+        self.actors: List[PlateActor] = []
+        self.tasks: List[asyncio.Task] = []
+
+    def _actor(self, plate_id: int) -> PlateActor:
+        if not self.tasks:
+            self.actors = [PlateActor(shard, self.batch_size) for shard in range(self.shards)]
+            self.tasks = [asyncio.create_task(actor.run()) for actor in self.actors]
+        return self.actors[plate_id % self.shards]
+
+    async def create_bid(self, bid: schemas.BidCreate, user_id: int) -> models.Bid:
+        future = asyncio.get_running_loop().create_future()
+        self._actor(bid.plate_id).queue.put_nowait(CreateBid(bid, user_id, future))
+        return await future
+
+    async def execute(self, plate_id: int, fn: Callable[[Session], Any]) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._actor(plate_id).queue.put_nowait(Execute(plate_id, fn, future))
+        return await future
+
+    def invalidate(self, plate_id: int):
+        """Drop cached state after the plate was changed outside the actor"""
+        if self.tasks:
+            self._actor(plate_id).queue.put_nowait(Execute(plate_id, lambda db: None))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.actors, self.tasks = [], []
+
+
+bid_actors = BidActorPool(config.BID_ACTOR_SHARDS, config.BID_ACTOR_BATCH_SIZE)
@@ -0,0 +1,87 @@
+from typing import Dict, Iterable
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = 4) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        if more_body:
+            return data + self.compressor.flush()
+        return data + self.compressor.finish()
+
+
+def parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    """Map each content coding in an Accept-Encoding header to its q-value"""
+    codings = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def choose_encoding(accept_encoding: str, available: Iterable[str] = ("br", "gzip")) -> str:
+    """The available coding the client rates highest (earlier ones win ties),
+    or "identity" when none is acceptable or identity is rated higher"""
+    codings = parse_accept_encoding(accept_encoding)
+    wildcard = codings.get("*", 0.0)
+    chosen, chosen_quality = "identity", 0.0
+    for coding in available:
+        quality = codings.get(coding, wildcard)
+        if quality > chosen_quality:
+            chosen, chosen_quality = coding, quality
+    if codings.get("identity", 0.0) > chosen_quality:
+        return "identity"
+    return chosen
+
+
+class CompressionMiddleware:
+    """Compress responses above `minimum_size` with Brotli or gzip, whichever
+    the client prefers (Brotli only when the brotli package is installed)."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500,
+                 gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.available = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding", ""), self.available)
+        responder: ASGIApp
+        if encoding == "br":
+            responder = BrotliResponder(self.app, self.minimum_size, quality=self.brotli_quality)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -0,0 +1,159 @@
+import os
+from decimal import Decimal
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Database
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database1.db")
+# Engine for read-only routes, e.g. a Postgres replica. With a SQLite primary,
+# SQLITE_READ_POOL opens a separate read-only pool on the same file in WAL mode.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+SQLITE_READ_POOL = _env_bool("SQLITE_READ_POOL", False)
+# Reads of a user who just wrote a bid go to the primary for this many seconds
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Response compression (REST)
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "500"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# WebSockets
+# permessage-deflate is negotiated by the ASGI server, see app/__main__.py
+WS_PER_MESSAGE_DEFLATE = _env_bool("WS_PER_MESSAGE_DEFLATE", True)
+# Heartbeats: every WS_PING_INTERVAL_SECONDS the server sends a "ping" message
+# and closes connections that sent nothing (e.g. a "pong") for
+# WS_IDLE_TIMEOUT_SECONDS. 0 disables either. The ASGI server additionally
+# sends protocol-level pings, see app/__main__.py.
+WS_PING_INTERVAL_SECONDS = float(os.getenv("WS_PING_INTERVAL_SECONDS", "20"))
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "60"))
+# Connection limits, 0 means unlimited
+WS_MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", "10000"))
+WS_MAX_CONNECTIONS_PER_IP = int(os.getenv("WS_MAX_CONNECTIONS_PER_IP", "20"))
+# Longest wait for a single close frame when draining on shutdown or reaping
+WS_CLOSE_TIMEOUT_SECONDS = float(os.getenv("WS_CLOSE_TIMEOUT_SECONDS", "5"))
+# A send that takes longer than WS_SEND_TIMEOUT_SECONDS (0 = no limit) drops the
+# connection, so one stalled client doesn't hold up a broadcast to the others
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "2"))
+# /ws/plates sends a snapshot of live plates on connect, fully reloaded at most
+# this often (seconds) and kept current from plate and bid events in between
+WS_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("WS_SNAPSHOT_MAX_AGE_SECONDS", "60"))
+
+# Server-Sent Events (GET /plates/{id}/events): each watched plate keeps its
+# last SSE_REPLAY_EVENTS events for Last-Event-ID resumes. Idle streams get a
+# comment every SSE_KEEPALIVE_SECONDS so proxies keep them open, and streams
+# end after SSE_MAX_STREAM_SECONDS (clients reconnect after SSE_RETRY_MS).
+SSE_REPLAY_EVENTS = int(os.getenv("SSE_REPLAY_EVENTS", "256"))
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SSE_MAX_STREAM_SECONDS = float(os.getenv("SSE_MAX_STREAM_SECONDS", "300"))
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "3000"))
+
+# Server
+HOST = os.getenv("HOST", "127.0.0.1")
+PORT = int(os.getenv("PORT", "8000"))
+# Worker processes started by `python -m app` and gunicorn.conf.py. With more
+# than one, use the "database" or "redis" EVENT_BUS and shared stores.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Time a stopping worker gets to finish requests and flush notifications
+GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", "30"))
+
+# Plate and bid events reach the WebSocket clients and caches of other workers
+# through EVENT_BUS: "memory" (single process), "database" (events table polled
+# every EVENT_BUS_POLL_SECONDS, kept for EVENT_BUS_RETENTION_SECONDS) or
+# "redis" (pub/sub on EVENT_BUS_REDIS_URL).
+EVENT_BUS = os.getenv("EVENT_BUS", "memory")
+EVENT_BUS_POLL_SECONDS = float(os.getenv("EVENT_BUS_POLL_SECONDS", "0.2"))
+EVENT_BUS_RETENTION_SECONDS = float(os.getenv("EVENT_BUS_RETENTION_SECONDS", "3600"))
+EVENT_BUS_REDIS_URL = os.getenv("EVENT_BUS_REDIS_URL", "redis://localhost:6379/0")
+
+# Scheduled jobs (archiving, event purging) run on the one worker holding the
+# scheduler lock: a Postgres advisory lock, or a lock file next to a SQLite
+# database. SCHEDULER_LOCK_FILE forces a lock file at that path. Other workers
+# retry every SCHEDULER_LOCK_RETRY_SECONDS and take over when the owner stops.
+SCHEDULER_LOCK_FILE = os.getenv("SCHEDULER_LOCK_FILE")
+SCHEDULER_LOCK_RETRY_SECONDS = float(os.getenv("SCHEDULER_LOCK_RETRY_SECONDS", "5"))
+
+# Rate limiting: "<requests>/<second|minute|hour>" per route, keyed by user or IP.
+# Override with RATE_LIMITS="login=5/minute;bids:create=2/second"
+RATE_LIMITS = {
+    "login": "10/minute",
+    "bids:create": "5/second",
+    "bids:update": "5/second",
+}
+RATE_LIMITS.update(
+    item.strip().split("=", 1)
+    for item in os.getenv("RATE_LIMITS", "").split(";")
+    if "=" in item
+)
+# Shared rate-limit backend for multi-process deployments (in-process when unset)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+
+# Idempotency-Key replays on bid and plate mutations: responses are kept for
+# IDEMPOTENCY_TTL_SECONDS in "memory" (per process) or "database" (shared).
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "memory")
+
+# Admission control: shed requests with 429 when the average DB pool wait
+# (seconds) is above this threshold. 0 disables it.
+ADMISSION_POOL_WAIT_THRESHOLD = float(os.getenv("ADMISSION_POOL_WAIT_THRESHOLD", "0.5"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+# Metrics: log SQL statements slower than this many milliseconds with their
+# bound parameters. 0 disables the slow-query log.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+# With several workers, point this at an empty directory (cleared on every
+# deploy) so that /metrics aggregates the metrics of all of them.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# GET /plates/ orderings by highest_bid, bid_count and ending_soon are served
+# from in-memory indexes, fully rebuilt from the database this often (seconds)
+# in the background; a listing rebuilds them only when they are older than that
+PLATE_INDEX_MAX_AGE_SECONDS = float(os.getenv("PLATE_INDEX_MAX_AGE_SECONDS", "300"))
+
+# Post-commit side effects (WebSocket notifications) run on this many workers.
+# Submitting waits while TASK_RUNNER_MAX_PENDING effects are queued; shutdown
+# waits up to TASK_RUNNER_FLUSH_SECONDS for the queue to drain.
+TASK_RUNNER_WORKERS = int(os.getenv("TASK_RUNNER_WORKERS", "4"))
+TASK_RUNNER_MAX_PENDING = int(os.getenv("TASK_RUNNER_MAX_PENDING", "10000"))
+TASK_RUNNER_FLUSH_SECONDS = float(os.getenv("TASK_RUNNER_FLUSH_SECONDS", "10"))
+
+# Per-plate bid actors: route bid writes through asyncio tasks sharded by
+# plate id, validate in memory and group-commit accepted bids.
+BID_ACTORS_ENABLED = _env_bool("BID_ACTORS_ENABLED", False)
+BID_ACTOR_SHARDS = int(os.getenv("BID_ACTOR_SHARDS", "8"))
+BID_ACTOR_BATCH_SIZE = int(os.getenv("BID_ACTOR_BATCH_SIZE", "32"))
+
+# Group commit: collect bid creates and updates from concurrent requests for
+# up to BID_BATCH_WINDOW_MS (or BID_BATCH_MAX_SIZE writes) and commit them in
+# one transaction, e.g. to save an fsync per bid on SQLite. Unlike the bid
+# actors, validation runs against the database, so it works with any number
+# of workers. Ignored when BID_ACTORS_ENABLED, which group-commit already.
+BID_WRITE_BATCHING = _env_bool("BID_WRITE_BATCHING", False)
+BID_BATCH_WINDOW_MS = float(os.getenv("BID_BATCH_WINDOW_MS", "2"))
+BID_BATCH_MAX_SIZE = int(os.getenv("BID_BATCH_MAX_SIZE", "64"))
+
+# Archival: plates whose deadline passed more than ARCHIVE_AFTER_HOURS ago are
+# moved with their bids to the archive tables. With ARCHIVE_INTERVAL_SECONDS
+# set the app runs the job itself, otherwise run `python -m app.archive`.
+ARCHIVE_AFTER_HOURS = float(os.getenv("ARCHIVE_AFTER_HOURS", "24"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "0"))
+
+# Analytics: plates touched by bid writes are rolled up into plate_stats
+# every ANALYTICS_ROLLUP_SECONDS (0 disables the background rollup).
+ANALYTICS_ROLLUP_SECONDS = float(os.getenv("ANALYTICS_ROLLUP_SECONDS", "30"))
+# Most time buckets a bid timeline may be split into, larger requests get a 422
+# (the summary needs up to 10081, one per minute of its longest window)
+ANALYTICS_MAX_BUCKETS = int(os.getenv("ANALYTICS_MAX_BUCKETS", "20000"))
+# Most bids read for the summary's recent window, newest first; older bids in a
+# busier window are left out of its per-minute counts
+ANALYTICS_RECENT_MAX_BIDS = int(os.getenv("ANALYTICS_RECENT_MAX_BIDS", "100000"))
+
+# Proxy bidding: step by which a proxy outbids the runner-up (also the opening
+# bid when a proxy is the first bidder on a plate).
+PROXY_BID_INCREMENT = Decimal(os.getenv("PROXY_BID_INCREMENT", "1.00"))
@@ -1,9 +1,9 @@
 from datetime import datetime
-from typing import Optional
-from sqlalchemy import func
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Row, func, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from . import models, schemas
+from . import models, plate_index, schemas
 from .auth import get_password_hash
 
 
@@ -21,22 +21,6 @@ def create_user(db: Session, user: schemas.UserCreate):
     return db_user
 
 
-def get_plates(db: Session, skip: int = 0, limit: int = 100,
-               ordering: Optional[str] = None,
-               plate_number_contains: Optional[str] = None):
-    query = db.query(models.AutoPlate)
-
-    if plate_number_contains:
-        query = query.filter(models.AutoPlate.plate_number.contains(plate_number_contains))
-
-    if ordering == "deadline":
-        query = query.order_by(models.AutoPlate.deadline)
-    elif ordering == "-deadline":
-        query = query.order_by(models.AutoPlate.deadline.desc())
-
-    return query.offset(skip).limit(limit).all()
-
-
 def get_plate(db: Session, plate_id: int):
     return db.query(models.AutoPlate).filter(models.AutoPlate.id == plate_id).first()
 
@@ -119,11 +103,32 @@ def delete_plate(db: Session, plate_id: int):
     return {"detail": "Plate deleted successfully"}
 
 
+def get_archived_plate(db: Session, plate_id: int):
+    plate = db.query(models.ArchivedPlate).filter(models.ArchivedPlate.id == plate_id).first()
+
+    if not plate:
+        return None
+
+    bids = db.query(models.ArchivedBid).filter(models.ArchivedBid.plate_id == plate_id).all()
+
+    return {
+        "id": plate.id,
+        "plate_number": plate.plate_number,
+        "description": plate.description,
+        "deadline": plate.deadline,
+        "is_active": plate.is_active,
+        "created_by_id": plate.created_by_id,
+        "highest_bid": plate.highest_bid,
+        "bids": bids
+    }
+
+
 def get_plate_with_highest_bid(db: Session, plate_id: int):
     plate = get_plate(db, plate_id)
 
     if not plate:
-        return None
+        # Closed auctions may have been moved to the archive tables
+        return get_archived_plate(db, plate_id)
 
     highest_bid = db.query(func.max(models.Bid.amount)).filter(
         models.Bid.plate_id == plate_id
@@ -143,37 +148,123 @@ def get_plate_with_highest_bid(db: Session, plate_id: int):
     }
 
 
+def get_plate_rows(db: Session, skip: int = 0, limit: int = 100,
+                   ordering: Optional[str] = None,
+                   plate_number_contains: Optional[str] = None) -> List[Row]:
+    """Listing page as Core rows with the highest bid, in one query and
+    without ORM objects. Columns are in schemas.AutoPlate field order."""
+    plates, bids = models.AutoPlate.__table__, models.Bid.__table__
+    highest_bid = select(func.max(bids.c.amount)).where(bids.c.plate_id == plates.c.id).scalar_subquery()
+    query = select(
+        plates.c.plate_number, plates.c.description, plates.c.deadline, plates.c.id,
+        plates.c.is_active, plates.c.created_by_id, highest_bid.label("highest_bid")
+    )
+
+    if plate_number_contains:
+        query = query.where(plates.c.plate_number.contains(plate_number_contains))
+
+    if ordering == "deadline":
+        query = query.order_by(plates.c.deadline)
+    elif ordering == "-deadline":
+        query = query.order_by(plates.c.deadline.desc())
+
+    return db.execute(query.offset(skip).limit(limit)).all()
+
+
 def get_plates_with_highest_bids(db: Session, skip: int = 0, limit: int = 100,
                                  ordering: Optional[str] = None,
                                  plate_number_contains: Optional[str] = None):
-    plates = get_plates(db, skip, limit, ordering, plate_number_contains)
-    result = []
+    if ordering in plate_index.ORDERINGS:
+        return plate_index.plate_index.get_plates(db, ordering, skip, limit, plate_number_contains)
+    return get_plate_rows(db, skip, limit, ordering, plate_number_contains)
 
-    for plate in plates:
-        highest_bid = db.query(func.max(models.Bid.amount)).filter(
-            models.Bid.plate_id == plate.id
-        ).scalar()
 
-        plate_dict = {
-            "id": plate.id,
-            "plate_number": plate.plate_number,
-            "description": plate.description,
-            "deadline": plate.deadline,
-            "is_active": plate.is_active,
-            "created_by_id": plate.created_by_id,
-            "highest_bid": highest_bid
-        }
+PLATE_BATCH_FIELDS = ("id", "plate_number", "description", "deadline", "is_active",
+                      "created_by_id", "highest_bid", "bids")
+MAX_BATCH_SIZE = 100
 
-        result.append(plate_dict)
 
+def parse_plate_fields(fields: Optional[str], allowed=PLATE_BATCH_FIELDS) -> Tuple[str, ...]:
+    """Parse a comma-separated field selection, all allowed fields when empty"""
+    if not fields:
+        return allowed
+    selected = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in selected if field not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return ("id",) + tuple(field for field in selected if field != "id")
+
+
+def _plates_by_ids(db: Session, plate_model, bid_model, plate_ids: List[int], fields) -> Dict[int, dict]:
+    columns = [column for column in PLATE_BATCH_FIELDS[:6] if column in fields]
+    if "highest_bid" in fields and plate_model is models.ArchivedPlate:
+        columns.append("highest_bid")
+    rows = db.query(*[getattr(plate_model, column) for column in columns]).filter(
+        plate_model.id.in_(plate_ids)
+    ).all()
+    plates = {row.id: dict(row._mapping) for row in rows}
+    if not plates:
+        return plates
+
+    if "highest_bid" in fields and plate_model is models.AutoPlate:
+        highest_bids = dict(db.query(bid_model.plate_id, func.max(bid_model.amount)).filter(
+            bid_model.plate_id.in_(plates)
+        ).group_by(bid_model.plate_id).all())
+        for plate_id, plate in plates.items():
+            plate["highest_bid"] = highest_bids.get(plate_id)
+    if "bids" in fields:
+        for plate in plates.values():
+            plate["bids"] = []
+        bids = db.query(bid_model).filter(bid_model.plate_id.in_(plates)).order_by(bid_model.id).all()
+        for bid in bids:
+            plates[bid.plate_id]["bids"].append(bid)
+    return plates
+
+
+def get_plates_by_ids(db: Session, plate_ids: List[int], fields=PLATE_BATCH_FIELDS) -> List[dict]:
+    """Plates in the requested order with a fixed number of IN queries,
+    falling back to the archive for closed auctions"""
+    plate_ids = list(dict.fromkeys(plate_ids))
+    plates = _plates_by_ids(db, models.AutoPlate, models.Bid, plate_ids, fields)
+    missing = [plate_id for plate_id in plate_ids if plate_id not in plates]
+    if missing:
+        plates.update(_plates_by_ids(db, models.ArchivedPlate, models.ArchivedBid, missing, fields))
+    return [plates[plate_id] for plate_id in plate_ids if plate_id in plates]
+
+
+def get_bids_with_plates(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                         fields=PLATE_BATCH_FIELDS[:-1]) -> List[dict]:
+    """The user's bids, each with the current state of its plate"""
+    bids = get_bids_by_user(db, user_id, skip=skip, limit=limit)
+    plates = {plate["id"]: plate for plate in get_plates_by_ids(db, [bid.plate_id for bid in bids], fields)}
+    result = []
+    for bid in bids:
+        plate = plates.get(bid.plate_id, {"id": bid.plate_id})
+        highest_bid = plate.get("highest_bid")
+        result.append({
+            "id": bid.id,
+            "amount": bid.amount,
+            "user_id": bid.user_id,
+            "plate_id": bid.plate_id,
+            "created_at": bid.created_at,
+            "is_leading": bid.amount >= highest_bid if highest_bid is not None else None,
+            "plate": plate,
+        })
     return result
 
 
 # Bid operations
-def get_bids_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.Bid).filter(
-        models.Bid.user_id == user_id
-    ).offset(skip).limit(limit).all()
+def get_bids_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Row]:
+    """The user's bids as Core rows, columns in schemas.Bid field order"""
+    bids = models.Bid.__table__
+    return db.execute(
+        select(bids.c.amount, bids.c.id, bids.c.user_id, bids.c.plate_id, bids.c.created_at)
+        .where(bids.c.user_id == user_id)
+        .offset(skip).limit(limit)
+    ).all()
 
 
 def get_bid(db: Session, bid_id: int):
@@ -181,6 +272,15 @@ def get_bid(db: Session, bid_id: int):
 
 
 def create_bid(db: Session, bid: schemas.BidCreate, user_id: int):
+    db_bid = stage_bid(db, bid, user_id)
+    db.commit()
+    db.refresh(db_bid)
+    return db_bid
+
+
+def stage_bid(db: Session, bid: schemas.BidCreate, user_id: int):
+    """Validate and flush a new bid without committing, so that later writes
+    in the same transaction see it"""
     # Check if plate exists and is active
     plate = get_plate(db, bid.plate_id)
 
@@ -222,11 +322,19 @@ def create_bid(db: Session, bid: schemas.BidCreate, user_id: int):
         plate_id=bid.plate_id
     )
     db.add(db_bid)
+    db.flush()
+    return db_bid
+
+
+def update_bid(db: Session, bid_id: int, bid: schemas.BidUpdate, user_id: int):
+    db_bid = stage_bid_update(db, bid_id, bid, user_id)
     db.commit()
     db.refresh(db_bid)
     return db_bid
 
-def update_bid(db: Session, bid_id: int, bid: schemas.BidUpdate, user_id: int):
+
+def stage_bid_update(db: Session, bid_id: int, bid: schemas.BidUpdate, user_id: int):
+    """Validate and flush a bid update without committing"""
     db_bid = get_bid(db, bid_id)
 
     if not db_bid:
@@ -263,8 +371,7 @@ def update_bid(db: Session, bid_id: int, bid: schemas.BidUpdate, user_id: int):
         )
 
     db_bid.amount = bid.amount
-    db.commit()
-    db.refresh(db_bid)
+    db.flush()
     return db_bid
 
 
@@ -293,5 +400,10 @@ def delete_bid(db: Session, bid_id: int, user_id: int):
         )
 
     db.delete(db_bid)
+    # Withdrawing the bid also withdraws the user's proxy bid on the plate
+    db.query(models.ProxyBid).filter(
+        models.ProxyBid.plate_id == db_bid.plate_id,
+        models.ProxyBid.user_id == user_id
+    ).delete(synchronize_session=False)
     db.commit()
     return {"detail": "Bid deleted successfully"}
\ No newline at end of file
@@ -1,5 +1,7 @@
-import asyncio
-from . import crud
+from . import analytics, config, crud, proxy_bids
+from .bid_actors import bid_actors
+from .tasks import task_runner
+from .write_batcher import bid_batcher
 from .websocket import notify_plate_update, notify_bid_update
 
 
@@ -16,14 +18,16 @@ async def create_plate_ws(db, plate, user_id):
         "is_active": result.is_active,
         "created_by_id": result.created_by_id
     }
-    # Schedule the notification as a background task
-    asyncio.create_task(notify_plate_update("create", plate_dict))
+    # Queue the notification on the background task runner
+    await task_runner.submit(notify_plate_update, "create", plate_dict, key=result.id)
     return result
 
 
 async def update_plate_ws(db, plate_id, plate):
     """Update plate and notify connected clients"""
     result = crud.update_plate(db, plate_id, plate)
+    if config.BID_ACTORS_ENABLED:
+        bid_actors.invalidate(plate_id)
     plate_dict = {
         "id": result.id,
         "plate_number": result.plate_number,
@@ -32,21 +36,32 @@ async def update_plate_ws(db, plate_id, plate):
         "is_active": result.is_active,
         "created_by_id": result.created_by_id
     }
-    asyncio.create_task(notify_plate_update("update", plate_dict))
+    await task_runner.submit(notify_plate_update, "update", plate_dict, key=plate_id)
     return result
 
 
 async def delete_plate_ws(db, plate_id):
     """Delete plate and notify connected clients"""
     result = crud.delete_plate(db, plate_id)
-    asyncio.create_task(notify_plate_update("delete", {"id": plate_id}))
+    if config.BID_ACTORS_ENABLED:
+        bid_actors.invalidate(plate_id)
+    await task_runner.submit(notify_plate_update, "delete", {"id": plate_id}, key=plate_id)
     return result
 
 
 # Bid operations with WebSocket notifications
 async def create_bid_ws(db, bid, user_id):
     """Create bid and notify connected clients"""
-    result = crud.create_bid(db, bid, user_id)
+    if config.BID_ACTORS_ENABLED:
+        # Return the request's pooled connection while waiting for the actor
+        db.close()
+        result = await bid_actors.create_bid(bid, user_id)
+    elif config.BID_WRITE_BATCHING:
+        db.close()
+        result = await bid_batcher.create_bid(bid, user_id)
+    else:
+        result = crud.create_bid(db, bid, user_id)
+    analytics.mark_dirty(result.plate_id, result.user_id)
     bid_dict = {
         "id": result.id,
         "amount": str(result.amount),
@@ -54,21 +69,38 @@ async def create_bid_ws(db, bid, user_id):
         "plate_id": result.plate_id,
         "created_at": result.created_at.isoformat()
     }
-    asyncio.create_task(notify_bid_update("create", bid_dict))
+    await task_runner.submit(notify_bid_update, "create", bid_dict, key=result.plate_id)
+    await _resolve_proxy_bids(db, result.plate_id)
     return result
 
 
 async def update_bid_ws(db, bid_id, bid, user_id):
     """Update bid and notify connected clients"""
-    result = crud.update_bid(db, bid_id, bid, user_id)
+    existing = crud.get_bid(db, bid_id)
+    # Lets the outbid index work out who led before this update
+    previous_amount = str(existing.amount) if existing else None
+    if existing and config.BID_ACTORS_ENABLED:
+        # Serialize with the other writes on the plate
+        db.close()
+        result = await bid_actors.execute(
+            existing.plate_id, lambda session: crud.update_bid(session, bid_id, bid, user_id)
+        )
+    elif config.BID_WRITE_BATCHING and not config.BID_ACTORS_ENABLED:
+        db.close()
+        result = await bid_batcher.update_bid(bid_id, bid, user_id)
+    else:
+        result = crud.update_bid(db, bid_id, bid, user_id)
+    analytics.mark_dirty(result.plate_id, result.user_id)
     bid_dict = {
         "id": result.id,
         "amount": str(result.amount),
         "user_id": result.user_id,
         "plate_id": result.plate_id,
-        "created_at": result.created_at.isoformat()
+        "created_at": result.created_at.isoformat(),
+        "previous_amount": previous_amount
     }
-    asyncio.create_task(notify_bid_update("update", bid_dict))
+    await task_runner.submit(notify_bid_update, "update", bid_dict, key=result.plate_id)
+    await _resolve_proxy_bids(db, result.plate_id)
     return result
 
 
@@ -83,6 +115,53 @@ async def delete_bid_ws(db, bid_id, user_id):
         "plate_id": bid.plate_id,
         "created_at": bid.created_at.isoformat()
     }
-    result = crud.delete_bid(db, bid_id, user_id)
-    asyncio.create_task(notify_bid_update("delete", bid_dict))
-    return result
\ No newline at end of file
+    if config.BID_ACTORS_ENABLED:
+        db.close()
+        result = await bid_actors.execute(
+            bid.plate_id, lambda session: crud.delete_bid(session, bid_id, user_id)
+        )
+    else:
+        result = crud.delete_bid(db, bid_id, user_id)
+    analytics.mark_dirty(bid.plate_id, bid.user_id)
+    await task_runner.submit(notify_bid_update, "delete", bid_dict, key=bid.plate_id)
+    return result
+
+
+# Proxy bids: only the resulting visible price change is broadcast
+async def _notify_proxy_result(bid, created):
+    if bid is None:
+        return
+    analytics.mark_dirty(bid.plate_id, bid.user_id)
+    bid_dict = {
+        "id": bid.id,
+        "amount": str(bid.amount),
+        "user_id": bid.user_id,
+        "plate_id": bid.plate_id,
+        "created_at": bid.created_at.isoformat()
+    }
+    await task_runner.submit(notify_bid_update, "create" if created else "update", bid_dict, key=bid.plate_id)
+
+
+async def _resolve_proxy_bids(db, plate_id):
+    """Let the plate's proxies respond to a manual bid"""
+    if not proxy_bids.has_proxy_bids(db, plate_id):
+        return
+    if config.BID_ACTORS_ENABLED:
+        db.close()
+        bid, created = await bid_actors.execute(plate_id, lambda session: proxy_bids.resolve(session, plate_id))
+    else:
+        bid, created = proxy_bids.resolve(db, plate_id)
+    await _notify_proxy_result(bid, created)
+
+
+async def set_proxy_bid_ws(db, proxy, user_id):
+    """Set a proxy bid and notify clients of the bid it placed, if any"""
+    if config.BID_ACTORS_ENABLED:
+        db.close()
+        result, bid, created = await bid_actors.execute(
+            proxy.plate_id, lambda session: proxy_bids.set_proxy_bid(session, proxy, user_id)
+        )
+    else:
+        result, bid, created = proxy_bids.set_proxy_bid(db, proxy, user_id)
+    await _notify_proxy_result(bid, created)
+    return result
@@ -1,21 +1,225 @@
-from sqlalchemy import create_engine
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./database1.db"
+from . import config
+from .metrics import DB_POOL_WAIT_SECONDS, instrument_engine
+
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    # Readers on the read-only pool don't block the writer (and vice versa)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+def _create_engine(url: str):
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    new_engine = create_engine(url, connect_args=connect_args)
+    instrument_engine(new_engine)
+    return new_engine
+
+
+def _create_read_engine(primary, url: str):
+    if config.READ_DATABASE_URL:
+        return _create_engine(config.READ_DATABASE_URL)
+    if config.SQLITE_READ_POOL and primary.dialect.name == "sqlite":
+        event.listen(primary, "connect", _enable_wal)
+        path = make_url(url).database
+        return _create_engine(f"sqlite:///file:{path}?mode=ro&uri=true")
+    return primary
+
+
+class _Engines:
+    primary = None
+    read = None
+    url = None
+
+
+_engines = _Engines()
+_engines_lock = threading.Lock()
+
+
+def init_engines(url: Optional[str] = None):
+    """Create the primary and read engines. Called from the app lifespan, and
+    lazily by the first session when running without one (scripts, benchmarks).
+
+    The engines are process-wide, so only one application can run per process;
+    asking for a different database while they exist raises RuntimeError."""
+    with _engines_lock:
+        if _engines.primary is not None:
+            if url is not None and url != _engines.url:
+                raise RuntimeError(
+                    f"Database engines are already bound to {make_url(_engines.url)!r}, "
+                    "only one application per process is supported"
+                )
+        else:
+            url = url or SQLALCHEMY_DATABASE_URL
+            _engines.url = url
+            _engines.primary = _create_engine(url)
+            _engines.read = _create_read_engine(_engines.primary, url)
+            SessionLocal.configure(bind=_engines.primary)
+            ReadSessionLocal.configure(bind=_engines.read)
+    return _engines.primary
+
+
+def dispose_engines():
+    """Close pooled connections, e.g. on shutdown"""
+    with _engines_lock:
+        if _engines.read is not None and _engines.read is not _engines.primary:
+            _engines.read.dispose()
+        if _engines.primary is not None:
+            _engines.primary.dispose()
+        _engines.primary = _engines.read = _engines.url = None
+
+
+class _LazySessionmaker(sessionmaker):
+    def __call__(self, **local_kw):
+        if _engines.primary is None:
+            init_engines()
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+ReadSessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+
+
+def __getattr__(name):
+    # `engine` and `read_engine` are created on first access
+    if name == "engine":
+        return init_engines()
+    if name == "read_engine":
+        init_engines()
+        return _engines.read
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def has_read_replica() -> bool:
+    if _engines.primary is None:
+        init_engines()
+    return _engines.read is not _engines.primary
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
-# Dependency
-def get_db():
-    db = SessionLocal()
+class PoolWaitMonitor:
+    """Time-decayed average of how long requests wait for a pooled connection.
+
+    The average decays towards zero while no requests are recorded, so load
+    shedding based on it recovers on its own once the pool drains.
+    """
+
+    def __init__(self, half_life: float = 2.0):
+        self.half_life = half_life
+        self._average = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decayed(self, now: float) -> float:
+        elapsed = now - self._updated
+        return self._average * math.pow(0.5, elapsed / self.half_life)
+
+    def record(self, seconds: float):
+        with self._lock:
+            now = time.monotonic()
+            average = self._decayed(now)
+            self._average = average * 0.7 + seconds * 0.3
+            self._updated = now
+
+    def current(self) -> float:
+        with self._lock:
+            return self._decayed(time.monotonic())
+
+
+pool_wait = PoolWaitMonitor()
+
+
+class PrimaryPins:
+    """Usernames whose reads must go to the primary until their pin expires"""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._expiry: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def pin(self, username: str, seconds: float):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._expiry) >= self.max_entries:
+                self._expiry = {name: expiry for name, expiry in self._expiry.items() if expiry > now}
+            self._expiry[username] = now + seconds
+
+    def is_pinned(self, username: Optional[str]) -> bool:
+        if not username:
+            return False
+        with self._lock:
+            expiry = self._expiry.get(username)
+            if expiry is None:
+                return False
+            if expiry <= time.monotonic():
+                del self._expiry[username]
+                return False
+            return True
+
+
+primary_pins = PrimaryPins()
+
+
+def pin_to_primary(username: str):
+    """Route the user's reads to the primary right after one of their writes"""
+    if has_read_replica():
+        primary_pins.pin(username, config.READ_YOUR_WRITES_SECONDS)
+
+
+def _token_subject(request: Request) -> Optional[str]:
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    from jose import JWTError, jwt
+
     try:
+        # Only used to pick an engine, so the signature doesn't matter here
+        return jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+
+
+def _session(session_factory):
+    db = session_factory()
+    try:
+        # Check out the connection up front so the pool wait can be measured
+        started = time.perf_counter()
+        db.connection()
+        waited = time.perf_counter() - started
+        pool_wait.record(waited)
+        DB_POOL_WAIT_SECONDS.observe(waited)
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Dependency
+def get_db():
+    yield from _session(SessionLocal)
+
+
+get_db_write = get_db
+
+
+def get_db_read(request: Request):
+    """Session on the read engine, or on the primary for recently pinned users"""
+    if not has_read_replica() or primary_pins.is_pinned(_token_subject(request)):
+        yield from _session(SessionLocal)
+    else:
+        yield from _session(ReadSessionLocal)
@@ -0,0 +1,229 @@
+"""Event bus that carries plate and bid events between worker processes.
+
+Every worker delivers its own events to its WebSocket clients and publishes
+them on the bus. The other workers receive them and deliver them to their
+clients and in-memory caches (snapshot, plate index, outbid index) as if the
+change had been made locally. With a single worker the "memory" bus does
+nothing.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import delete, func, insert, select
+
+from . import config, models
+from .database import SessionLocal
+from .metrics import EVENT_BUS_PUBLISHED, EVENT_BUS_RECEIVED
+
+logger = logging.getLogger(__name__)
+
+# Called with (kind, action, data) for every event published by another worker
+Deliver = Callable[[str, str, dict], Awaitable[None]]
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class EventBus:
+    """In-process bus, enough for a single worker"""
+
+    origin: Optional[str] = None
+    deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver):
+        # Taken on start rather than import, workers may be forked after it
+        self.origin = _worker_id()
+        self.deliver = deliver
+
+    async def stop(self):
+        pass
+
+    async def publish(self, kind: str, action: str, data: dict):
+        pass
+
+    async def _receive(self, event: Dict[str, Any]):
+        if event["origin"] == self.origin or self.deliver is None:
+            return
+        EVENT_BUS_RECEIVED.inc()
+        try:
+            await self.deliver(event["kind"], event["action"], event["data"])
+        except Exception:
+            logger.exception("Delivering a %s event from %s failed", event["kind"], event["origin"])
+
+
+class DatabaseEventBus(EventBus):
+    """Events appended to the events table and polled by every worker"""
+
+    # How long to wait for an id that was allocated but not committed yet,
+    # before treating it as a rolled back insert
+    GAP_TIMEOUT = 2.0
+
+    def __init__(self, poll_interval: float, retention: float, batch_size: int = 500):
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.batch_size = batch_size
+        self.last_id = 0
+        self._gap_since: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        self.last_id = await asyncio.to_thread(self._max_id)
+        self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def publish(self, kind: str, action: str, data: dict):
+        try:
+            await asyncio.to_thread(self._insert, kind, action, data)
+            EVENT_BUS_PUBLISHED.inc()
+        except Exception:
+            # Local clients already got the event, only other workers miss it
+            logger.exception("Publishing a %s event failed", kind)
+
+    def _max_id(self) -> int:
+        db = SessionLocal()
+        try:
+            return db.scalar(select(func.max(models.Event.id))) or 0
+        finally:
+            db.close()
+
+    def _insert(self, kind: str, action: str, data: dict):
+        db = SessionLocal()
+        try:
+            db.execute(insert(models.Event).values(
+                origin=self.origin, kind=kind, action=action,
+                payload=json.dumps(data, default=str), created_at=datetime.now(),
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    def _fetch(self):
+        event = models.Event
+        db = SessionLocal()
+        try:
+            return db.execute(
+                select(event.id, event.origin, event.kind, event.action, event.payload)
+                .where(event.id > self.last_id).order_by(event.id).limit(self.batch_size)
+            ).all()
+        finally:
+            db.close()
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                rows = await asyncio.to_thread(self._fetch)
+            except Exception:
+                logger.exception("Polling the event bus failed")
+                continue
+            for event_id, origin, kind, action, payload in rows:
+                if event_id != self.last_id + 1:
+                    # Concurrent transactions may commit ids out of order
+                    now = time.monotonic()
+                    self._gap_since = self._gap_since or now
+                    if now - self._gap_since < self.GAP_TIMEOUT:
+                        break
+                self._gap_since = None
+                self.last_id = event_id
+                await self._receive({"origin": origin, "kind": kind, "action": action, "data": json.loads(payload)})
+
+    def purge(self) -> int:
+        """Delete events older than the retention period"""
+        db = SessionLocal()
+        try:
+            result = db.execute(delete(models.Event).where(
+                models.Event.created_at < datetime.now() - timedelta(seconds=self.retention)
+            ))
+            db.commit()
+            return result.rowcount
+        finally:
+            db.close()
+
+    async def purge_periodically(self):
+        """Scheduled job, run by the worker holding the scheduler lock"""
+        while True:
+            await asyncio.sleep(min(self.retention, 600))
+            try:
+                await asyncio.to_thread(self.purge)
+            except Exception:
+                logger.exception("Purging the event bus failed")
+
+
+class RedisEventBus(EventBus):
+    """Events sent through Redis pub/sub"""
+
+    CHANNEL = "auction:events"
+
+    def __init__(self, url: str):
+        self.url = url
+        self.client = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver):
+        import redis.asyncio as redis
+
+        await super().start(deliver)
+        self.client = redis.Redis.from_url(self.url)
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def publish(self, kind: str, action: str, data: dict):
+        try:
+            await self.client.publish(self.CHANNEL, json.dumps(
+                {"origin": self.origin, "kind": kind, "action": action, "data": data}, default=str
+            ))
+            EVENT_BUS_PUBLISHED.inc()
+        except Exception:
+            logger.exception("Publishing a %s event failed", kind)
+
+    async def _listen(self):
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            await self._receive(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event bus subscription failed, resubscribing")
+                await asyncio.sleep(1)
+
+
+def _create_bus() -> EventBus:
+    if config.EVENT_BUS == "database":
+        return DatabaseEventBus(config.EVENT_BUS_POLL_SECONDS, config.EVENT_BUS_RETENTION_SECONDS)
+    if config.EVENT_BUS == "redis":
+        return RedisEventBus(config.EVENT_BUS_REDIS_URL)
+    return EventBus()
+
+
+event_bus: EventBus = _create_bus()
+
+
+def set_event_bus(new_bus: EventBus):
+    global event_bus
+    event_bus = new_bus
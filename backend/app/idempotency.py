@@ -0,0 +1,204 @@
+"""Idempotency-Key support for mutating routes.
+
+Routers created with route_class=IdempotentRoute store the response of every
+POST/PUT/PATCH/DELETE sent with an Idempotency-Key header. A retry with the
+same key (from the same caller, to the same path) gets the stored response
+back without running the endpoint again, so no bid logic, commit or
+broadcast happens twice. Responses expire after IDEMPOTENCY_TTL_SECONDS.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.routing import APIRoute
+from sqlalchemy import delete, select
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from . import config, models
+from .database import SessionLocal
+
+HEADER = "Idempotency-Key"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    media_type: Optional[str]
+    body: bytes
+
+
+class IdempotencyStore(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[StoredResponse]:
+        ...
+
+    @abstractmethod
+    def put(self, key: str, response: StoredResponse, ttl: float):
+        ...
+
+
+class InMemoryStore(IdempotencyStore):
+    """Per-process store, enough for a single worker"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> (expiry time, response)
+        self.responses: Dict[str, Tuple[float, StoredResponse]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self.responses.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.responses[key]
+                return None
+            return entry[1]
+
+    def put(self, key: str, response: StoredResponse, ttl: float):
+        now = time.monotonic()
+        with self._lock:
+            if key not in self.responses and len(self.responses) >= self.max_keys:
+                self._prune(now)
+            self.responses[key] = (now + ttl, response)
+
+    def _prune(self, now: float):
+        for key in [key for key, (expires, _) in self.responses.items() if expires <= now]:
+            del self.responses[key]
+        # Still full of live keys: drop the ones closest to expiring
+        overflow = len(self.responses) - self.max_keys + 1
+        if overflow > 0:
+            for key in sorted(self.responses, key=lambda key: self.responses[key][0])[:overflow]:
+                del self.responses[key]
+
+
+class DatabaseStore(IdempotencyStore):
+    """Responses shared by all workers through the idempotency_keys table"""
+
+    def __init__(self, purge_every: int = 1000):
+        self.purge_every = purge_every
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        db = SessionLocal()
+        try:
+            record = db.scalar(select(models.IdempotencyRecord).where(
+                models.IdempotencyRecord.key == key,
+                models.IdempotencyRecord.expires_at > datetime.now()
+            ))
+            if record is None:
+                return None
+            return StoredResponse(record.fingerprint, record.status_code, record.media_type, record.body)
+        finally:
+            db.close()
+
+    def put(self, key: str, response: StoredResponse, ttl: float):
+        now = datetime.now()
+        db = SessionLocal()
+        try:
+            db.merge(models.IdempotencyRecord(
+                key=key,
+                fingerprint=response.fingerprint,
+                status_code=response.status_code,
+                media_type=response.media_type,
+                body=response.body,
+                expires_at=now + timedelta(seconds=ttl),
+            ))
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                db.execute(delete(models.IdempotencyRecord).where(models.IdempotencyRecord.expires_at <= now))
+            db.commit()
+        finally:
+            db.close()
+
+
+def _create_store() -> IdempotencyStore:
+    if config.IDEMPOTENCY_STORE == "database":
+        return DatabaseStore()
+    return InMemoryStore()
+
+
+store: IdempotencyStore = _create_store()
+
+
+def set_store(new_store: IdempotencyStore):
+    global store
+    store = new_store
+
+
+# Requests currently running per key, retries wait for them instead of racing
+_in_flight: Dict[str, asyncio.Event] = {}
+
+
+def _scope_key(request: Request, key: str) -> str:
+    # Keys are only shared by requests with the same credentials, method and path
+    caller = request.headers.get("authorization", "")
+    raw = "\n".join((caller, request.method, request.url.path, key))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _replay(stored: StoredResponse) -> Response:
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type=stored.media_type,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+class IdempotentRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            key = request.headers.get(HEADER)
+            if not key or request.method not in MUTATING_METHODS:
+                return await handler(request)
+            if len(key) > MAX_KEY_LENGTH:
+                return JSONResponse(
+                    {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}, status_code=400
+                )
+
+            scope_key = _scope_key(request, key)
+            fingerprint = hashlib.sha256(await request.body()).hexdigest()
+            while scope_key in _in_flight:
+                await _in_flight[scope_key].wait()
+            # Claimed before the lookup, so a duplicate arriving meanwhile waits
+            done = _in_flight[scope_key] = asyncio.Event()
+            try:
+                stored = await run_in_threadpool(store.get, scope_key)
+                if stored is not None:
+                    if stored.fingerprint != fingerprint:
+                        return JSONResponse(
+                            {"detail": f"{HEADER} was already used with a different request"}, status_code=422
+                        )
+                    return _replay(stored)
+
+                try:
+                    response = await handler(request)
+                except HTTPException as exc:
+                    # Rejections (400, 403, 409, ...) are answered the same way on a retry
+                    response = await http_exception_handler(request, exc)
+                # Server errors are not stored so that a retry can succeed
+                if response.status_code < 500 and hasattr(response, "body"):
+                    await run_in_threadpool(store.put, scope_key, StoredResponse(
+                        fingerprint, response.status_code, response.media_type, bytes(response.body)
+                    ), config.IDEMPOTENCY_TTL_SECONDS)
+                return response
+            finally:
+                del _in_flight[scope_key]
+                done.set()
+
+        return route_handler
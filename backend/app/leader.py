@@ -0,0 +1,146 @@
+"""Scheduler leader election between worker processes.
+
+Jobs that must run once per deployment rather than once per worker (archiving
+closed auctions, purging the event bus) only run in the worker holding the
+scheduler lock. The lock is released when its worker stops, or by the OS or
+database when the worker dies. A waiting worker then takes over.
+"""
+import asyncio
+import fcntl
+import logging
+import os
+import tempfile
+import zlib
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from . import config
+from .metrics import SCHEDULER_LEADER
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerLock(ABC):
+    @abstractmethod
+    def acquire(self) -> bool:
+        ...
+
+    def held(self) -> bool:
+        return True
+
+    @abstractmethod
+    def release(self):
+        ...
+
+
+class FileLock(SchedulerLock):
+    """flock() on a file shared by the workers of one host"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.truncate(0)
+        lock_file.write(f"{os.getpid()}\n")
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class AdvisoryLock(SchedulerLock):
+    """Postgres session advisory lock, held by a dedicated connection"""
+
+    KEY = zlib.crc32(b"bidding_plate_app.scheduler")
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._connection = None
+
+    def acquire(self) -> bool:
+        connection = self.engine.connect()
+        try:
+            acquired = connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.KEY})
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def held(self) -> bool:
+        # The lock goes with the connection, e.g. on a database failover
+        try:
+            self._connection.scalar(text("SELECT 1"))
+            self._connection.commit()
+            return True
+        except Exception:
+            return False
+
+    def release(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.KEY})
+            self._connection.commit()
+        except Exception:
+            # Never return a connection that may still hold the lock to the pool
+            self._connection.invalidate()
+        finally:
+            self._connection.close()
+            self._connection = None
+
+
+def create_lock(engine: Engine) -> SchedulerLock:
+    if config.SCHEDULER_LOCK_FILE:
+        return FileLock(config.SCHEDULER_LOCK_FILE)
+    if engine.dialect.name == "postgresql":
+        return AdvisoryLock(engine)
+    database = engine.url.database
+    if engine.dialect.name == "sqlite" and database and database != ":memory:":
+        return FileLock(f"{database}.scheduler.lock")
+    return FileLock(os.path.join(tempfile.gettempdir(), "bidding_plate_app.scheduler.lock"))
+
+
+async def lead(lock: SchedulerLock, jobs: List[Callable[[], Awaitable[None]]],
+               retry: float = config.SCHEDULER_LOCK_RETRY_SECONDS):
+    """Run `jobs` while this worker holds `lock`, background loop started by the app lifespan"""
+    while True:
+        try:
+            acquired = await asyncio.to_thread(lock.acquire)
+        except Exception:
+            logger.exception("Taking the scheduler lock failed")
+            acquired = False
+        if acquired:
+            logger.info("Worker %d took the scheduler lock", os.getpid())
+            SCHEDULER_LEADER.set(1)
+            tasks = [asyncio.create_task(job()) for job in jobs]
+            try:
+                while await asyncio.to_thread(lock.held):
+                    await asyncio.sleep(retry)
+                logger.warning("Worker %d lost the scheduler lock", os.getpid())
+            finally:
+                SCHEDULER_LEADER.set(0)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                lock.release()
+        await asyncio.sleep(retry)
@@ -1,55 +1,241 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
-from . import routers
-from .database import engine, Base
+import asyncio
+import logging
+import signal
+import threading
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Optional
+
+from fastapi import APIRouter, FastAPI, WebSocket, WebSocketDisconnect, Depends, Query, status
+from . import config, database, events, routers
+from .analytics import rollup_periodically
+from .archive import archive_periodically
+from .bid_actors import bid_actors
+from .compression import CompressionMiddleware
+from .leader import create_lock, lead
+from .metrics import MetricsMiddleware
+from .ratelimit import AdmissionControlMiddleware
 from starlette.middleware.cors import CORSMiddleware
-from .websocket import manager
-# from .auth_ws import get_current_user_ws
+from .plate_index import plate_index
+from .snapshot import plate_snapshot
+from .sse import plate_streams
+from .tasks import task_runner
+from .websocket import deliver_event, manager, frame_format_supported
+from .write_batcher import bid_batcher
+from .auth_ws import get_current_user_ws
 # import json
 
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
+# The schema is managed by migrations: run `python -m app.migrate upgrade`
+# once per deploy instead of creating tables on import.
 
-app = FastAPI()
+ws_router = APIRouter()
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify the actual origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# Include API routes
-app.include_router(routers.router)
+async def _authenticate(websocket: WebSocket, token: Optional[str]):
+    """User id for the `token` query parameter, None for anonymous clients and
+    False (after closing the socket) for an invalid token"""
+    if not token:
+        return None
+    user = await get_current_user_ws(websocket, token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return False
+    return user.id
 
 
-@app.websocket("/ws/plates")
-async def websocket_plates(websocket: WebSocket):
-    await manager.connect(websocket, "plates")
+async def _serve(websocket: WebSocket, client_type: str):
+    """Read until the client goes away, every message counts as a heartbeat"""
     try:
         while True:
-            # Keep the connection alive, wait for client messages but don't do anything with them
-            data = await websocket.receive_text()
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, "plates")
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            manager.touch(websocket)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        manager.disconnect(websocket, client_type)
 
 
-@app.websocket("/ws/bids")
-async def websocket_bids(websocket: WebSocket):
-    await manager.connect(websocket, "bids")
-    try:
-        while True:
-            # Keep the connection alive
-            data = await websocket.receive_text()
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, "bids")
+@ws_router.websocket("/ws/plates")
+async def websocket_plates(
+    websocket: WebSocket,
+    frame_format: str = Query("json", alias="format"),
+    snapshot: bool = Query(True, description="Send the current state of the plates on connect"),
+    plates: Optional[str] = Query(None, description="Comma-separated plate ids to limit the snapshot to"),
+    token: Optional[str] = Query(None, description="Access token, enables personal messages such as outbid notices"),
+):
+    if not frame_format_supported(frame_format):
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+        return
+    user_id = await _authenticate(websocket, token)
+    if user_id is False or not await manager.connect(websocket, "plates", frame_format, user_id):
+        return
+    if snapshot:
+        plate_ids = [int(plate_id) for plate_id in plates.split(",") if plate_id.strip().isdigit()] if plates else None
+        try:
+            await manager.send_frame(websocket, await plate_snapshot.frame(frame_format, plate_ids))
+        except (RuntimeError, WebSocketDisconnect):
+            manager.disconnect(websocket, "plates")
+            return
+    await _serve(websocket, "plates")
+
+
+@ws_router.websocket("/ws/bids")
+async def websocket_bids(
+    websocket: WebSocket,
+    frame_format: str = Query("json", alias="format"),
+    token: Optional[str] = Query(None, description="Access token, enables personal messages such as outbid notices"),
+):
+    if not frame_format_supported(frame_format):
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+        return
+    user_id = await _authenticate(websocket, token)
+    if user_id is False or not await manager.connect(websocket, "bids", frame_format, user_id):
+        return
+    await _serve(websocket, "bids")
+
+
+def _check_multi_worker_settings():
+    """Warn about per-process state that other workers cannot see"""
+    if config.EVENT_BUS == "memory":
+        logger.warning("EVENT_BUS=memory: WebSocket clients only get events from their own worker")
+    if config.IDEMPOTENCY_STORE == "memory":
+        logger.warning("IDEMPOTENCY_STORE=memory: retries that reach another worker are not replayed")
+    if not config.RATE_LIMIT_REDIS_URL:
+        logger.warning("RATE_LIMIT_REDIS_URL is not set: rate limits apply per worker")
+    if config.BID_ACTORS_ENABLED:
+        logger.warning("BID_ACTORS_ENABLED: bid actors validate against per-worker state, "
+                       "run a single worker with them")
+
+
+def _end_streams_on_exit(loop: asyncio.AbstractEventLoop):
+    """Chain the server's SIGINT/SIGTERM handlers to end SSE streams at once.
+    The server waits for open responses before the lifespan shutdown runs, so
+    streams would otherwise hold every restart until the graceful timeout."""
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(signum)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(plate_streams.close)
+            previous(signum, frame)
+
+        signal.signal(signum, handler)
+
 
+def create_app(database_url: Optional[str] = None) -> FastAPI:
+    """Build a new application. Engines, actors and WebSocket connections are
+    set up and torn down by its lifespan rather than at import time.
 
-# Remove the get_app function since we're creating the app directly
-def get_application():
+    They are process-wide, so run one application per process: shutting one
+    down disposes the engines of all of them."""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        engine = database.init_engines(database_url)
+        if config.WEB_CONCURRENCY > 1:
+            _check_multi_worker_settings()
+        app.state.manager = manager
+        manager.draining = False
+        await asyncio.to_thread(plate_index.rebuild_now)
+        app.state.bid_actors = bid_actors
+        await events.event_bus.start(deliver_event)
+        _end_streams_on_exit(asyncio.get_running_loop())
+        background = []
+        # Jobs that run on one worker only
+        scheduled = []
+        if config.ARCHIVE_INTERVAL_SECONDS > 0:
+            scheduled.append(partial(archive_periodically, config.ARCHIVE_INTERVAL_SECONDS))
+        if isinstance(events.event_bus, events.DatabaseEventBus):
+            scheduled.append(events.event_bus.purge_periodically)
+        if scheduled:
+            background.append(asyncio.create_task(lead(create_lock(engine), scheduled)))
+        if config.WS_PING_INTERVAL_SECONDS > 0:
+            background.append(asyncio.create_task(
+                manager.heartbeat(config.WS_PING_INTERVAL_SECONDS, config.WS_IDLE_TIMEOUT_SECONDS)
+            ))
+        if config.PLATE_INDEX_MAX_AGE_SECONDS > 0:
+            # Twice per max age, so listings find the index expired only if a rebuild fails
+            background.append(asyncio.create_task(
+                plate_index.rebuild_periodically(config.PLATE_INDEX_MAX_AGE_SECONDS / 2)
+            ))
+        if config.ANALYTICS_ROLLUP_SECONDS > 0:
+            background.append(asyncio.create_task(rollup_periodically(config.ANALYTICS_ROLLUP_SECONDS)))
+        try:
+            yield
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            await bid_batcher.stop()
+            # Deliver queued notifications before the sockets are closed
+            await task_runner.stop()
+            await events.event_bus.stop()
+            # Clients reconnect, to another worker during a rolling restart
+            await manager.close_all(status.WS_1012_SERVICE_RESTART)
+            await bid_actors.stop()
+            database.dispose_engines()
+
+    app = FastAPI(lifespan=lifespan)
+
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # In production, specify the actual origins
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Shed load while the database pool is saturated
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        threshold=config.ADMISSION_POOL_WAIT_THRESHOLD,
+        retry_after=config.ADMISSION_RETRY_AFTER,
+        exempt_paths=("/metrics",),
+    )
+
+    # Compress large listing/detail responses
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=config.GZIP_COMPRESS_LEVEL,
+        brotli_quality=config.BROTLI_QUALITY,
+    )
+
+    # Per-route latency and SQL statement metrics, exposed on /metrics
+    app.add_middleware(MetricsMiddleware)
+
+    # Include API routes
+    app.include_router(routers.router)
+    app.include_router(ws_router)
     return app
 
 
+_application: Optional[FastAPI] = None
+
+
+def get_application() -> FastAPI:
+    """The default application, built on first use"""
+    global _application
+    if _application is None:
+        _application = create_app()
+    return _application
+
+
+def __getattr__(name):
+    # Keeps `uvicorn app.main:app` working without building the app on import
+    if name == "app":
+        return get_application()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 
 # from fastapi import FastAPI
 # from . import routers
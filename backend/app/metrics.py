@@ -0,0 +1,129 @@
+import contextvars
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import config
+
+logger = logging.getLogger("app.slow_query")
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+HTTP_REQUEST_SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements executed per HTTP request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100, 250),
+)
+HTTP_REQUEST_SQL_SECONDS = Histogram(
+    "http_request_sql_seconds", "Time spent in SQL per HTTP request", ["method", "route"]
+)
+SQL_STATEMENTS = Counter("sql_statements_total", "SQL statements executed")
+SQL_STATEMENT_SECONDS = Histogram("sql_statement_duration_seconds", "SQL statement latency")
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+WS_CONNECTIONS = Gauge("ws_connections", "Open WebSocket connections", ["channel"])
+WS_BROADCAST_SECONDS = Histogram(
+    "ws_broadcast_duration_seconds", "Time to fan a message out to a channel", ["channel"]
+)
+WS_DROPPED_SENDS = Counter("ws_dropped_sends_total", "WebSocket sends that failed", ["channel"])
+BACKGROUND_TASKS_PENDING = Gauge("background_tasks_pending", "Side effects queued or running")
+BACKGROUND_TASK_SECONDS = Histogram("background_task_duration_seconds", "Side effect run time", ["task"])
+BACKGROUND_TASK_FAILURES = Counter("background_task_failures_total", "Side effects that raised", ["task"])
+WS_REAPED_CONNECTIONS = Counter(
+    "ws_reaped_connections_total", "WebSocket connections closed for missing heartbeats", ["channel"]
+)
+WS_REJECTED_CONNECTIONS = Counter(
+    "ws_rejected_connections_total", "WebSocket connections refused at connect", ["reason"]
+)
+SSE_CONNECTIONS = Gauge("sse_connections", "Open Server-Sent Events streams")
+SSE_CHANNELS = Gauge("sse_channels", "Plates with at least one Server-Sent Events stream")
+BID_WRITE_BATCH_SIZE = Histogram(
+    "bid_write_batch_size", "Bid writes committed per group-commit transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+EVENT_BUS_PUBLISHED = Counter("event_bus_published_total", "Events published to other workers")
+EVENT_BUS_RECEIVED = Counter("event_bus_received_total", "Events received from other workers")
+SCHEDULER_LEADER = Gauge("scheduler_leader", "1 while this worker holds the scheduler lock")
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    sql_seconds: float = 0.0
+
+
+# Stats of the HTTP request being handled. The object is shared with the
+# threadpool that runs sync routes, because contextvars are copied there.
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    SQL_STATEMENTS.inc()
+    SQL_STATEMENT_SECONDS.observe(elapsed)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += elapsed
+
+    if config.SLOW_QUERY_MS and elapsed * 1000 >= config.SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s; parameters=%r", elapsed * 1000, statement, parameters)
+
+
+def instrument_engine(engine: Engine):
+    """Count and time every SQL statement executed through `engine`"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """Record latency and SQL usage of every HTTP request by route template"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            # Use the route template to keep label cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUEST_SECONDS.labels(method, route_path, str(status_code)).observe(
+                time.perf_counter() - started
+            )
+            HTTP_REQUEST_SQL_STATEMENTS.labels(method, route_path).observe(stats.statements)
+            HTTP_REQUEST_SQL_SECONDS.labels(method, route_path).observe(stats.sql_seconds)
@@ -0,0 +1,102 @@
+"""Schema migrations.
+
+    python -m app.migrate upgrade            # migrate DATABASE_URL to the latest revision
+    python -m app.migrate check              # fail if the migrations don't match the models
+    python -m app.migrate revision -m "..."  # autogenerate a new revision
+
+Run `upgrade` once per deploy, not from every worker.
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import Engine
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE_REVISION = "0001"
+
+
+def alembic_config(connection=None) -> Config:
+    alembic_cfg = Config(str(BACKEND_DIR / "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    if connection is not None:
+        alembic_cfg.attributes["connection"] = connection
+        alembic_cfg.attributes["configure_logger"] = False
+    return alembic_cfg
+
+
+def upgrade(engine: Engine, revision: str = "head"):
+    """Migrate `engine` to `revision`. Databases created by the old
+    create_all() at import time are stamped with the baseline first."""
+    with engine.begin() as connection:
+        tables = inspect(connection).get_table_names()
+        alembic_cfg = alembic_config(connection)
+        if "users" in tables and "alembic_version" not in tables:
+            command.stamp(alembic_cfg, BASELINE_REVISION)
+        command.upgrade(alembic_cfg, revision)
+
+
+def schema_differences(engine: Engine) -> list:
+    """Differences between the schema in `engine` and the models"""
+    from . import models  # noqa: F401  registers the tables on Base.metadata
+    from .database import Base
+
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection)
+        return compare_metadata(context, Base.metadata)
+
+
+def check() -> list:
+    """Migrate a scratch SQLite database and compare it with the models"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/migrations-check.db")
+        try:
+            upgrade(engine)
+            return schema_differences(engine)
+        finally:
+            engine.dispose()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.migrate")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="migrate DATABASE_URL")
+    upgrade_parser.add_argument("revision", nargs="?", default="head")
+    downgrade_parser = commands.add_parser("downgrade", help="revert DATABASE_URL")
+    downgrade_parser.add_argument("revision")
+    commands.add_parser("check", help="verify the migrations produce the models' schema")
+    revision_parser = commands.add_parser("revision", help="autogenerate a new revision")
+    revision_parser.add_argument("-m", "--message", required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        differences = check()
+        for difference in differences:
+            print(difference)
+        if differences:
+            print("Migrations are out of sync with app/models.py", file=sys.stderr)
+            return 1
+        print("Migrations match app/models.py")
+        return 0
+
+    from .database import engine
+
+    if args.command == "upgrade":
+        upgrade(engine, args.revision)
+    elif args.command == "downgrade":
+        with engine.begin() as connection:
+            command.downgrade(alembic_config(connection), args.revision)
+    else:
+        with engine.begin() as connection:
+            command.revision(alembic_config(connection), message=args.message, autogenerate=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Numeric, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Numeric, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -21,6 +21,8 @@ class User(Base):
 
 class AutoPlate(Base):
     __tablename__ = "auto_plates"
+    # Never reuse ids, archived plates keep theirs
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     plate_number = Column(String(10), unique=True, index=True)
@@ -32,6 +34,11 @@ class AutoPlate(Base):
     # Relationships
     created_by = relationship("User", back_populates="plates_created")
     bids = relationship("Bid", back_populates="plate", cascade="all, delete-orphan")
+    proxy_bids = relationship("ProxyBid", cascade="all, delete-orphan")
+
+
+def _opening_amount(context):
+    return context.get_current_parameters()["amount"]
 
 
 class Bid(Base):
@@ -39,6 +46,8 @@ class Bid(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     amount = Column(Numeric(10, 2))
+    # Amount the bid was placed with, kept when the bid is raised later
+    opening_amount = Column(Numeric(10, 2), default=_opening_amount)
     user_id = Column(Integer, ForeignKey("users.id"))
     plate_id = Column(Integer, ForeignKey("auto_plates.id"))
     created_at = Column(DateTime, default=func.now())
@@ -50,4 +59,99 @@ class Bid(Base):
     # Constraints
     __table_args__ = (
         UniqueConstraint('user_id', 'plate_id', name='unique_user_plate_bid'),
-    )
\ No newline at end of file
+        # Highest bid per plate and bid lists of a plate
+        Index('ix_bids_plate_id_amount', 'plate_id', 'amount'),
+        # Recent bids for the analytics summary
+        Index('ix_bids_created_at', 'created_at'),
+        {"sqlite_autoincrement": True},
+    )
+
+
+# Hidden maximum up to which app.proxy_bids raises the user's bid on a plate
+class ProxyBid(Base):
+    __tablename__ = "proxy_bids"
+
+    id = Column(Integer, primary_key=True, index=True)
+    max_amount = Column(Numeric(10, 2))
+    user_id = Column(Integer, ForeignKey("users.id"))
+    plate_id = Column(Integer, ForeignKey("auto_plates.id"), index=True)
+    created_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'plate_id', name='unique_user_plate_proxy_bid'),
+    )
+
+
+# Closed auctions moved out of the hot tables by app.archive
+class ArchivedPlate(Base):
+    __tablename__ = "archived_plates"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    plate_number = Column(String(10), index=True)
+    description = Column(Text)
+    deadline = Column(DateTime)
+    is_active = Column(Boolean)
+    created_by_id = Column(Integer)
+    highest_bid = Column(Numeric(10, 2))
+    bid_count = Column(Integer)
+    archived_at = Column(DateTime, default=func.now())
+
+
+class ArchivedBid(Base):
+    __tablename__ = "archived_bids"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    amount = Column(Numeric(10, 2))
+    opening_amount = Column(Numeric(10, 2))
+    user_id = Column(Integer, index=True)
+    plate_id = Column(Integer, index=True)
+    created_at = Column(DateTime)
+
+
+# Per-plate bid aggregates maintained by app.analytics
+class PlateStats(Base):
+    __tablename__ = "plate_stats"
+
+    plate_id = Column(Integer, primary_key=True, autoincrement=False)
+    bid_count = Column(Integer)
+    first_bid = Column(Numeric(10, 2))
+    highest_bid = Column(Numeric(10, 2))
+    first_bid_at = Column(DateTime)
+    last_bid_at = Column(DateTime)
+    updated_at = Column(DateTime)
+
+
+# Per-user bid aggregates over live and archived bids, maintained by app.analytics
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    bid_count = Column(Integer, index=True)
+    total_amount = Column(Numeric(14, 2))
+    updated_at = Column(DateTime)
+
+
+# Stored responses of mutations sent with an Idempotency-Key (app.idempotency)
+class IdempotencyRecord(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64))
+    status_code = Column(Integer)
+    media_type = Column(String)
+    body = Column(LargeBinary)
+    expires_at = Column(DateTime, index=True)
+
+
+# Plate and bid events shared between workers by the database event bus (app.events)
+class Event(Base):
+    __tablename__ = "events"
+    # Ids are never reused, workers track the last one they have seen
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    origin = Column(String(64))
+    kind = Column(String(16))
+    action = Column(String(16))
+    payload = Column(Text)
+    created_at = Column(DateTime, index=True)
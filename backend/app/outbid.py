@@ -0,0 +1,81 @@
+"""Per-plate index of bidders and the current leader, used to tell a user
+they were outbid without broadcasting to everyone.
+
+The index is filled lazily: the first bid event of a plate loads its bids
+with one query, later events update it in O(1).
+"""
+import asyncio
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Optional
+
+from sqlalchemy import select
+
+from . import models
+from .database import SessionLocal
+
+
+@dataclass
+class PlateBidders:
+    leader_id: Optional[int] = None
+    leader_amount: Optional[Decimal] = None
+
+
+class BidderIndex:
+    def __init__(self):
+        self.plates: Dict[int, PlateBidders] = {}
+
+    def _load(self, plate_id: int, bid_id: int, previous_amount: Optional[Decimal]) -> PlateBidders:
+        """Build the plate's entry as it was before the event on `bid_id`,
+        which had `previous_amount` then (None if it didn't exist)"""
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(models.Bid.id, models.Bid.user_id, models.Bid.amount).where(models.Bid.plate_id == plate_id)
+            ).all()
+        finally:
+            db.close()
+        plate = PlateBidders()
+        for row_id, bidder, amount in rows:
+            if row_id == bid_id:
+                amount = previous_amount
+            if amount is not None and (plate.leader_amount is None or amount > plate.leader_amount):
+                plate.leader_id, plate.leader_amount = bidder, amount
+        return plate
+
+    async def apply(self, action: str, bid_data: dict, load: bool = True) -> Optional[PlateBidders]:
+        """Update the index with a bid event, returns the plate's previous
+        leader when the event displaced it"""
+        plate_id, user_id = bid_data.get("plate_id"), bid_data.get("user_id")
+        plate = self.plates.get(plate_id)
+        if action == "delete":
+            if plate is not None and plate.leader_id == user_id:
+                # The new leader is unknown, reload on the next event
+                del self.plates[plate_id]
+            return None
+
+        amount = Decimal(bid_data["amount"])
+        if plate is None:
+            if not load:
+                return None
+            previous_amount = bid_data.get("previous_amount")
+            if action == "update" and previous_amount is None:
+                # Who led before the update is unknown, index the plate as it is now
+                plate = self.plates[plate_id] = await asyncio.to_thread(self._load, plate_id, None, None)
+                return None
+            plate = self.plates[plate_id] = await asyncio.to_thread(
+                self._load, plate_id, bid_data.get("id"), Decimal(previous_amount) if previous_amount else None
+            )
+        if plate.leader_amount is not None and amount <= plate.leader_amount:
+            return None
+        previous = PlateBidders(plate.leader_id, plate.leader_amount)
+        plate.leader_id, plate.leader_amount = user_id, amount
+        if previous.leader_id is None or previous.leader_id == user_id:
+            return None
+        return previous
+
+    def forget(self, plate_id: int):
+        self.plates.pop(plate_id, None)
+
+
+bidder_index = BidderIndex()
@@ -0,0 +1,291 @@
+"""In-memory sorted indexes behind the highest_bid, bid_count and ending_soon
+orderings of GET /plates/.
+
+Built with one grouped query at startup, then updated in O(log n) from the
+plate and bid events that are broadcast to WebSocket clients, so a listing
+page is an O(log n + k) walk instead of an SQL sort over every plate. Plates
+whose highest bid cannot be derived from an event (a deleted bid) are marked
+stale and re-read before the next listing; the whole index is rebuilt by a
+background loop of the app lifespan to pick up writes made by other workers.
+A listing only rebuilds it when it is older than PLATE_INDEX_MAX_AGE_SECONDS
+(or missing) and no other rebuild is running.
+"""
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from sortedcontainers import SortedList
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from . import config, models
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+ORDERINGS = ("highest_bid", "-highest_bid", "bid_count", "-bid_count", "ending_soon")
+
+
+@dataclass
+class IndexedPlate:
+    plate_number: str
+    highest_bid: Optional[Decimal]
+    bid_count: int
+    deadline: datetime
+    is_active: bool
+
+
+def _parse_deadline(value) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class PlateIndex:
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self.plates: Dict[int, IndexedPlate] = {}
+        # (highest bid, id) of plates with bids
+        self.by_highest_bid = SortedList()
+        # (bid count, id) of all plates
+        self.by_bid_count = SortedList()
+        # (deadline, id) of active plates with bids
+        self.by_deadline = SortedList()
+        self.loaded_at: Optional[float] = None
+        self.stale: Set[int] = set()
+        # Queries running, and plates changed by events while they ran
+        self._loading = 0
+        self._touched: Set[int] = set()
+        self._lock = threading.RLock()
+        # Held by the one full rebuild running at a time
+        self._rebuild_lock = threading.Lock()
+
+    def _query(self, db: Session, plate_ids: Optional[List[int]] = None) -> Dict[int, IndexedPlate]:
+        plate, bid = models.AutoPlate, models.Bid
+        query = (
+            select(plate.id, plate.plate_number, func.max(bid.amount), func.count(bid.id),
+                   plate.deadline, plate.is_active)
+            .outerjoin(bid, bid.plate_id == plate.id)
+            .group_by(plate.id)
+        )
+        if plate_ids is not None:
+            query = query.where(plate.id.in_(plate_ids))
+        return {row[0]: IndexedPlate(*row[1:]) for row in db.execute(query)}
+
+    def _insert(self, plate_id: int, entry: IndexedPlate):
+        self.plates[plate_id] = entry
+        self.by_bid_count.add((entry.bid_count, plate_id))
+        if entry.highest_bid is not None:
+            self.by_highest_bid.add((entry.highest_bid, plate_id))
+            if entry.is_active:
+                self.by_deadline.add((entry.deadline, plate_id))
+
+    def _remove(self, plate_id: int) -> Optional[IndexedPlate]:
+        entry = self.plates.pop(plate_id, None)
+        if entry is not None:
+            self.by_bid_count.discard((entry.bid_count, plate_id))
+            if entry.highest_bid is not None:
+                self.by_highest_bid.discard((entry.highest_bid, plate_id))
+                self.by_deadline.discard((entry.deadline, plate_id))
+        return entry
+
+    def _begin_load(self):
+        with self._lock:
+            if not self._loading:
+                self._touched = set()
+            self._loading += 1
+
+    def _end_load(self):
+        """Re-read plates whose events may have been applied before the query saw them"""
+        self._loading -= 1
+        self.stale |= self._touched
+
+    def _touch(self, plate_id: int):
+        if self._loading:
+            self._touched.add(plate_id)
+
+    def rebuild(self, db: Session):
+        self._begin_load()
+        try:
+            plates = self._query(db)
+        except Exception:
+            with self._lock:
+                self._end_load()
+            raise
+        with self._lock:
+            self.plates = {}
+            self.by_highest_bid.clear()
+            self.by_bid_count.clear()
+            self.by_deadline.clear()
+            self.stale.clear()
+            for plate_id, entry in plates.items():
+                self._insert(plate_id, entry)
+            self.loaded_at = time.monotonic()
+            self._end_load()
+
+    def _expired(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.max_age
+
+    def refresh(self, db: Session):
+        """Rebuild when missing or too old, otherwise re-read stale plates"""
+        if self._expired():
+            # Single flight: without an index wait for the running rebuild,
+            # otherwise keep serving the current one while it runs
+            if self._rebuild_lock.acquire(blocking=self.loaded_at is None):
+                try:
+                    if self._expired():
+                        self.rebuild(db)
+                        return
+                finally:
+                    self._rebuild_lock.release()
+        with self._lock:
+            plate_ids = list(self.stale)
+            self.stale.clear()
+        if not plate_ids:
+            return
+        self._begin_load()
+        try:
+            fresh = self._query(db, plate_ids)
+        except Exception:
+            with self._lock:
+                self.stale.update(plate_ids)
+                self._end_load()
+            raise
+        with self._lock:
+            for plate_id in plate_ids:
+                self._remove(plate_id)
+                if plate_id in fresh:
+                    self._insert(plate_id, fresh[plate_id])
+            self._end_load()
+
+    def forget(self, plate_ids: Iterable[int]):
+        with self._lock:
+            for plate_id in plate_ids:
+                self._remove(plate_id)
+
+    def apply_plate(self, action: str, data: dict):
+        plate_id = data.get("id")
+        if plate_id is None:
+            return
+        with self._lock:
+            self._touch(plate_id)
+            if self.loaded_at is None:
+                return
+            entry = self._remove(plate_id)
+            if action == "delete":
+                return
+            self._insert(plate_id, IndexedPlate(
+                plate_number=data.get("plate_number"),
+                highest_bid=entry.highest_bid if entry else None,
+                bid_count=entry.bid_count if entry else 0,
+                deadline=_parse_deadline(data.get("deadline")),
+                is_active=data.get("is_active"),
+            ))
+
+    def apply_bid(self, action: str, data: dict):
+        plate_id = data.get("plate_id")
+        if plate_id is None:
+            return
+        with self._lock:
+            self._touch(plate_id)
+            if self.loaded_at is None:
+                return
+            entry = self.plates.get(plate_id)
+            if entry is None or action == "delete":
+                # A deleted bid may have been the highest one
+                self.stale.add(plate_id)
+                return
+            self._remove(plate_id)
+            amount = Decimal(data["amount"])
+            if entry.highest_bid is None or amount > entry.highest_bid:
+                entry.highest_bid = amount
+            if action == "create":
+                entry.bid_count += 1
+            self._insert(plate_id, entry)
+
+    def _ordered(self, ordering: str) -> Iterator[int]:
+        if ordering == "highest_bid":
+            return (plate_id for _, plate_id in self.by_highest_bid)
+        if ordering == "-highest_bid":
+            return (plate_id for _, plate_id in reversed(self.by_highest_bid))
+        if ordering == "bid_count":
+            return (plate_id for _, plate_id in self.by_bid_count)
+        if ordering == "-bid_count":
+            return (plate_id for _, plate_id in reversed(self.by_bid_count))
+        # ending_soon: open auctions with bids, closest deadline first
+        return (plate_id for _, plate_id in self.by_deadline.irange(minimum=(datetime.now(),)))
+
+    def page(self, ordering: str, skip: int = 0, limit: int = 100,
+             plate_number_contains: Optional[str] = None) -> List[int]:
+        """Plate ids of one page, O(log n + skip + limit) without a filter"""
+        with self._lock:
+            plate_ids = self._ordered(ordering)
+            if plate_number_contains:
+                plate_ids = (
+                    plate_id for plate_id in plate_ids
+                    if plate_number_contains in self.plates[plate_id].plate_number
+                )
+            return list(islice(plate_ids, skip, skip + limit))
+
+    def get_plates(self, db: Session, ordering: str, skip: int = 0, limit: int = 100,
+                   plate_number_contains: Optional[str] = None) -> List[dict]:
+        """Page of plates in the same shape as crud.get_plates_with_highest_bids"""
+        self.refresh(db)
+        plates = models.AutoPlate.__table__
+        rows = {}
+        while True:
+            plate_ids = self.page(ordering, skip, limit, plate_number_contains)
+            unread = [plate_id for plate_id in plate_ids if plate_id not in rows]
+            if unread:
+                rows.update((row.id, row) for row in db.execute(select(
+                    plates.c.plate_number, plates.c.description, plates.c.deadline, plates.c.id,
+                    plates.c.is_active, plates.c.created_by_id
+                ).where(plates.c.id.in_(unread))))
+            # Plates archived or deleted by another process since the last rebuild,
+            # forgotten before paging again so the page is still filled up to limit
+            missing = [plate_id for plate_id in unread if plate_id not in rows]
+            if not missing:
+                break
+            self.forget(missing)
+
+        result = []
+        for plate_id in plate_ids:
+            row = rows[plate_id]
+            entry = self.plates.get(plate_id)
+            plate = row._asdict()
+            plate["highest_bid"] = entry.highest_bid if entry else None
+            result.append(plate)
+        return result
+
+    def rebuild_now(self):
+        """Startup rebuild, run by the app lifespan"""
+        try:
+            self._rebuild_job()
+        except SQLAlchemyError:
+            # e.g. migrations not applied yet, the first listing retries
+            logger.warning("Could not build the plate index at startup", exc_info=True)
+
+    def _rebuild_job(self):
+        db = SessionLocal()
+        try:
+            with self._rebuild_lock:
+                self.rebuild(db)
+        finally:
+            db.close()
+
+    async def rebuild_periodically(self, interval: float):
+        """Background loop started by the app lifespan"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self._rebuild_job)
+            except Exception:
+                logger.exception("Plate index rebuild failed")
+
+
+plate_index = PlateIndex(config.PLATE_INDEX_MAX_AGE_SECONDS)
@@ -0,0 +1,142 @@
+"""Proxy (automatic) bidding.
+
+A proxy bid is a hidden maximum per user and plate. Whenever bids on a plate
+change, resolve() settles all of the plate's proxies in one pass: proxies are
+ordered by maximum in a heap, the strongest one outbids the runner-up by
+PROXY_BID_INCREMENT (capped at its maximum), and only that single visible bid
+is written. Losing proxies never place intermediate bids, so a bidding war
+between proxies produces one bid event instead of a cascade.
+"""
+import heapq
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import config, crud, models, schemas
+
+
+def get_proxy_bids_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[models.ProxyBid]:
+    return db.query(models.ProxyBid).filter(
+        models.ProxyBid.user_id == user_id
+    ).order_by(models.ProxyBid.id).offset(skip).limit(limit).all()
+
+
+def get_proxy_bid(db: Session, plate_id: int, user_id: int) -> Optional[models.ProxyBid]:
+    return db.query(models.ProxyBid).filter(
+        models.ProxyBid.plate_id == plate_id,
+        models.ProxyBid.user_id == user_id
+    ).first()
+
+
+def has_proxy_bids(db: Session, plate_id: int) -> bool:
+    return db.query(
+        db.query(models.ProxyBid).filter(models.ProxyBid.plate_id == plate_id).exists()
+    ).scalar()
+
+
+def _highest_bid(db: Session, plate_id: int, exclude_user_id: int):
+    return db.query(func.max(models.Bid.amount)).filter(
+        models.Bid.plate_id == plate_id,
+        models.Bid.user_id != exclude_user_id
+    ).scalar()
+
+
+def set_proxy_bid(db: Session, proxy: schemas.ProxyBidCreate,
+                  user_id: int) -> Tuple[models.ProxyBid, Optional[models.Bid], bool]:
+    """Create or raise the user's maximum, then resolve the plate's proxies"""
+    plate = crud.get_plate(db, proxy.plate_id)
+    if not plate:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Plate not found"
+        )
+    if not plate.is_active or plate.deadline <= datetime.now():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Bidding is closed"
+        )
+
+    highest_bid = _highest_bid(db, proxy.plate_id, user_id)
+    if highest_bid and proxy.max_amount <= highest_bid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Maximum must exceed current highest bid"
+        )
+    own_bid = db.query(models.Bid.amount).filter(
+        models.Bid.plate_id == proxy.plate_id,
+        models.Bid.user_id == user_id
+    ).scalar()
+    if own_bid and proxy.max_amount < own_bid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Maximum cannot be lower than your current bid"
+        )
+
+    db_proxy = get_proxy_bid(db, proxy.plate_id, user_id)
+    if db_proxy:
+        db_proxy.max_amount = proxy.max_amount
+    else:
+        db_proxy = models.ProxyBid(max_amount=proxy.max_amount, user_id=user_id, plate_id=proxy.plate_id)
+        db.add(db_proxy)
+    db.flush()
+
+    bid, created = resolve(db, proxy.plate_id)
+    db.refresh(db_proxy)
+    return db_proxy, bid, created
+
+
+def delete_proxy_bid(db: Session, plate_id: int, user_id: int):
+    db_proxy = get_proxy_bid(db, plate_id, user_id)
+    if not db_proxy:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Proxy bid not found"
+        )
+    db.delete(db_proxy)
+    db.commit()
+    return {"detail": "Proxy bid deleted successfully"}
+
+
+def resolve(db: Session, plate_id: int) -> Tuple[Optional[models.Bid], bool]:
+    """Settle the plate's proxies and commit. Returns the one bid that changed
+    (or None) and whether it was created."""
+    proxies = db.query(models.ProxyBid).filter(models.ProxyBid.plate_id == plate_id).all()
+    if not proxies:
+        db.commit()
+        return None, False
+
+    # Highest maximum first, the earlier proxy wins ties
+    heap = [(-proxy.max_amount, proxy.created_at, proxy.id, proxy) for proxy in proxies]
+    heapq.heapify(heap)
+    leader = heapq.heappop(heap)[3]
+    runner_up = heap[0][3].max_amount if heap else None
+
+    highest_bid = _highest_bid(db, plate_id, leader.user_id)
+    if highest_bid and highest_bid >= leader.max_amount:
+        # Manual bids already beat every proxy
+        db.commit()
+        return None, False
+
+    competing = max(amount for amount in (highest_bid, runner_up, 0) if amount is not None)
+    price = min(leader.max_amount, competing + config.PROXY_BID_INCREMENT)
+
+    db_bid = db.query(models.Bid).filter(
+        models.Bid.plate_id == plate_id,
+        models.Bid.user_id == leader.user_id
+    ).first()
+    if db_bid and db_bid.amount >= price:
+        db.commit()
+        return None, False
+
+    created = db_bid is None
+    if created:
+        db_bid = models.Bid(amount=price, user_id=leader.user_id, plate_id=plate_id)
+        db.add(db_bid)
+    else:
+        db_bid.amount = price
+    db.commit()
+    db.refresh(db_bid)
+    return db_bid, created
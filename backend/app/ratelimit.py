@@ -0,0 +1,177 @@
+import heapq
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from . import config, models
+from .auth import get_current_user
+from .database import pool_wait
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+def parse_limit(spec: str) -> Tuple[float, float]:
+    """Parse "10/minute" into (capacity, refill rate in tokens per second)"""
+    count, _, period = spec.partition("/")
+    capacity = float(count)
+    return capacity, capacity / PERIODS[period.strip() or "second"]
+
+
+class RateLimitBackend(ABC):
+    """Token-bucket storage. Returns 0 when the hit is allowed, otherwise the
+    number of seconds until enough tokens are available."""
+
+    @abstractmethod
+    async def hit(self, key: str, capacity: float, rate: float, cost: float = 1) -> float:
+        ...
+
+
+class InMemoryBackend(RateLimitBackend):
+    """Per-process buckets, enough for a single worker"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> [tokens, last refill time, time at which the bucket is full again]
+        self.buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str, capacity: float, rate: float, cost: float = 1) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self.buckets[key] = [capacity, now, now]
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            retry_after = 0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                retry_after = (cost - tokens) / rate
+            bucket[0] = tokens
+            bucket[1] = now
+            bucket[2] = now + (capacity - tokens) / rate
+            return retry_after
+
+    def _prune(self, now: float):
+        # Buckets that have refilled completely carry no state worth keeping
+        for key in [key for key, bucket in self.buckets.items() if bucket[2] <= now]:
+            del self.buckets[key]
+        # Still full of live buckets: drop the ones closest to full, with 1% headroom
+        # so a flood of new keys doesn't scan all buckets on every hit
+        overflow = len(self.buckets) - self.max_keys + max(1, self.max_keys // 100)
+        if overflow > 0:
+            for key in heapq.nsmallest(overflow, self.buckets, key=lambda key: self.buckets[key][2]):
+                del self.buckets[key]
+
+
+class RedisBackend(RateLimitBackend):
+    """Buckets shared by all workers, updated atomically with a Lua script"""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local cost = tonumber(ARGV[4])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local retry = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        retry = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(retry)
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    async def hit(self, key: str, capacity: float, rate: float, cost: float = 1) -> float:
+        return float(await self.script(keys=[f"ratelimit:{key}"], args=[capacity, rate, time.time(), cost]))
+
+
+def _create_backend() -> RateLimitBackend:
+    if config.RATE_LIMIT_REDIS_URL:
+        return RedisBackend(config.RATE_LIMIT_REDIS_URL)
+    return InMemoryBackend()
+
+
+backend: RateLimitBackend = _create_backend()
+
+
+def set_backend(new_backend: RateLimitBackend):
+    """Swap the storage, e.g. for a shared backend in multi-worker deployments"""
+    global backend
+    backend = new_backend
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+async def check_limit(name: str, key: str):
+    spec = config.RATE_LIMITS.get(name)
+    if not spec:
+        return
+    capacity, rate = parse_limit(spec)
+    retry_after = await backend.hit(f"{name}:{key}", capacity, rate)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def limit_per_user(name: str):
+    """Dependency limiting the authenticated user to the `name` route limit"""
+    async def dependency(current_user: models.User = Depends(get_current_user)):
+        await check_limit(name, f"user:{current_user.id}")
+    return dependency
+
+
+def limit_per_ip(name: str):
+    """Dependency limiting the client address to the `name` route limit"""
+    async def dependency(request: Request):
+        await check_limit(name, f"ip:{client_ip(request)}")
+    return dependency
+
+
+class AdmissionControlMiddleware:
+    """Reject requests with 429 + Retry-After while the database pool is saturated"""
+
+    def __init__(self, app: ASGIApp, threshold: float, retry_after: int = 1,
+                 exempt_paths: Optional[Tuple[str, ...]] = None) -> None:
+        self.app = app
+        self.threshold = threshold
+        self.retry_after = retry_after
+        self.exempt_paths = exempt_paths or ()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] == "http" and self.threshold > 0
+                and scope["path"] not in self.exempt_paths
+                and pool_wait.current() > self.threshold):
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry later"},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
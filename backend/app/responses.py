@@ -0,0 +1,37 @@
+"""Lean JSON responses for the hot listing routes.
+
+Rows selected with Core select() are encoded straight to JSON bytes, without
+building ORM objects or validating them into Pydantic models first. The
+queries label and order their columns like the route's response_model, so the
+JSON is the same as what FastAPI would have produced.
+"""
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Sequence
+
+from starlette.responses import Response
+
+
+def _default(value: Any):
+    # Same representation as Pydantic's JSON mode
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_rows(rows: Sequence) -> bytes:
+    """Encode Core rows (or dicts) as a JSON array of objects"""
+    if rows and not isinstance(rows[0], dict):
+        fields = rows[0]._fields
+        rows = [dict(zip(fields, row)) for row in rows]
+    return json.dumps(rows, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RowsResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Sequence) -> bytes:
+        return encode_rows(content)
@@ -3,9 +3,13 @@ from ..routers.auth import router as auth_router
 from ..routers.plates import router as plates_router
 from ..routers.bids import router as bids_router
 from ..routers.users import router as users_router
+from ..routers.metrics import router as metrics_router
+from ..routers.analytics import router as analytics_router
 
 router = APIRouter()
 router.include_router(auth_router)
 router.include_router(users_router)
 router.include_router(plates_router)
-router.include_router(bids_router)
\ No newline at end of file
+router.include_router(bids_router)
+router.include_router(metrics_router)
+router.include_router(analytics_router)
\ No newline at end of file
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from .. import analytics, models, schemas
+from ..auth import get_current_staff_user
+from ..database import get_db
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"]
+)
+
+
+@router.get("/summary", response_model=schemas.AnalyticsSummary)
+def read_summary(
+    bins: int = Query(20, ge=1, le=200),
+    window_minutes: int = Query(60, ge=1, le=60 * 24 * 7),
+    top: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_staff_user)
+):
+    try:
+        return analytics.summary(db, bins=bins, window_minutes=window_minutes, top=top)
+    except analytics.TooManyBuckets as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@router.get("/plates/{plate_id}", response_model=schemas.PlateAnalytics)
+def read_plate_analytics(
+    plate_id: int,
+    bins: int = Query(20, ge=1, le=200),
+    bucket_seconds: int = Query(60, ge=1, le=86400),
+    top: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_staff_user)
+):
+    try:
+        result = analytics.plate_analytics(db, plate_id, bins=bins, bucket_seconds=bucket_seconds, top=top)
+    except analytics.TooManyBuckets as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Plate not found")
+    return result
@@ -5,11 +5,13 @@ from sqlalchemy.orm import Session
 
 from ..database import get_db
 from .. import auth, schemas
+from ..ratelimit import limit_per_ip
 
 router = APIRouter(tags=["authentication"])
 
 
-@router.post("/login/", response_model=schemas.Token)
+@router.post("/login/", response_model=schemas.Token,
+             dependencies=[Depends(limit_per_ip("login"))])
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
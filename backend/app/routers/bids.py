@@ -1,15 +1,19 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from .. import crud, models, schemas
+from .. import crud, models, proxy_bids, schemas
 from ..auth import get_current_user
-from ..database import get_db
-from ..crud_ws import create_bid_ws, update_bid_ws, delete_bid_ws
+from ..database import get_db, get_db_read, pin_to_primary
+from ..crud_ws import create_bid_ws, update_bid_ws, delete_bid_ws, set_proxy_bid_ws
+from ..idempotency import IdempotentRoute
+from ..ratelimit import limit_per_user
+from ..responses import RowsResponse
 
 router = APIRouter(
     prefix="/bids",
-    tags=["bids"]
+    tags=["bids"],
+    route_class=IdempotentRoute
 )
 
 
@@ -17,16 +21,17 @@ router = APIRouter(
 def read_bids(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_read),
     current_user: models.User = Depends(get_current_user)
 ):
     if current_user.is_staff:
         raise HTTPException(detail='You are not allowed to do this', status_code=403)
     bids = crud.get_bids_by_user(db, current_user.id, skip=skip, limit=limit)
-    return bids
+    return RowsResponse(bids)
 
 
-@router.post("/", response_model=schemas.Bid, status_code=201)
+@router.post("/", response_model=schemas.Bid, status_code=201,
+             dependencies=[Depends(limit_per_user("bids:create"))])
 async def create_bid(
     bid: schemas.BidCreate,
     db: Session = Depends(get_db),
@@ -34,7 +39,60 @@ async def create_bid(
 ):
     if current_user.is_staff:
         raise HTTPException(detail='You are not allowed to do this', status_code=403)
-    return await create_bid_ws(db, bid, current_user.id)
+    result = await create_bid_ws(db, bid, current_user.id)
+    pin_to_primary(current_user.username)
+    return result
+
+
+@router.get("/with-plates", response_model=List[schemas.BidWithPlate], response_model_exclude_unset=True)
+def read_bids_with_plates(
+    skip: int = 0,
+    limit: int = Query(100, le=crud.MAX_BATCH_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated plate fields to return (e.g. 'plate_number,highest_bid')"),
+    db: Session = Depends(get_db_read),
+    current_user: models.User = Depends(get_current_user)
+):
+    if current_user.is_staff:
+        raise HTTPException(detail='You are not allowed to do this', status_code=403)
+    plate_fields = crud.parse_plate_fields(fields, allowed=crud.PLATE_BATCH_FIELDS[:-1])
+    return crud.get_bids_with_plates(db, current_user.id, skip=skip, limit=limit, fields=plate_fields)
+
+
+@router.get("/proxy", response_model=List[schemas.ProxyBid])
+def read_proxy_bids(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    if current_user.is_staff:
+        raise HTTPException(detail='You are not allowed to do this', status_code=403)
+    return proxy_bids.get_proxy_bids_by_user(db, current_user.id, skip=skip, limit=limit)
+
+
+@router.post("/proxy", response_model=schemas.ProxyBid,
+             dependencies=[Depends(limit_per_user("bids:update"))])
+async def set_proxy_bid(
+    proxy: schemas.ProxyBidCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    if current_user.is_staff:
+        raise HTTPException(detail='You are not allowed to do this', status_code=403)
+    result = await set_proxy_bid_ws(db, proxy, current_user.id)
+    pin_to_primary(current_user.username)
+    return result
+
+
+@router.delete("/proxy/{plate_id}")
+def delete_proxy_bid(
+    plate_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    if current_user.is_staff:
+        raise HTTPException(detail='You are not allowed to do this', status_code=403)
+    return proxy_bids.delete_proxy_bid(db, plate_id, current_user.id)
 
 
 @router.get("/{bid_id}", response_model=schemas.Bid)
@@ -59,7 +117,8 @@ def read_bid(
     return db_bid
 
 
-@router.put("/{bid_id}", response_model=schemas.Bid)
+@router.put("/{bid_id}", response_model=schemas.Bid,
+            dependencies=[Depends(limit_per_user("bids:update"))])
 async def update_bid(
     bid_id: int,
     bid: schemas.BidUpdate,
@@ -68,7 +127,9 @@ async def update_bid(
 ):
     if current_user.is_staff:
         raise HTTPException(detail='You are not allowed to do this', status_code=403)
-    return await update_bid_ws(db, bid_id, bid, current_user.id)
+    result = await update_bid_ws(db, bid_id, bid, current_user.id)
+    pin_to_primary(current_user.username)
+    return result
 
 
 @router.delete("/{bid_id}")
@@ -79,7 +140,9 @@ async def delete_bid(
 ):
     if current_user.is_staff:
         raise HTTPException(detail='You are not allowed to do this', status_code=403)
-    return await delete_bid_ws(db, bid_id, current_user.id)
+    result = await delete_bid_ws(db, bid_id, current_user.id)
+    pin_to_primary(current_user.username)
+    return result
 
 
 
@@ -88,7 +151,7 @@ async def delete_bid(
 # from fastapi import APIRouter, Depends, HTTPException
 # from sqlalchemy.orm import Session
 #
-# from .. import crud, models, schemas
+# from .. import crud, models, proxy_bids, schemas
 # from ..auth import get_current_user
 # from ..database import get_db
 #
@@ -1,15 +1,20 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from .. import crud, models, schemas
 from ..auth import get_current_staff_user
-from ..database import get_db
+from ..database import get_db, get_db_read
 from ..crud_ws import create_plate_ws, update_plate_ws, delete_plate_ws
+from ..idempotency import IdempotentRoute
+from ..responses import RowsResponse
+from ..sse import plate_streams
 
 router = APIRouter(
     prefix="/plates",
-    tags=["plates"]
+    tags=["plates"],
+    route_class=IdempotentRoute
 )
 
 
@@ -17,9 +22,10 @@ router = APIRouter(
 def read_plates(
     skip: int = 0,
     limit: int = 100,
-    ordering: Optional[str] = Query(None, description="Order by field (e.g. 'deadline' or '-deadline')"),
+    ordering: Optional[str] = Query(None, description="Order by field: 'deadline', 'highest_bid', 'bid_count' "
+                                                      "(prefix '-' for descending) or 'ending_soon'"),
     plate_number__contains: Optional[str] = Query(None, description="Filter by plate number containing this value"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_read)
 ):
     plates = crud.get_plates_with_highest_bids(
         db,
@@ -28,7 +34,7 @@ def read_plates(
         ordering=ordering,
         plate_number_contains=plate_number__contains
     )
-    return plates
+    return RowsResponse(plates)
 
 
 @router.post("/", response_model=schemas.AutoPlate, status_code=201)
@@ -40,10 +46,25 @@ async def create_plate(
     return await create_plate_ws(db, plate, current_user.id)
 
 
+@router.get("/batch", response_model=List[schemas.AutoPlateFields], response_model_exclude_unset=True)
+def read_plates_batch(
+    ids: str = Query(..., description="Comma-separated plate ids (e.g. '1,2,3')"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. 'plate_number,highest_bid')"),
+    db: Session = Depends(get_db_read)
+):
+    try:
+        plate_ids = [int(plate_id) for plate_id in ids.split(",") if plate_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if len(plate_ids) > crud.MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {crud.MAX_BATCH_SIZE} ids per request")
+    return crud.get_plates_by_ids(db, plate_ids, crud.parse_plate_fields(fields))
+
+
 @router.get("/{plate_id}", response_model=schemas.AutoPlateDetail)
 def read_plate(
     plate_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_read)
 ):
     db_plate = crud.get_plate_with_highest_bid(db, plate_id)
     if db_plate is None:
@@ -51,6 +72,22 @@ def read_plate(
     return db_plate
 
 
+@router.get("/{plate_id}/events", response_class=StreamingResponse)
+async def plate_events(
+    plate_id: int,
+    last_event_id: Optional[str] = Header(None, description="Resume after this event id"),
+):
+    """Server-Sent Events of one plate: a snapshot of its state, then its
+    plate and bid events"""
+    if await plate_streams.snapshot(plate_id) is None:
+        raise HTTPException(status_code=404, detail="Plate not found")
+    return StreamingResponse(
+        plate_streams.stream(plate_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.put("/{plate_id}", response_model=schemas.AutoPlate)
 async def update_plate(
     plate_id: int,
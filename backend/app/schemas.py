@@ -110,6 +110,18 @@ class AutoPlateDetail(AutoPlate):
         from_attributes = True
 
 
+# Plate with only the fields selected by the batch endpoints
+class AutoPlateFields(BaseModel):
+    id: int
+    plate_number: Optional[str] = None
+    description: Optional[str] = None
+    deadline: Optional[datetime] = None
+    is_active: Optional[bool] = None
+    created_by_id: Optional[int] = None
+    highest_bid: Optional[Decimal] = None
+    bids: Optional[List[BidInfo]] = None
+
+
 # Bid schemas
 class BidBase(BaseModel):
     amount: Decimal = Field(..., gt=0)
@@ -130,4 +142,73 @@ class Bid(BidBase):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class BidWithPlate(Bid):
+    is_leading: Optional[bool] = None
+    plate: AutoPlateFields
+
+# Proxy bid schemas
+class ProxyBidCreate(BaseModel):
+    plate_id: int
+    max_amount: Decimal = Field(..., gt=0)
+
+
+class ProxyBid(ProxyBidCreate):
+    id: int
+    user_id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Analytics schemas
+class Histogram(BaseModel):
+    edges: List[float]
+    counts: List[int]
+
+
+class TimeBuckets(BaseModel):
+    start: Optional[datetime] = None
+    bucket_seconds: int
+    counts: List[int]
+
+
+class PlateTopBidder(BaseModel):
+    user_id: int
+    amount: float
+
+
+class PlateAnalytics(BaseModel):
+    plate_id: int
+    plate_number: str
+    bid_count: int
+    first_bid: Optional[float] = None
+    highest_bid: Optional[float] = None
+    increase: Optional[float] = None
+    final_to_first_ratio: Optional[float] = None
+    price_histogram: Histogram
+    bids_per_bucket: TimeBuckets
+    top_bidders: List[PlateTopBidder]
+
+
+class RatioStats(BaseModel):
+    median: Optional[float] = None
+    mean: Optional[float] = None
+
+
+class TopBidder(BaseModel):
+    user_id: int
+    bids: int
+    total: float
+
+
+class AnalyticsSummary(BaseModel):
+    plates_with_bids: int
+    total_bids: int
+    mean_bids_per_plate: Optional[float] = None
+    highest_bid_histogram: Histogram
+    final_to_first_ratio: RatioStats
+    recent_bids_per_minute: TimeBuckets
+    top_bidders: List[TopBidder]
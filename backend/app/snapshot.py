@@ -0,0 +1,144 @@
+"""Shared snapshot of live plates sent to /ws/plates clients on connect.
+
+The snapshot is loaded with one grouped query and then kept current from the
+same plate and bid events that are broadcast to clients. Plates whose state
+cannot be derived from an event (a deleted bid may lower the highest bid) are
+marked stale and re-read with one IN query before the next snapshot is sent.
+The whole snapshot is reloaded after WS_SNAPSHOT_MAX_AGE_SECONDS, which picks
+up archived plates and writes made by other workers.
+"""
+import asyncio
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func, select
+
+from . import config, models
+from .database import SessionLocal
+
+# Column order of the rows in a snapshot message
+SNAPSHOT_FIELDS = ("id", "plate_number", "highest_bid", "bid_count", "deadline", "is_active")
+
+
+def _deadline(value) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class PlateSnapshot:
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        # plate id -> [id, plate_number, highest_bid, bid_count, deadline, is_active]
+        self.plates: Dict[int, List[Any]] = {}
+        self.loaded_at: Optional[float] = None
+        self.stale: Set[int] = set()
+        self._loading = False
+        self._lock = asyncio.Lock()
+        # Encoded full snapshot per frame format, dropped on every change
+        self._frames: Dict[str, Any] = {}
+
+    def _query(self, plate_ids: Optional[List[int]] = None) -> Dict[int, List[Any]]:
+        plate, bid = models.AutoPlate, models.Bid
+        query = (
+            select(plate.id, plate.plate_number, func.max(bid.amount), func.count(bid.id),
+                   plate.deadline, plate.is_active)
+            .outerjoin(bid, bid.plate_id == plate.id)
+            .group_by(plate.id)
+        )
+        if plate_ids is not None:
+            query = query.where(plate.id.in_(plate_ids))
+        db = SessionLocal()
+        try:
+            return {row[0]: list(row) for row in db.execute(query)}
+        finally:
+            db.close()
+
+    async def refresh(self):
+        """Reload if the snapshot is missing or too old, then re-read stale plates"""
+        async with self._lock:
+            if self.loaded_at is None or time.monotonic() - self.loaded_at > self.max_age:
+                self._loading = True
+                try:
+                    self.plates = await asyncio.to_thread(self._query)
+                    self.loaded_at = time.monotonic()
+                finally:
+                    self._loading = False
+                self._frames.clear()
+            if self.stale:
+                plate_ids = list(self.stale)
+                self.stale.clear()
+                fresh = await asyncio.to_thread(self._query, plate_ids)
+                for plate_id in plate_ids:
+                    if plate_id in fresh:
+                        self.plates[plate_id] = fresh[plate_id]
+                    else:
+                        self.plates.pop(plate_id, None)
+                self._frames.clear()
+
+    def message(self, plate_ids: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+        if plate_ids is None:
+            rows = self.plates.values()
+        else:
+            rows = [self.plates[plate_id] for plate_id in plate_ids if plate_id in self.plates]
+        return {
+            "action": "snapshot",
+            "resource_type": "plates",
+            "fields": SNAPSHOT_FIELDS,
+            "data": [
+                [plate_id, number, str(highest) if highest is not None else None, count, _deadline(deadline), active]
+                for plate_id, number, highest, count, deadline, active in rows
+            ],
+        }
+
+    async def frame(self, frame_format: str, plate_ids: Optional[List[int]] = None):
+        """Encoded snapshot, the full one is encoded once per change and format"""
+        from .websocket import encode_frame
+
+        await self.refresh()
+        if plate_ids is not None:
+            return encode_frame(self.message(plate_ids), frame_format)
+        if frame_format not in self._frames:
+            self._frames[frame_format] = encode_frame(self.message(), frame_format)
+        return self._frames[frame_format]
+
+    def _changed(self, plate_id: int) -> bool:
+        """Whether the event should be applied to the loaded snapshot"""
+        if self._loading:
+            # The running load may or may not see this change, re-read the plate after it
+            self.stale.add(plate_id)
+            return False
+        if self.loaded_at is None:
+            return False
+        self._frames.clear()
+        return True
+
+    def apply_plate(self, action: str, data: dict):
+        plate_id = data.get("id")
+        if plate_id is None or not self._changed(plate_id):
+            return
+        if action == "delete":
+            self.plates.pop(plate_id, None)
+            return
+        row = self.plates.get(plate_id)
+        highest, count = (row[2], row[3]) if row else (None, 0)
+        self.plates[plate_id] = [plate_id, data.get("plate_number"), highest, count,
+                                 data.get("deadline"), data.get("is_active")]
+
+    def apply_bid(self, action: str, data: dict):
+        plate_id = data.get("plate_id")
+        if plate_id is None or not self._changed(plate_id):
+            return
+        row = self.plates.get(plate_id)
+        if row is None or action == "delete":
+            # A deleted bid may have been the highest one
+            self.stale.add(plate_id)
+            return
+        amount = Decimal(data["amount"])
+        if row[2] is None or amount > row[2]:
+            row[2] = amount
+        if action == "create":
+            row[3] += 1
+
+
+plate_snapshot = PlateSnapshot(config.WS_SNAPSHOT_MAX_AGE_SECONDS)
@@ -0,0 +1,180 @@
+"""Server-Sent Events for one plate, GET /plates/{id}/events.
+
+Each watched plate has one channel, fed by the same plate and bid events that
+are broadcast to WebSocket clients. A channel keeps its last SSE_REPLAY_EVENTS
+frames, encoded once, in a ring buffer. Streams read that buffer with their
+own cursor and sleep on the channel between events, so an event costs one
+append however many clients watch the plate. Clients that reconnect with
+Last-Event-ID get the frames they missed, or a fresh snapshot when the id is
+no longer buffered or comes from another worker or process.
+"""
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from . import config
+from .metrics import SSE_CHANNELS, SSE_CONNECTIONS
+from .snapshot import plate_snapshot
+
+def _frame(event_id: Optional[str], event: str, message: dict) -> bytes:
+    data = json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\ndata: {data}\n\n".encode("utf-8")
+
+
+class PlateChannel:
+    def __init__(self, size: int):
+        # Event ids are "<token>-<sequence>". A channel dropped by its last
+        # subscriber is recreated with sequence 0, the token tells ids of this
+        # channel apart from those of earlier ones, other workers or processes.
+        self.token = uuid.uuid4().hex[:8]
+        self.frames: Deque[Tuple[int, bytes]] = deque(maxlen=size)
+        self.sequence = 0
+        self.subscribers = 0
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    def publish(self, event: str, message: dict, last: bool = False):
+        self.sequence += 1
+        self.frames.append((self.sequence, _frame(f"{self.token}-{self.sequence}", event, message)))
+        self.closed = self.closed or last
+        self._wake()
+
+    def close(self):
+        self.closed = True
+        self._wake()
+
+    def _wake(self):
+        # Wake every waiting stream at once, later waits use a new event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def since(self, sequence: int) -> Optional[List[bytes]]:
+        """Frames after `sequence`, None when some were already dropped"""
+        if sequence >= self.sequence:
+            return []
+        if not self.frames or self.frames[0][0] > sequence + 1:
+            return None
+        return [frame for frame_sequence, frame in self.frames if frame_sequence > sequence]
+
+    async def wait(self, sequence: int, timeout: float) -> bool:
+        """Wait for an event after `sequence`, False on timeout"""
+        if self.sequence > sequence:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class PlateStreams:
+    def __init__(self, replay_size: int, keepalive: float, max_duration: float, retry_ms: int):
+        self.replay_size = replay_size
+        self.keepalive = keepalive
+        self.max_duration = max_duration
+        self.retry_ms = retry_ms
+        self.channels: Dict[int, PlateChannel] = {}
+
+    def publish(self, plate_id: Optional[int], event: str, message: dict, last: bool = False):
+        # Events of plates nobody watches are dropped
+        channel = self.channels.get(plate_id)
+        if channel is not None:
+            channel.publish(event, message, last)
+
+    def apply_plate(self, action: str, data: dict):
+        message = {"action": action, "resource_type": "plate", "data": data}
+        self.publish(data.get("id"), "plate", message, last=action == "delete")
+
+    def apply_bid(self, action: str, data: dict):
+        message = {"action": action, "resource_type": "bid", "data": data}
+        self.publish(data.get("plate_id"), "bid", message)
+
+    def close(self):
+        """End every stream, browsers reconnect (to another worker during a restart)"""
+        for channel in list(self.channels.values()):
+            channel.close()
+
+    def _subscribe(self, plate_id: int) -> PlateChannel:
+        channel = self.channels.get(plate_id)
+        if channel is None or channel.closed:
+            channel = self.channels[plate_id] = PlateChannel(self.replay_size)
+            SSE_CHANNELS.set(len(self.channels))
+        channel.subscribers += 1
+        SSE_CONNECTIONS.inc()
+        return channel
+
+    def _unsubscribe(self, plate_id: int, channel: PlateChannel):
+        channel.subscribers -= 1
+        SSE_CONNECTIONS.dec()
+        if not channel.subscribers and self.channels.get(plate_id) is channel:
+            del self.channels[plate_id]
+            SSE_CHANNELS.set(len(self.channels))
+
+    def _resume_from(self, channel: PlateChannel, last_event_id: Optional[str]) -> Optional[int]:
+        """Sequence to replay from, None when the client needs a snapshot"""
+        if not last_event_id:
+            return None
+        token, _, sequence = last_event_id.partition("-")
+        if token != channel.token or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        if sequence > channel.sequence or channel.since(sequence) is None:
+            return None
+        return sequence
+
+    async def snapshot(self, plate_id: int) -> Optional[bytes]:
+        """Current state of the plate as an unnumbered "snapshot" event"""
+        await plate_snapshot.refresh()
+        if plate_id not in plate_snapshot.plates:
+            return None
+        return _frame(None, "snapshot", plate_snapshot.message([plate_id]))
+
+    async def stream(self, plate_id: int, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        channel = self._subscribe(plate_id)
+        try:
+            yield f"retry: {self.retry_ms}\n\n".encode()
+            cursor = self._resume_from(channel, last_event_id)
+            if cursor is None:
+                # Taken after subscribing, events published meanwhile are sent after it
+                cursor = channel.sequence
+                frame = await self.snapshot(plate_id)
+                if frame is None:
+                    return
+                yield frame
+            # Streams end now and then, the browser reconnects with Last-Event-ID
+            # (possibly to another worker, which rebalances them)
+            ends_at = time.monotonic() + self.max_duration
+            while True:
+                frames = channel.since(cursor)
+                if frames is None:
+                    # Fell behind the replay buffer
+                    cursor = channel.sequence
+                    frame = await self.snapshot(plate_id)
+                    if frame is None:
+                        return
+                    yield frame
+                    continue
+                if frames:
+                    cursor = channel.sequence
+                    yield b"".join(frames)
+                if channel.closed:
+                    return
+                remaining = ends_at - time.monotonic()
+                if remaining <= 0:
+                    return
+                if not await channel.wait(cursor, min(self.keepalive, remaining)):
+                    yield b": keepalive\n\n"
+        finally:
+            self._unsubscribe(plate_id, channel)
+
+
+plate_streams = PlateStreams(
+    replay_size=config.SSE_REPLAY_EVENTS,
+    keepalive=config.SSE_KEEPALIVE_SECONDS,
+    max_duration=config.SSE_MAX_STREAM_SECONDS,
+    retry_ms=config.SSE_RETRY_MS,
+)
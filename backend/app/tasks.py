@@ -0,0 +1,71 @@
+"""Bounded runner for post-commit side effects such as WebSocket notifications.
+
+Effects are queued to a fixed number of workers instead of one unbounded
+asyncio task each. Effects with the same key (e.g. a plate id) always go to
+the same worker, so they run in submission order. The lifespan flushes the
+queues on shutdown so that no notification is lost on deploy.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable, List, Optional
+
+from . import config
+from .metrics import BACKGROUND_TASK_FAILURES, BACKGROUND_TASK_SECONDS, BACKGROUND_TASKS_PENDING
+
+logger = logging.getLogger(__name__)
+
+
+class TaskRunner:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queues: List[asyncio.Queue] = []
+        self.tasks: List[asyncio.Task] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _queue(self, key: Optional[Hashable]) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if not self.tasks or self.loop is not loop:
+            self.loop = loop
+            size = max(1, self.max_pending // self.workers)
+            self.queues = [asyncio.Queue(maxsize=size) for _ in range(self.workers)]
+            self.tasks = [asyncio.create_task(self._work(queue)) for queue in self.queues]
+        return self.queues[hash(key) % self.workers if key is not None else 0]
+
+    async def submit(self, fn: Callable[..., Awaitable[Any]], *args, key: Optional[Hashable] = None):
+        """Queue `fn(*args)`, waiting for room when the runner is saturated"""
+        BACKGROUND_TASKS_PENDING.inc()
+        await self._queue(key).put((fn, args))
+
+    async def _work(self, queue: asyncio.Queue):
+        while True:
+            fn, args = await queue.get()
+            started = time.perf_counter()
+            try:
+                await fn(*args)
+            except Exception:
+                BACKGROUND_TASK_FAILURES.labels(fn.__name__).inc()
+                logger.exception("Background task %s failed", fn.__name__)
+            finally:
+                BACKGROUND_TASK_SECONDS.labels(fn.__name__).observe(time.perf_counter() - started)
+                BACKGROUND_TASKS_PENDING.dec()
+                queue.task_done()
+
+    async def stop(self, timeout: float = config.TASK_RUNNER_FLUSH_SECONDS):
+        """Run what is still queued (for at most `timeout` seconds), then stop the workers"""
+        if not self.tasks:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self.queues)), timeout)
+        except asyncio.TimeoutError:
+            dropped = sum(queue.qsize() for queue in self.queues)
+            logger.warning("Dropped %d background tasks that did not finish in %.0fs", dropped, timeout)
+            BACKGROUND_TASKS_PENDING.dec(dropped)
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.queues, self.tasks = [], []
+
+
+task_runner = TaskRunner(config.TASK_RUNNER_WORKERS, config.TASK_RUNNER_MAX_PENDING)
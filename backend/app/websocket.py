@@ -1,43 +1,334 @@
-from typing import Dict, List, Any
-from fastapi import WebSocket
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Iterable, List, Any, Optional, Set, Tuple
+from fastapi import WebSocket, WebSocketDisconnect, status
+
+from . import config, events
+from .metrics import (
+    WS_BROADCAST_SECONDS, WS_CONNECTIONS, WS_DROPPED_SENDS, WS_REAPED_CONNECTIONS, WS_REJECTED_CONNECTIONS
+)
+from .outbid import bidder_index
+from .plate_index import plate_index
+from .snapshot import plate_snapshot
+from .sse import plate_streams
+from .tasks import task_runner
+
+try:
+    import msgpack
+except ImportError:  # MessagePack frames are optional
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+
+# Frame formats a client can select with the `format` query parameter
+FRAME_FORMATS = ("json", "msgpack")
+
+
+# Sent every WS_PING_INTERVAL_SECONDS, clients answer with any message (e.g. {"action": "pong"})
+PING_MESSAGE = {"action": "ping", "resource_type": "heartbeat"}
+
+# Raised by a send to a client that went away, depending on when and how it left
+SEND_ERRORS = (RuntimeError, WebSocketDisconnect, OSError)
+
+
+def frame_format_supported(frame_format: str) -> bool:
+    if frame_format == "msgpack":
+        return msgpack is not None
+    return frame_format in FRAME_FORMATS
+
+
+def encode_frame(message: Any, frame_format: str):
+    """Encode a message as a text (JSON) or binary (MessagePack) frame"""
+    if frame_format == "msgpack":
+        # packb starts from a 256 KiB buffer by default, events are a few hundred bytes
+        return msgpack.packb(message, use_bin_type=True, buf_size=1024)
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class Connection:
+    """An accepted WebSocket and what the manager tracks about it"""
+
+    __slots__ = ("websocket", "channel", "frame_format", "client_ip", "user_id", "last_seen")
+
+    def __init__(self, websocket: WebSocket, channel: str, frame_format: str, client_ip: str,
+                 user_id: Optional[int]):
+        self.websocket = websocket
+        self.channel = channel
+        self.frame_format = frame_format
+        self.client_ip = client_ip
+        # Set for authenticated connections, for targeted messages
+        self.user_id = user_id
+        # Last time the client sent anything, for idle reaping
+        self.last_seen = time.monotonic()
 
 
 class ConnectionManager:
-    def __init__(self):
-        # Store all active connections
-        self.active_connections: Dict[str, List[WebSocket]] = {
-            "plates": [],
-            "bids": []
+    def __init__(self, max_connections: int = 0, max_connections_per_ip: int = 0,
+                 close_timeout: float = 5, send_timeout: float = 0):
+        # Store all active connections, one record per socket
+        self.active_connections: Dict[str, Dict[WebSocket, Connection]] = {
+            "plates": {},
+            "bids": {}
         }
+        # Connections of each channel as a tuple, shared by broadcasts until
+        # the channel's membership changes
+        self._members: Dict[str, Tuple[Connection, ...]] = {}
+        # Largest size of each channel's dict since it was last copied
+        self._peaks: Dict[str, int] = {}
+        self.max_connections = max_connections
+        self.max_connections_per_ip = max_connections_per_ip
+        self.close_timeout = close_timeout
+        self.send_timeout = send_timeout
+        # Closes of connections dropped for being too slow
+        self._closing: Set[asyncio.Task] = set()
+        self.connections_per_ip: Dict[str, int] = {}
+        self.draining = False
+        # Authenticated connections of each user, for targeted messages
+        self.user_connections: Dict[int, List[Connection]] = {}
+
+    def _rejection(self, client_ip: str) -> Optional[str]:
+        if self.draining:
+            return "draining"
+        if self.max_connections and self.count() >= self.max_connections:
+            return "max_connections"
+        if self.max_connections_per_ip and self.connections_per_ip.get(client_ip, 0) >= self.max_connections_per_ip:
+            return "max_connections_per_ip"
+        return None
+
+    def count(self) -> int:
+        return sum(len(connections) for connections in self.active_connections.values())
+
+    def members(self, client_type: str) -> Tuple[Connection, ...]:
+        """Connections of a channel, safe to iterate while others (dis)connect"""
+        members = self._members.get(client_type)
+        if members is None:
+            members = self._members[client_type] = tuple(self.active_connections.get(client_type, {}).values())
+        return members
+
+    def _connection(self, websocket: WebSocket) -> Optional[Connection]:
+        for connections in self.active_connections.values():
+            connection = connections.get(websocket)
+            if connection is not None:
+                return connection
+        return None
 
-    async def connect(self, websocket: WebSocket, client_type: str):
+    async def connect(self, websocket: WebSocket, client_type: str, frame_format: str = "json",
+                      user_id: Optional[int] = None) -> bool:
+        """Accept the connection unless a limit is reached, returns whether it was accepted"""
+        client_ip = websocket.client.host if websocket.client else "unknown"
+        reason = self._rejection(client_ip)
+        if reason:
+            WS_REJECTED_CONNECTIONS.labels(reason).inc()
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return False
         await websocket.accept()
-        if client_type not in self.active_connections:
-            self.active_connections[client_type] = []
-        self.active_connections[client_type].append(websocket)
+        connection = Connection(websocket, client_type, frame_format, client_ip, user_id)
+        connections = self.active_connections.setdefault(client_type, {})
+        connections[websocket] = connection
+        self._members.pop(client_type, None)
+        self._peaks[client_type] = max(self._peaks.get(client_type, 0), len(connections))
+        self.connections_per_ip[client_ip] = self.connections_per_ip.get(client_ip, 0) + 1
+        if user_id is not None:
+            self.user_connections.setdefault(user_id, []).append(connection)
+        WS_CONNECTIONS.labels(client_type).set(len(connections))
+        return True
 
     def disconnect(self, websocket: WebSocket, client_type: str):
-        if client_type in self.active_connections:
-            if websocket in self.active_connections[client_type]:
-                self.active_connections[client_type].remove(websocket)
+        connections = self.active_connections.get(client_type)
+        connection = connections.pop(websocket, None) if connections is not None else None
+        if connection is None:
+            return
+        self._members.pop(client_type, None)
+        if len(connections) < self._peaks[client_type] // 4:
+            # Dicts keep their table after deletions, give it back after a burst
+            self.active_connections[client_type] = connections = dict(connections)
+            self._peaks[client_type] = len(connections)
+        WS_CONNECTIONS.labels(client_type).set(len(connections))
+        remaining = self.connections_per_ip[connection.client_ip] - 1
+        if remaining:
+            self.connections_per_ip[connection.client_ip] = remaining
+        else:
+            del self.connections_per_ip[connection.client_ip]
+        if connection.user_id is not None:
+            user_connections = self.user_connections[connection.user_id]
+            user_connections.remove(connection)
+            if not user_connections:
+                del self.user_connections[connection.user_id]
+
+    def touch(self, websocket: WebSocket):
+        """Record that the client is alive (any message counts as a pong)"""
+        connection = self._connection(websocket)
+        if connection is not None:
+            connection.last_seen = time.monotonic()
+
+    async def _close(self, websocket: WebSocket, client_type: str, code: int, reason: str = ""):
+        try:
+            # A dead peer must not block the caller on a full send buffer
+            await asyncio.wait_for(websocket.close(code=code, reason=reason), self.close_timeout)
+        except (*SEND_ERRORS, asyncio.TimeoutError):
+            pass
+        self.disconnect(websocket, client_type)
+
+    async def close_all(self, code: int = 1001):
+        """Stop accepting connections and close every open one, e.g. when the application shuts down"""
+        self.draining = True
+        await asyncio.gather(*(
+            self._close(connection.websocket, client_type, code)
+            for client_type in list(self.active_connections)
+            for connection in self.members(client_type)
+        ))
+
+    async def reap_idle(self, idle_timeout: float) -> int:
+        """Close connections that sent nothing for `idle_timeout` seconds"""
+        deadline = time.monotonic() - idle_timeout
+        idle = [
+            connection
+            for client_type in list(self.active_connections)
+            for connection in self.members(client_type)
+            if connection.last_seen < deadline
+        ]
+        for connection in idle:
+            WS_REAPED_CONNECTIONS.labels(connection.channel).inc()
+        await asyncio.gather(*(
+            self._close(connection.websocket, connection.channel, status.WS_1001_GOING_AWAY, "Idle timeout")
+            for connection in idle
+        ))
+        return len(idle)
+
+    async def ping_all(self):
+        for client_type in list(self.active_connections):
+            await self._send_all(self.members(client_type), PING_MESSAGE)
+
+    async def heartbeat(self, interval: float, idle_timeout: float):
+        """Background loop started by the app lifespan"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if idle_timeout:
+                    await self.reap_idle(idle_timeout)
+                await self.ping_all()
+            except Exception:
+                logger.exception("WebSocket heartbeat failed")
+
+    async def send_frame(self, websocket: WebSocket, frame):
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+
+    async def _send_all(self, connections: Iterable[Connection], message: Any):
+        """Send `message` to each connection in turn, dropping those that fail.
+
+        A send still running send_timeout seconds after the deadline was last
+        pushed back is cancelled. The deadline is pushed back when less than
+        half of it is left, so a fan-out arms about one timer per second
+        rather than one per send, and a stalled client is dropped after
+        between half and all of send_timeout.
+        """
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        timeout, clock = self.send_timeout, loop.time
+        timer = None
+        deadline = 0.0
+        expired = False
+
+        def expire():
+            nonlocal expired
+            expired = True
+            task.cancel()
+
+        # Encode once per frame format instead of once per connection
+        frames = {}
+        try:
+            for connection in connections:
+                frame_format = connection.frame_format
+                if frame_format not in frames:
+                    frames[frame_format] = encode_frame(message, frame_format)
+                if timeout and deadline - clock() < timeout / 2:
+                    if timer is not None:
+                        timer.cancel()
+                    deadline = clock() + timeout
+                    timer = loop.call_at(deadline, expire)
+                try:
+                    await self.send_frame(connection.websocket, frames[frame_format])
+                except SEND_ERRORS:
+                    # Client might have disconnected
+                    self._drop(connection)
+                except asyncio.CancelledError:
+                    if not expired:
+                        raise
+                    # Timer callbacks only run while this task waits on a send,
+                    # so the expired deadline belongs to this connection
+                    expired, timer, deadline = False, None, 0.0
+                    if hasattr(task, "uncancel"):
+                        task.uncancel()
+                    self._drop(connection, timed_out=True)
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def _drop(self, connection: Connection, timed_out: bool = False):
+        WS_DROPPED_SENDS.labels(connection.channel).inc()
+        self.disconnect(connection.websocket, connection.channel)
+        if timed_out:
+            # The client is still connected but not reading, close it so it reconnects
+            task = asyncio.create_task(self._close(
+                connection.websocket, connection.channel, status.WS_1008_POLICY_VIOLATION, "Too slow"
+            ))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def send_to_user(self, user_id: int, message: Any):
+        """Send a message to every authenticated connection of one user"""
+        await self._send_all(list(self.user_connections.get(user_id, ())), message)
 
     async def broadcast(self, message: Any, client_type: str):
         """Send a message to all connected clients of a specific type"""
-        for connection in self.active_connections.get(client_type, []):
-            try:
-                await connection.send_json(message)
-            except RuntimeError:
-                # Client might have disconnected
-                self.disconnect(connection, client_type)
+        started = time.perf_counter()
+        await self._send_all(self.members(client_type), message)
+        WS_BROADCAST_SECONDS.labels(client_type).observe(time.perf_counter() - started)
 
 
 # Create a global connection manager instance
-manager = ConnectionManager()
+manager = ConnectionManager(
+    max_connections=config.WS_MAX_CONNECTIONS,
+    max_connections_per_ip=config.WS_MAX_CONNECTIONS_PER_IP,
+    close_timeout=config.WS_CLOSE_TIMEOUT_SECONDS,
+    send_timeout=config.WS_SEND_TIMEOUT_SECONDS,
+)
 
 
 # Event handlers
 async def notify_plate_update(action: str, plate_data: dict):
-    """Notify all clients about plate changes"""
+    """Notify all clients, on every worker, about plate changes"""
+    await events.event_bus.publish("plate", action, plate_data)
+    await deliver_plate_update(action, plate_data)
+
+
+async def notify_bid_update(action: str, bid_data: dict):
+    """Notify all clients, on every worker, about bid changes"""
+    await events.event_bus.publish("bid", action, bid_data)
+    await deliver_bid_update(action, bid_data)
+
+
+async def deliver_event(kind: str, action: str, data: dict):
+    """Deliver an event published by another worker, in order per plate"""
+    if kind == "plate":
+        await task_runner.submit(deliver_plate_update, action, data, key=data.get("id"))
+    elif kind == "bid":
+        await task_runner.submit(deliver_bid_update, action, data, key=data.get("plate_id"))
+
+
+async def deliver_plate_update(action: str, plate_data: dict):
+    """Update this worker's caches and clients with a plate change"""
+    plate_snapshot.apply_plate(action, plate_data)
+    plate_index.apply_plate(action, plate_data)
+    plate_streams.apply_plate(action, plate_data)
+    if action == "delete":
+        bidder_index.forget(plate_data.get("id"))
     await manager.broadcast(
         {
             "action": action,  # "create", "update", or "delete"
@@ -48,8 +339,12 @@ async def notify_plate_update(action: str, plate_data: dict):
     )
 
 
-async def notify_bid_update(action: str, bid_data: dict):
-    """Notify all clients about bid changes"""
+async def deliver_bid_update(action: str, bid_data: dict):
+    """Update this worker's caches and clients with a bid change"""
+    plate_snapshot.apply_bid(action, bid_data)
+    plate_index.apply_bid(action, bid_data)
+    plate_streams.apply_bid(action, bid_data)
+    await notify_outbid(action, bid_data)
     await manager.broadcast(
         {
             "action": action,  # "create", "update", or "delete"
@@ -69,4 +364,25 @@ async def notify_bid_update(action: str, bid_data: dict):
             "data": bid_data
         },
         "plates"
-    )
\ No newline at end of file
+    )
+
+
+async def notify_outbid(action: str, bid_data: dict):
+    """Tell the displaced leader, and only them, that they were outbid"""
+    # Plates are only loaded into the index while someone could be told
+    previous = await bidder_index.apply(action, bid_data, load=bool(manager.user_connections))
+    if previous is None or previous.leader_id not in manager.user_connections:
+        return
+    await manager.send_to_user(
+        previous.leader_id,
+        {
+            "action": "outbid",
+            "resource_type": "bid",
+            "plate_id": bid_data.get("plate_id"),
+            "data": {
+                "plate_id": bid_data.get("plate_id"),
+                "your_amount": str(previous.leader_amount),
+                "amount": bid_data.get("amount"),
+            }
+        }
+    )
@@ -0,0 +1,15 @@
+"""Gunicorn worker class, see gunicorn.conf.py"""
+from uvicorn_worker import UvicornWorker as BaseUvicornWorker
+
+from . import config
+
+
+class UvicornWorker(BaseUvicornWorker):
+    # Same WebSocket settings as `python -m app`
+    CONFIG_KWARGS = {
+        **BaseUvicornWorker.CONFIG_KWARGS,
+        "ws": "websockets",
+        "ws_per_message_deflate": config.WS_PER_MESSAGE_DEFLATE,
+        "ws_ping_interval": config.WS_PING_INTERVAL_SECONDS or None,
+        "ws_ping_timeout": config.WS_PING_INTERVAL_SECONDS or None,
+    }
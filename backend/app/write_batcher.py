@@ -0,0 +1,147 @@
+"""Group commit for bid writes.
+
+Bid creates and updates from concurrent requests are collected for a few
+milliseconds and written in one transaction: one commit (and fsync on SQLite)
+per batch instead of per bid. Writes are validated in arrival order inside the
+transaction, each against the bids flushed before it, so a bid that does not
+exceed one accepted earlier in the same batch fails with the usual 400 while
+the rest of the batch commits.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from . import config, crud, models, schemas
+from .database import SessionLocal
+from .metrics import BID_WRITE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingWrite:
+    # Validates and flushes one write, raises HTTPException before writing anything
+    stage: Callable[[Session], models.Bid]
+    # Same write in its own transaction, used when the batch commit fails
+    fallback: Callable[[Session], models.Bid]
+    future: asyncio.Future
+
+
+class WriteBatcher:
+    def __init__(self, window: float, max_size: int):
+        self.window = window
+        self.max_size = max_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _submit(self, stage: Callable, fallback: Callable) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.loop is not loop:
+            self.loop = loop
+            self.queue = asyncio.Queue()
+            self.task = asyncio.create_task(self._run())
+        future = loop.create_future()
+        self.queue.put_nowait(PendingWrite(stage, fallback, future))
+        return future
+
+    async def create_bid(self, bid: schemas.BidCreate, user_id: int) -> models.Bid:
+        return await self._submit(
+            lambda db: crud.stage_bid(db, bid, user_id),
+            lambda db: crud.create_bid(db, bid, user_id),
+        )
+
+    async def update_bid(self, bid_id: int, bid: schemas.BidUpdate, user_id: int) -> models.Bid:
+        return await self._submit(
+            lambda db: crud.stage_bid_update(db, bid_id, bid, user_id),
+            lambda db: crud.update_bid(db, bid_id, bid, user_id),
+        )
+
+    async def _collect(self) -> List[PendingWrite]:
+        batch = [await self.queue.get()]
+        deadline = self.loop.time() + self.window
+        while len(batch) < self.max_size:
+            timeout = deadline - self.loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                outcomes = await asyncio.to_thread(self._process, batch)
+            except Exception as exc:
+                logger.exception("Bid write batch failed")
+                outcomes = [exc] * len(batch)
+            for write, outcome in zip(batch, outcomes):
+                if not write.future.done():
+                    if isinstance(outcome, Exception):
+                        write.future.set_exception(outcome)
+                    else:
+                        write.future.set_result(outcome)
+                self.queue.task_done()
+
+    def _process(self, batch: List[PendingWrite]) -> List[Any]:
+        outcomes: List[Any] = [None] * len(batch)
+        db = SessionLocal()
+        try:
+            try:
+                for index, write in enumerate(batch):
+                    try:
+                        outcomes[index] = write.stage(db)
+                    except HTTPException as exc:
+                        outcomes[index] = exc
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.warning("Group commit of %d bid writes failed, retrying one by one", len(batch),
+                               exc_info=True)
+                return self._one_by_one(batch)
+
+            BID_WRITE_BATCH_SIZE.observe(len(batch))
+            # Reload the committed bids, with their server-side defaults, in one query
+            bids = [outcome for outcome in outcomes if isinstance(outcome, models.Bid)]
+            if bids:
+                db.query(models.Bid).filter(models.Bid.id.in_([bid.id for bid in bids])).all()
+            return outcomes
+        finally:
+            db.close()
+
+    def _one_by_one(self, batch: List[PendingWrite]) -> List[Any]:
+        """Own transaction per write, so only the offending write fails. Each
+        gets its own session too, so a rollback doesn't expire earlier bids."""
+        outcomes = []
+        for write in batch:
+            db = SessionLocal(expire_on_commit=False)
+            try:
+                outcomes.append(write.fallback(db))
+            except Exception as exc:
+                db.rollback()
+                outcomes.append(exc)
+            finally:
+                db.close()
+        return outcomes
+
+    async def stop(self, timeout: float = config.TASK_RUNNER_FLUSH_SECONDS):
+        """Write what is still queued, then stop"""
+        if self.task is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Dropped %d queued bid writes on shutdown", self.queue.qsize())
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.task = self.queue = None
+
+
+bid_batcher = WriteBatcher(config.BID_BATCH_WINDOW_MS / 1000, config.BID_BATCH_MAX_SIZE)
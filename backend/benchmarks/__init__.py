@@ -0,0 +1,13 @@
+"""In-process load tests for the auction API.
+
+Run from the backend directory:
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks run --plates 5000 --bids 50000
+    python -m benchmarks read-path --rows 10000
+    python -m benchmarks memory --connections 50000
+    python -m benchmarks compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+
+The app is driven through httpx's ASGI transport and simulated WebSocket
+clients against a scratch SQLite database, so no server or network is needed.
+"""
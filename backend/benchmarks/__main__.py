@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+# Metrics where a higher number is a regression
+LOWER_IS_BETTER = ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "sql_statements_per_op", "max_rss_mb")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _configure_environment(database_path: str):
+    # Must run before anything under `app` is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ["RATE_LIMITS"] = "login=;bids:create=;bids:update="
+    os.environ["ADMISSION_POOL_WAIT_THRESHOLD"] = "0"
+    # Simulated sockets all come from one address
+    os.environ["WS_MAX_CONNECTIONS"] = "0"
+    os.environ["WS_MAX_CONNECTIONS_PER_IP"] = "0"
+    os.environ.setdefault("SLOW_QUERY_MS", "0")
+
+
+async def _run_scenarios(args, dataset) -> dict:
+    import httpx
+
+    from app.main import create_app
+    from . import scenarios
+
+    rng = random.Random(args.seed)
+    transport = httpx.ASGITransport(app=create_app())
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        results["listing"] = await scenarios.listing(client, dataset, args.requests, args.concurrency, rng)
+        results["plate_detail"] = await scenarios.plate_detail(client, dataset, args.requests, args.concurrency, rng)
+        results["bid_contention"] = await scenarios.bid_contention(
+            client, dataset, args.requests, args.concurrency, rng
+        )
+    results["broadcast_fanout"] = await scenarios.broadcast_fanout(args.ws_clients, args.broadcasts)
+    return results
+
+
+def run(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure_environment(os.path.join(tmp, "benchmark.db"))
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+        from app.database import engine
+        from .seed import seed
+
+        started = time.perf_counter()
+        dataset = seed(engine, args.users, args.plates, args.bids, args.hot_plates, args.seed)
+        seed_seconds = time.perf_counter() - started
+        print(f"Seeded {dataset.users} users, {dataset.plates} plates, {dataset.bids} bids "
+              f"in {seed_seconds:.1f}s", file=sys.stderr)
+
+        results = asyncio.run(_run_scenarios(args, dataset))
+        engine.dispose()
+
+    if args.startup_runs:
+        from .startup import measure
+
+        results["startup"] = measure(args.startup_runs)
+
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {key: value for key, value in vars(args).items() if key not in ("func", "output")},
+            "dataset": vars(dataset),
+        },
+        "scenarios": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    for name, result in results.items():
+        if name == "startup":
+            print(f"{name:18} p50 {result['p50_ms']:>8.2f}ms  (import {result['import_ms']:.2f}ms)  "
+                  f"max RSS {result['max_rss_mb']:.1f}MB")
+            continue
+        print(f"{name:18} {result['throughput_per_s']:>10.1f}/s  p50 {result['p50_ms']:>8.2f}ms  "
+              f"p95 {result['p95_ms']:>8.2f}ms  p99 {result['p99_ms']:>8.2f}ms")
+    print(f"Results written to {output}")
+    return 0
+
+
+def startup(args) -> int:
+    from .startup import measure
+
+    print(json.dumps(measure(args.runs), indent=2))
+    return 0
+
+
+def read_path(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure_environment(os.path.join(tmp, "read_path.db"))
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+        from app.database import dispose_engines
+        from .read_path import measure
+
+        results = measure(args.rows, args.runs)
+        dispose_engines()
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+def memory(args) -> int:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+    from .memory import measure
+
+    print(json.dumps(measure(args.connections, args.events), indent=2))
+    return 0
+
+
+def compare(args) -> int:
+    """Print changes between two result files, exit 1 on regressions"""
+    old = json.loads(Path(args.old).read_text())["scenarios"]
+    new = json.loads(Path(args.new).read_text())["scenarios"]
+    regressions = 0
+    for name in sorted(old.keys() & new.keys()):
+        for metric in ("throughput_per_s",) + LOWER_IS_BETTER:
+            if metric not in old[name] or metric not in new[name]:
+                continue
+            before, after = old[name][metric], new[name][metric]
+            change = (after - before) / before * 100 if before else 0.0
+            worse = change < -args.threshold if metric == "throughput_per_s" else change > args.threshold
+            regressions += worse
+            flag = "  REGRESSION" if worse else ""
+            print(f"{name:18} {metric:22} {before:>12.3f} -> {after:>12.3f} ({change:+6.1f}%){flag}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(required=True)
+
+    run_parser = commands.add_parser("run", help="seed a scratch database and run all scenarios")
+    run_parser.add_argument("--users", type=int, default=2000)
+    run_parser.add_argument("--plates", type=int, default=5000)
+    run_parser.add_argument("--bids", type=int, default=50000)
+    run_parser.add_argument("--hot-plates", type=int, default=10)
+    run_parser.add_argument("--requests", type=int, default=500, help="requests per REST scenario")
+    run_parser.add_argument("--concurrency", type=int, default=32)
+    run_parser.add_argument("--ws-clients", type=int, default=1000, help="simulated sockets per channel")
+    run_parser.add_argument("--broadcasts", type=int, default=200)
+    run_parser.add_argument("--startup-runs", type=int, default=5, help="worker startup samples, 0 to skip")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--output", help="defaults to benchmarks/results/<commit>.json")
+    run_parser.set_defaults(func=run)
+
+    startup_parser = commands.add_parser("startup", help="only measure worker startup time and memory")
+    startup_parser.add_argument("--runs", type=int, default=5)
+    startup_parser.set_defaults(func=startup)
+
+    read_path_parser = commands.add_parser(
+        "read-path", help="compare per-row CPU and memory of the ORM and Core listing read paths"
+    )
+    read_path_parser.add_argument("--rows", type=int, default=10_000)
+    read_path_parser.add_argument("--runs", type=int, default=5)
+    read_path_parser.set_defaults(func=read_path)
+
+    memory_parser = commands.add_parser(
+        "memory", help="measure WebSocket registry memory per connection and per broadcast event"
+    )
+    memory_parser.add_argument("--connections", type=int, default=50_000)
+    memory_parser.add_argument("--events", type=int, default=20)
+    memory_parser.set_defaults(func=memory)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import asyncio
+import gc
+import statistics
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Address
+
+
+class _Socket:
+    """Stands in for a Starlette WebSocket and drops what it is sent"""
+
+    def __init__(self, host: str, port: int):
+        # Starlette builds a new Address from the ASGI scope on each access
+        self._scope_client = (host, port)
+
+    @property
+    def client(self) -> Address:
+        return Address(*self._scope_client)
+
+    async def accept(self, *args, **kwargs):
+        pass
+
+    async def close(self, *args, **kwargs):
+        pass
+
+    async def send_text(self, data: str):
+        pass
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+
+def _sockets(connections: int) -> List[Tuple[_Socket, str, str, Optional[int]]]:
+    """(socket, channel, format, user id) for each connection. Every connection
+    gets its own strings, as it would from parsing its request, with 10
+    connections per client address and half of them authenticated."""
+    sockets = []
+    for index in range(connections):
+        address = index // 10
+        host = f"10.{address // 65536 % 256}.{address // 256 % 256}.{address % 256}"
+        frame_format = ("msgpack" if index % 4 == 0 else "json").encode().decode()
+        user_id = 1 + index % 5000 if index % 2 == 0 else None
+        channel = "plates" if index % 2 else "bids"
+        sockets.append((_Socket(host, 40000 + index % 20000), channel, frame_format, user_id))
+    return sockets
+
+
+def _bid_event(index: int) -> Dict:
+    return {
+        "id": index, "amount": f"{1000 + index}.00", "user_id": 2, "plate_id": 1 + index % 50,
+        "created_at": f"2030-01-01T00:{index // 60 % 60:02d}:{index % 60:02d}",
+    }
+
+
+async def _deliver(manager, bid: Dict):
+    """Broadcast a bid event to both channels, as deliver_bid_update does"""
+    await manager.broadcast({"action": "create", "resource_type": "bid", "data": bid}, "bids")
+    await manager.broadcast(
+        {"action": "bid_create", "resource_type": "bid_on_plate", "plate_id": bid["plate_id"], "data": bid},
+        "plates",
+    )
+
+
+def _traced() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def _memory(connections: int, events: int) -> Dict:
+    from app.websocket import ConnectionManager, notify_bid_update
+
+    # The sockets and their query parameters belong to the server, only the
+    # registry's share is measured
+    sockets = _sockets(connections)
+    manager = ConnectionManager()
+    tracemalloc.start()
+    try:
+        empty = _traced()
+        for websocket, channel, frame_format, user_id in sockets:
+            await manager.connect(websocket, channel, frame_format, user_id)
+        registry = _traced() - empty
+
+        # Allocated at the peak of one event's delivery, the first one after
+        # connections changed and the following ones
+        peaks = []
+        for index in range(events):
+            baseline = _traced()
+            tracemalloc.reset_peak()
+            await _deliver(manager, _bid_event(index))
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+
+        # Retained by a notification waiting in the task runner
+        before = _traced()
+        queued = [(notify_bid_update, ("create", _bid_event(index))) for index in range(events)]
+        queued_bytes = _traced() - before
+        del queued
+
+        for websocket, channel, _, _ in sockets:
+            manager.disconnect(websocket, channel)
+        leftover = _traced() - empty
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "bytes_per_connection": round(registry / connections),
+        "registry_mb": round(registry / 1024 / 1024, 2),
+        "broadcast_peak_bytes_first_event": peaks[0],
+        "broadcast_peak_bytes_per_event": round(statistics.median(peaks[1:] or peaks)),
+        "queued_bytes_per_event": round(queued_bytes / events),
+        "bytes_left_after_disconnect": leftover,
+    }
+
+
+async def _timings(connections: int, events: int) -> Dict:
+    from app.websocket import ConnectionManager
+
+    sockets = _sockets(connections)
+    manager = ConnectionManager()
+    started = time.perf_counter()
+    for websocket, channel, frame_format, user_id in sockets:
+        await manager.connect(websocket, channel, frame_format, user_id)
+    connect = time.perf_counter() - started
+
+    durations = []
+    for index in range(events):
+        started = time.perf_counter()
+        await _deliver(manager, _bid_event(index))
+        durations.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for websocket, channel, _, _ in sockets:
+        manager.disconnect(websocket, channel)
+    disconnect = time.perf_counter() - started
+    return {
+        "connect_us": round(connect / connections * 1e6, 2),
+        "disconnect_us": round(disconnect / connections * 1e6, 2),
+        "broadcast_ms_per_event": round(statistics.median(durations) * 1000, 2),
+    }
+
+
+def measure(connections: int = 50_000, events: int = 20) -> Dict:
+    """Memory of the WebSocket registry per connection, and per bid event
+    broadcast to all of those connections, with simulated sockets. Timings
+    are taken in a separate run without tracemalloc."""
+    results = {"connections": connections}
+    results.update(asyncio.run(_memory(connections, events)))
+    results.update(asyncio.run(_timings(connections, events)))
+    return results
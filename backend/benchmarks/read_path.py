@@ -0,0 +1,134 @@
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+from sqlalchemy import func, insert
+
+
+def _orm_plates(db, rows: int) -> bytes:
+    """GET /plates/ as before: ORM objects validated into schemas.AutoPlate"""
+    from pydantic import TypeAdapter
+
+    from app import models, schemas
+
+    plates = db.query(models.AutoPlate).limit(rows).all()
+    highest_bids = dict(db.query(models.Bid.plate_id, func.max(models.Bid.amount)).filter(
+        models.Bid.plate_id.in_([plate.id for plate in plates])
+    ).group_by(models.Bid.plate_id).all())
+    data = [
+        {
+            "id": plate.id,
+            "plate_number": plate.plate_number,
+            "description": plate.description,
+            "deadline": plate.deadline,
+            "is_active": plate.is_active,
+            "created_by_id": plate.created_by_id,
+            "highest_bid": highest_bids.get(plate.id),
+        }
+        for plate in plates
+    ]
+    adapter = TypeAdapter(List[schemas.AutoPlate])
+    content = adapter.dump_python(adapter.validate_python(data), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _orm_bids(db, rows: int) -> bytes:
+    """GET /bids/ as before: ORM objects validated into schemas.Bid"""
+    from pydantic import TypeAdapter
+
+    from app import models, schemas
+
+    bids = db.query(models.Bid).filter(models.Bid.user_id == 2).limit(rows).all()
+    adapter = TypeAdapter(List[schemas.Bid])
+    content = adapter.dump_python(adapter.validate_python(bids, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _core_plates(db, rows: int) -> bytes:
+    from app import crud
+    from app.responses import encode_rows
+
+    return encode_rows(crud.get_plate_rows(db, limit=rows))
+
+
+def _core_bids(db, rows: int) -> bytes:
+    from app import crud
+    from app.responses import encode_rows
+
+    return encode_rows(crud.get_bids_by_user(db, 2, limit=rows))
+
+
+def _sample(path: Callable, rows: int, runs: int) -> Dict:
+    from app.database import SessionLocal
+
+    def once():
+        db = SessionLocal()
+        try:
+            return path(db, rows)
+        finally:
+            db.close()
+
+    body = once()  # warm up statement caches
+    cpu, wall = [], []
+    for _ in range(runs):
+        gc.collect()
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        once()
+        cpu.append(time.process_time() - cpu_started)
+        wall.append(time.perf_counter() - wall_started)
+
+    gc.collect()
+    tracemalloc.start()
+    once()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    cpu_best = min(cpu)
+    return {
+        "body": body,
+        "cpu_ms": round(cpu_best * 1000, 2),
+        "wall_ms": round(min(wall) * 1000, 2),
+        "cpu_us_per_row": round(cpu_best / rows * 1e6, 3),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+        "peak_bytes_per_row": round(peak / rows),
+    }
+
+
+def _reduction(before: float, after: float) -> float:
+    return round((before - after) / before * 100, 1) if before else 0.0
+
+
+def measure(rows: int = 10_000, runs: int = 5) -> Dict:
+    """Per-row CPU and peak memory of the ORM and Core read paths of GET
+    /plates/ and GET /bids/ at `rows` rows. Expects the environment to point
+    at a scratch database."""
+    from app import models
+    from app.database import engine
+    from .seed import seed
+
+    # One bid by user 2 on every plate, so both listings return `rows` rows
+    seed(engine, users=2, plates=rows, bids=0, hot_plates=0)
+    created_at = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(insert(models.Bid), [
+            {"amount": Decimal(100 + plate_id % 900), "user_id": 2, "plate_id": plate_id, "created_at": created_at}
+            for plate_id in range(1, rows + 1)
+        ])
+
+    results = {}
+    for name, orm_path, core_path in (("plates", _orm_plates, _core_plates), ("bids", _orm_bids, _core_bids)):
+        orm, core = _sample(orm_path, rows, runs), _sample(core_path, rows, runs)
+        same_output = orm.pop("body") == core.pop("body")
+        results[name] = {
+            "rows": rows,
+            "orm": orm,
+            "core": core,
+            "same_output": same_output,
+            "cpu_reduction_pct": _reduction(orm["cpu_us_per_row"], core["cpu_us_per_row"]),
+            "memory_reduction_pct": _reduction(orm["peak_bytes_per_row"], core["peak_bytes_per_row"]),
+        }
+    return results
@@ -0,0 +1,161 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List
+
+from prometheus_client import REGISTRY
+
+from .seed import Dataset
+from .stats import summarize
+
+
+def _sql_statements() -> float:
+    return REGISTRY.get_sample_value("sql_statements_total") or 0.0
+
+
+async def _drive(operations: List[Callable[[], Awaitable[int]]], concurrency: int) -> Dict:
+    """Run operations with bounded concurrency, timing each one"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = Counter()
+
+    async def run(operation):
+        async with semaphore:
+            started = time.perf_counter()
+            status = await operation()
+            latencies.append(time.perf_counter() - started)
+            statuses[str(status)] += 1
+
+    statements_before = _sql_statements()
+    started = time.perf_counter()
+    await asyncio.gather(*(run(operation) for operation in operations))
+    result = summarize(latencies, time.perf_counter() - started)
+    result["statuses"] = dict(statuses)
+    result["sql_statements_per_op"] = round((_sql_statements() - statements_before) / len(operations), 2)
+    return result
+
+
+def auth_headers(user_id: int) -> Dict[str, str]:
+    from app.auth import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token({'sub': f'user{user_id}'})}"}
+
+
+async def listing(client, dataset: Dataset, requests: int, concurrency: int, rng: random.Random) -> Dict:
+    """GET /plates/ pages of 100 with the default and deadline orderings"""
+    def operation(skip, ordering):
+        async def call():
+            params = {"skip": skip, "limit": 100}
+            if ordering:
+                params["ordering"] = ordering
+            response = await client.get("/plates/", params=params)
+            return response.status_code
+        return call
+
+    operations = [
+        operation(rng.randrange(0, max(1, dataset.plates - 100)), rng.choice([None, "deadline", "-deadline"]))
+        for _ in range(requests)
+    ]
+    return await _drive(operations, concurrency)
+
+
+async def plate_detail(client, dataset: Dataset, requests: int, concurrency: int, rng: random.Random) -> Dict:
+    """GET /plates/{id} including the plate's bid list"""
+    def operation(plate_id):
+        async def call():
+            response = await client.get(f"/plates/{plate_id}")
+            return response.status_code
+        return call
+
+    operations = [operation(rng.randint(1, dataset.plates)) for _ in range(requests)]
+    return await _drive(operations, concurrency)
+
+
+async def bid_contention(client, dataset: Dataset, requests: int, concurrency: int, rng: random.Random) -> Dict:
+    """POST /bids/ from many users racing on a handful of plates. Amounts rise
+    with submission order, so late arrivals are rejected with 400."""
+    bidders = dataset.users - 1
+    requests = min(requests, bidders * dataset.hot_plates)
+    headers = {}
+
+    def operation(index):
+        user_id = 2 + index % bidders
+        plate_id = 1 + index // bidders % dataset.hot_plates
+        if user_id not in headers:
+            headers[user_id] = auth_headers(user_id)
+
+        async def call():
+            response = await client.post(
+                "/bids/",
+                json={"plate_id": plate_id, "amount": str(1000 + index)},
+                headers=headers[user_id],
+            )
+            return response.status_code
+        return call
+
+    order = list(range(requests))
+    # Interleave plates so concurrent requests actually contend
+    rng.shuffle(order)
+    operations = [operation(index) for index in order]
+    return await _drive(operations, concurrency)
+
+
+class SimulatedWebSocket:
+    """Stands in for a Starlette WebSocket and records when frames arrive"""
+
+    def __init__(self, deliveries: List[float]):
+        self.deliveries = deliveries
+        self.query_params = {}
+        self.client = None
+
+    async def accept(self, *args, **kwargs):
+        pass
+
+    async def close(self, *args, **kwargs):
+        pass
+
+    async def send_text(self, data: str):
+        self.deliveries.append(time.perf_counter())
+
+    async def send_bytes(self, data: bytes):
+        self.deliveries.append(time.perf_counter())
+
+
+async def broadcast_fanout(clients: int, broadcasts: int) -> Dict:
+    """Push bid events to `clients` simulated sockets on each channel"""
+    from app.websocket import manager, notify_bid_update
+
+    deliveries: List[float] = []
+    sockets = []
+    for index in range(clients):
+        for channel in ("plates", "bids"):
+            websocket = SimulatedWebSocket(deliveries)
+            await manager.connect(websocket, channel, "msgpack" if index % 4 == 0 else "json")
+            sockets.append((websocket, channel))
+
+    broadcast_latencies = []
+    delivery_latencies = []
+    started = time.perf_counter()
+    try:
+        for index in range(broadcasts):
+            deliveries.clear()
+            sent = time.perf_counter()
+            await notify_bid_update("create", {
+                "id": index,
+                "amount": f"{1000 + index}.00",
+                "user_id": 2,
+                "plate_id": 1 + index % 50,
+                "created_at": "2030-01-01T00:00:00",
+            })
+            broadcast_latencies.append(time.perf_counter() - sent)
+            delivery_latencies.extend(delivered - sent for delivered in deliveries)
+        elapsed = time.perf_counter() - started
+    finally:
+        for websocket, channel in sockets:
+            manager.disconnect(websocket, channel)
+
+    result = summarize(broadcast_latencies, elapsed)
+    result["clients_per_channel"] = clients
+    result["delivery"] = summarize(delivery_latencies, elapsed)
+    return result
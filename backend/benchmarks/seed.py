@@ -0,0 +1,80 @@
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+BENCHMARK_PASSWORD = "benchmark"
+
+
+@dataclass
+class Dataset:
+    users: int
+    plates: int
+    bids: int
+    # Plates 1..hot_plates are left without bids for the contention scenario
+    hot_plates: int
+
+
+def seed(engine, users: int, plates: int, bids: int, hot_plates: int = 10, seed: int = 42) -> Dataset:
+    """Insert a deterministic synthetic dataset. User 1 is the staff user that
+    created every plate, users 2..N are bidders."""
+    from app import models
+    from app.auth import get_password_hash
+    from app.migrate import upgrade
+
+    upgrade(engine)
+    rng = random.Random(seed)
+    now = datetime.now()
+    # Hashing is slow on purpose, so every user shares one hash
+    hashed_password = get_password_hash(BENCHMARK_PASSWORD)
+
+    user_rows = [
+        {
+            "username": f"user{i}",
+            "email": f"user{i}@bench.local",
+            "hashed_password": hashed_password,
+            "is_staff": i == 1,
+        }
+        for i in range(1, users + 1)
+    ]
+    plate_rows = [
+        {
+            "plate_number": f"B{i:07d}",
+            "description": f"Synthetic plate {i} " + "x" * rng.randint(10, 120),
+            "deadline": now + timedelta(days=1, minutes=rng.randint(0, 60 * 24 * 30)),
+            "is_active": True,
+            "created_by_id": 1,
+        }
+        for i in range(1, plates + 1)
+    ]
+
+    highest = {}
+    seen = set()
+    bid_rows = []
+    bidders = range(2, users + 1)
+    attempts = 0
+    while len(bid_rows) < bids and attempts < bids * 10:
+        attempts += 1
+        plate_id = rng.randint(hot_plates + 1, plates)
+        user_id = rng.choice(bidders)
+        if (user_id, plate_id) in seen:
+            continue
+        seen.add((user_id, plate_id))
+        amount = highest.get(plate_id, Decimal(rng.randint(100, 1000))) + Decimal(rng.randint(1, 50))
+        highest[plate_id] = amount
+        bid_rows.append({
+            "amount": amount,
+            "user_id": user_id,
+            "plate_id": plate_id,
+            "created_at": now - timedelta(seconds=bids - len(bid_rows)),
+        })
+
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), user_rows)
+        conn.execute(insert(models.AutoPlate), plate_rows)
+        if bid_rows:
+            conn.execute(insert(models.Bid), bid_rows)
+
+    return Dataset(users=users, plates=plates, bids=len(bid_rows), hot_plates=hot_plates)
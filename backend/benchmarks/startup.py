@@ -0,0 +1,68 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Runs in a fresh interpreter so imports are not already cached
+PROBE = """
+import asyncio, json, resource, sys, time
+started = time.perf_counter()
+from app.main import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+
+async def lifespan():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+    return ready
+
+ready = asyncio.run(lifespan())
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "import_s": imported - started,
+    "create_app_s": created - imported,
+    "lifespan_s": ready - created,
+    "total_s": ready - started,
+    "max_rss_mb": rss_kb / 1024 if sys.platform != "darwin" else rss_kb / 1024 / 1024,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def measure(runs: int = 5) -> Dict:
+    """Time import + create_app() + lifespan startup and peak RSS of a worker"""
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp}/startup.db")
+        # Migrated up front, as a deploy would, so startup finds its tables
+        subprocess.run(
+            [sys.executable, "-m", "app.migrate", "upgrade"], cwd=BACKEND_DIR, env=env,
+            check=True, capture_output=True
+        )
+        for _ in range(runs):
+            output = subprocess.check_output(
+                [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env, text=True
+            )
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    def median_ms(key):
+        return round(statistics.median(sample[key] for sample in samples) * 1000, 2)
+
+    totals = sorted(sample["total_s"] for sample in samples)
+    return {
+        "operations": runs,
+        "import_ms": median_ms("import_s"),
+        "create_app_ms": median_ms("create_app_s"),
+        "lifespan_ms": median_ms("lifespan_s"),
+        "p50_ms": median_ms("total_s"),
+        "max_ms": round(totals[-1] * 1000, 2),
+        "max_rss_mb": round(statistics.median(sample["max_rss_mb"] for sample in samples), 1),
+        "modules": samples[-1]["modules"],
+    }
@@ -0,0 +1,54 @@
+"""Gunicorn settings for running the API on every core.
+
+    python -m app.migrate upgrade
+    WEB_CONCURRENCY=8 EVENT_BUS=database IDEMPOTENCY_STORE=database \
+        RATE_LIMIT_REDIS_URL=redis://localhost:6379/1 gunicorn -c gunicorn.conf.py
+
+`python -m app` with WEB_CONCURRENCY > 1 runs the same worker pool under
+uvicorn's own supervisor instead.
+
+Shared state. Each worker keeps its own WebSocket connections and in-memory
+caches. They are kept in sync through:
+
+- EVENT_BUS ("database" or "redis"): every plate and bid event is delivered to
+  the clients and caches of all workers, so a bid placed on one worker reaches
+  sockets, snapshots and outbid notices on the others.
+- IDEMPOTENCY_STORE=database: retries are replayed whichever worker they reach.
+- RATE_LIMIT_REDIS_URL: one rate-limit bucket per user across workers.
+
+Leave BID_ACTORS_ENABLED off, bid actors assume they own their plates. The
+app logs a warning for any of these left at its single-process default.
+
+Scheduled jobs (ARCHIVE_INTERVAL_SECONDS, event purging) run on exactly one
+worker, elected with a Postgres advisory lock or a lock file next to the
+SQLite database (SCHEDULER_LOCK_FILE to override). When that worker stops,
+another takes over within SCHEDULER_LOCK_RETRY_SECONDS. Analytics rollups and
+WebSocket heartbeats stay per worker, as they only cover the worker's own
+writes and connections.
+
+Rolling restarts. `kill -HUP <master pid>` starts new workers and stops the
+old ones gracefully. A stopping worker stops accepting connections, finishes
+in-flight requests (up to GRACEFUL_TIMEOUT_SECONDS), flushes queued
+notifications and closes its WebSockets with 1012 (service restart). Clients
+reconnect to a live worker and get a fresh snapshot. Bids are committed before
+their request returns, so none are lost.
+
+Metrics. Set PROMETHEUS_MULTIPROC_DIR to an empty directory so that /metrics
+reports every worker.
+"""
+from app import config
+
+bind = f"{config.HOST}:{config.PORT}"
+workers = config.WEB_CONCURRENCY
+worker_class = "app.workers.UvicornWorker"
+wsgi_app = "app.main:create_app()"
+graceful_timeout = config.GRACEFUL_TIMEOUT_SECONDS
+# Workers import the app themselves, so a reload picks up new code
+preload_app = False
+
+
+def child_exit(server, worker):
+    if config.PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
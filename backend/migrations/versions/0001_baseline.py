@@ -0,0 +1,69 @@
+"""baseline: users, auto_plates and bids
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("hashed_password", sa.String(), nullable=True),
+        sa.Column("is_staff", sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"], unique=False)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "auto_plates",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("plate_number", sa.String(length=10), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("deadline", sa.DateTime(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_by_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["created_by_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_auto_plates_id", "auto_plates", ["id"], unique=False)
+    op.create_index("ix_auto_plates_plate_number", "auto_plates", ["plate_number"], unique=True)
+
+    op.create_table(
+        "bids",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("plate_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["plate_id"], ["auto_plates.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "plate_id", name="unique_user_plate_bid"),
+    )
+    op.create_index("ix_bids_id", "bids", ["id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_bids_id", table_name="bids")
+    op.drop_table("bids")
+    op.drop_index("ix_auto_plates_plate_number", table_name="auto_plates")
+    op.drop_index("ix_auto_plates_id", table_name="auto_plates")
+    op.drop_table("auto_plates")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_username", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
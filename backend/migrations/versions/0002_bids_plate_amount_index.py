@@ -0,0 +1,22 @@
+"""index bids by plate and amount
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_bids_plate_id_amount", "bids", ["plate_id", "amount"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_bids_plate_id_amount", table_name="bids")
@@ -0,0 +1,57 @@
+"""archive tables for closed auctions, never reuse plate and bid ids
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Archived rows keep their ids, so SQLite must not hand them out again
+    if op.get_bind().dialect.name == "sqlite":
+        for table in ("auto_plates", "bids"):
+            with op.batch_alter_table(table, recreate="always", table_kwargs={"sqlite_autoincrement": True}):
+                pass
+
+    op.create_table(
+        "archived_plates",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("plate_number", sa.String(length=10), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("deadline", sa.DateTime(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_by_id", sa.Integer(), nullable=True),
+        sa.Column("highest_bid", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("bid_count", sa.Integer(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_archived_plates_plate_number", "archived_plates", ["plate_number"], unique=False)
+
+    op.create_table(
+        "archived_bids",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("amount", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("plate_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_archived_bids_plate_id", "archived_bids", ["plate_id"], unique=False)
+    op.create_index("ix_archived_bids_user_id", "archived_bids", ["user_id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_archived_bids_user_id", table_name="archived_bids")
+    op.drop_index("ix_archived_bids_plate_id", table_name="archived_bids")
+    op.drop_table("archived_bids")
+    op.drop_index("ix_archived_plates_plate_number", table_name="archived_plates")
+    op.drop_table("archived_plates")
@@ -0,0 +1,32 @@
+"""plate_stats summary table for analytics
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "plate_stats",
+        sa.Column("plate_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("bid_count", sa.Integer(), nullable=True),
+        sa.Column("first_bid", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("highest_bid", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("first_bid_at", sa.DateTime(), nullable=True),
+        sa.Column("last_bid_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("plate_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("plate_stats")
@@ -0,0 +1,37 @@
+"""proxy_bids table for automatic bidding
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "proxy_bids",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("max_amount", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("plate_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["plate_id"], ["auto_plates.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "plate_id", name="unique_user_plate_proxy_bid"),
+    )
+    op.create_index("ix_proxy_bids_id", "proxy_bids", ["id"], unique=False)
+    op.create_index("ix_proxy_bids_plate_id", "proxy_bids", ["plate_id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_proxy_bids_plate_id", table_name="proxy_bids")
+    op.drop_index("ix_proxy_bids_id", table_name="proxy_bids")
+    op.drop_table("proxy_bids")
@@ -0,0 +1,34 @@
+"""events table for the database event bus
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("origin", sa.String(length=64), nullable=True),
+        sa.Column("kind", sa.String(length=16), nullable=True),
+        sa.Column("action", sa.String(length=16), nullable=True),
+        sa.Column("payload", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_events_created_at", "events", ["created_at"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_events_created_at", table_name="events")
+    op.drop_table("events")
@@ -0,0 +1,33 @@
+"""user_stats table for analytics, index bids by creation time
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("bid_count", sa.Integer(), nullable=True),
+        sa.Column("total_amount", sa.Numeric(precision=14, scale=2), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_index("ix_user_stats_bid_count", "user_stats", ["bid_count"], unique=False)
+    op.create_index("ix_bids_created_at", "bids", ["created_at"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_bids_created_at", table_name="bids")
+    op.drop_index("ix_user_stats_bid_count", table_name="user_stats")
+    op.drop_table("user_stats")
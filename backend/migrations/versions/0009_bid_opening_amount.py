@@ -0,0 +1,27 @@
+"""opening_amount of bids, the amount a bid was placed with
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ("bids", "archived_bids"):
+        op.add_column(table, sa.Column("opening_amount", sa.Numeric(precision=10, scale=2), nullable=True))
+        # Earlier raises are not recorded, the current amount is the best estimate
+        op.execute(f"UPDATE {table} SET opening_amount = amount")
+
+
+def downgrade():
+    for table in ("bids", "archived_bids"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("opening_amount")
@@ -0,0 +1,74 @@
+"""Tests run against a scratch SQLite database, configured before `app` is imported.
+
+    pip install -r tests/requirements.txt
+    python -m pytest
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bidding-tests-'), 'test.db')}"
+os.environ["RATE_LIMITS"] = "login=;bids:create=;bids:update="
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from app.database import engine
+    from app.migrate import upgrade
+
+    upgrade(engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    """Session on the migrated database, emptied after the test"""
+    from app.database import Base, SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                connection.execute(table.delete())
+
+
+@pytest.fixture
+def staff(db):
+    from app import models
+
+    user = models.User(username="staff", email="staff@example.com", hashed_password="x", is_staff=True)
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def plate(db, staff):
+    from app import models
+
+    plate = models.AutoPlate(plate_number="AA001", description="Test plate",
+                             deadline=datetime.now() + timedelta(days=1), is_active=True, created_by_id=staff.id)
+    db.add(plate)
+    db.commit()
+    return plate
+
+
+@pytest.fixture
+def app(engine):
+    """Application without its lifespan, engines and caches start lazily"""
+    from app.main import create_app
+
+    return create_app()
+
+
+@pytest.fixture
+def auth():
+    """Authorization headers for a user"""
+    from app.auth import create_access_token
+
+    return lambda user: {"Authorization": f"Bearer {create_access_token({'sub': user.username})}"}
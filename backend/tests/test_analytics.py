@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from app import analytics, crud, models, schemas
+
+
+def _bids_a_month_apart(db, plate):
+    started = datetime(2030, 1, 1)
+    for index, created_at in enumerate((started, started + timedelta(days=30))):
+        user = models.User(username=f"bidder{index}", email=f"bidder{index}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        db.add(models.Bid(amount=Decimal(10 + index), user_id=user.id, plate_id=plate.id, created_at=created_at))
+    db.commit()
+
+
+def test_time_buckets_cover_the_bids(db, plate):
+    _bids_a_month_apart(db, plate)
+
+    timeline = analytics.plate_analytics(db, plate.id, bucket_seconds=86400)["bids_per_bucket"]
+
+    assert timeline["counts"] == [1] + [0] * 29 + [1]
+
+
+def test_too_many_time_buckets_are_rejected(db, plate):
+    _bids_a_month_apart(db, plate)
+
+    with pytest.raises(analytics.TooManyBuckets):
+        analytics.plate_analytics(db, plate.id, bucket_seconds=1)
+
+
+def test_too_many_time_buckets_are_a_422(app, auth, db, staff, plate):
+    _bids_a_month_apart(db, plate)
+
+    async def get():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(f"/analytics/plates/{plate.id}?bucket_seconds=1", headers=auth(staff))
+
+    response = asyncio.run(get())
+
+    assert response.status_code == 422
+    assert "exceed the limit" in response.json()["detail"]
+
+
+def test_summary_top_bidders_follow_bid_writes(db, plate, staff):
+    other = models.AutoPlate(plate_number="AA002", description="Second plate", deadline=plate.deadline,
+                             is_active=True, created_by_id=staff.id)
+    bidders = [models.User(username=f"bidder{index}", email=f"bidder{index}@example.com", hashed_password="x")
+               for index in range(2)]
+    db.add_all([other, *bidders])
+    db.flush()
+    db.add_all([
+        models.Bid(amount=Decimal(10), user_id=bidders[0].id, plate_id=plate.id),
+        models.Bid(amount=Decimal(11), user_id=bidders[1].id, plate_id=plate.id),
+        models.Bid(amount=Decimal(50), user_id=bidders[1].id, plate_id=other.id),
+    ])
+    db.commit()
+    for bid in db.query(models.Bid):
+        analytics.mark_dirty(bid.plate_id, bid.user_id)
+
+    summary = analytics.summary(db)
+
+    assert summary["top_bidders"] == [
+        {"user_id": bidders[1].id, "bids": 2, "total": 61.0},
+        {"user_id": bidders[0].id, "bids": 1, "total": 10.0},
+    ]
+    assert sum(summary["recent_bids_per_minute"]["counts"]) == 3
+    assert analytics.rebuild(db) == 2
+    assert analytics.summary(db)["top_bidders"] == summary["top_bidders"]
+
+
+def test_first_bid_is_the_opening_amount_after_a_raise(db, plate):
+    bidder = models.User(username="bidder", email="bidder@example.com", hashed_password="x")
+    db.add(bidder)
+    db.commit()
+    bid = crud.create_bid(db, schemas.BidCreate(plate_id=plate.id, amount=Decimal(10)), bidder.id)
+    crud.update_bid(db, bid.id, schemas.BidUpdate(amount=Decimal(25)), bidder.id)
+    analytics.rollup(db, [plate.id])
+
+    stats = analytics.plate_analytics(db, plate.id)
+
+    assert (stats["first_bid"], stats["highest_bid"]) == (10.0, 25.0)
+    assert db.get(models.PlateStats, plate.id).first_bid == Decimal(10)
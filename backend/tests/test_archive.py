@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import analytics, archive, crud, models, schemas
+
+
+@pytest.fixture
+def archived_plate(db, plate):
+    bidders = [models.User(username=f"bidder{index}", email=f"bidder{index}@example.com", hashed_password="x")
+               for index in range(2)]
+    db.add_all(bidders)
+    db.commit()
+    opening = crud.create_bid(db, schemas.BidCreate(plate_id=plate.id, amount=Decimal(10)), bidders[0].id)
+    crud.create_bid(db, schemas.BidCreate(plate_id=plate.id, amount=Decimal(20)), bidders[1].id)
+    crud.update_bid(db, opening.id, schemas.BidUpdate(amount=Decimal(30)), bidders[0].id)
+    plate_id = plate.id
+
+    assert archive.archive_closed_plates(db, before=datetime.now() + timedelta(days=2)) == 1
+    return plate_id, bidders
+
+
+def test_archived_plate_moves_out_of_the_live_tables(db, archived_plate):
+    plate_id, _ = archived_plate
+
+    assert db.get(models.AutoPlate, plate_id) is None
+    assert db.query(models.Bid).count() == 0
+    assert db.get(models.ArchivedPlate, plate_id).highest_bid == Decimal(30)
+    assert sorted(bid.opening_amount for bid in db.query(models.ArchivedBid)) == [Decimal(10), Decimal(20)]
+
+
+def test_archived_plate_is_served_by_get_plates_by_ids(db, archived_plate):
+    plate_id, bidders = archived_plate
+
+    [plate] = crud.get_plates_by_ids(db, [plate_id, 999999])
+
+    assert (plate["id"], plate["plate_number"], plate["highest_bid"]) == (plate_id, "AA001", Decimal(30))
+    assert [(bid.user_id, bid.amount) for bid in plate["bids"]] == [(bidders[0].id, Decimal(30)),
+                                                                     (bidders[1].id, Decimal(20))]
+
+
+def test_archived_plate_is_served_by_analytics(db, archived_plate):
+    plate_id, bidders = archived_plate
+
+    stats = analytics.plate_analytics(db, plate_id)
+
+    assert (stats["bid_count"], stats["first_bid"], stats["highest_bid"]) == (2, 10.0, 30.0)
+    assert stats["top_bidders"][0] == {"user_id": bidders[0].id, "amount": 30.0}
+    # Bidder totals keep counting archived bids
+    analytics.rebuild(db)
+    top_bidders = analytics.summary(db)["top_bidders"]
+    assert {bidder["user_id"]: bidder["total"] for bidder in top_bidders} == {bidders[0].id: 30.0,
+                                                                              bidders[1].id: 20.0}
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from app import models
+
+
+@pytest.fixture
+def plates(db, staff, plate):
+    others = [
+        models.AutoPlate(plate_number=f"AB00{number}", description="Other plate", deadline=plate.deadline,
+                         is_active=True, created_by_id=staff.id)
+        for number in range(2)
+    ]
+    db.add_all(others)
+    db.commit()
+    return [plate, *others]
+
+
+@pytest.fixture
+def bidders(db):
+    users = [models.User(username=f"bidder{index}", email=f"bidder{index}@example.com", hashed_password="x")
+             for index in range(2)]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def _bid(db, user, plate, amount):
+    db.add(models.Bid(amount=Decimal(amount), user_id=user.id, plate_id=plate.id, created_at=datetime.now()))
+    db.commit()
+
+
+def _get(app, url, headers=None):
+    async def get():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(url, headers=headers)
+
+    return asyncio.run(get())
+
+
+def test_batch_keeps_the_requested_order_and_skips_missing_ids(app, db, plates, bidders):
+    first, second, third = plates
+    _bid(db, bidders[0], second, 20)
+
+    response = _get(app, f"/plates/batch?ids={third.id},999999,{second.id},{third.id},{first.id}")
+
+    assert response.status_code == 200
+    listed = response.json()
+    assert [plate["id"] for plate in listed] == [third.id, second.id, first.id]
+    assert listed[1]["highest_bid"] == "20.00"
+    assert listed[1]["bids"][0]["amount"] == "20.00"
+
+
+def test_batch_returns_only_the_requested_fields(app, plates):
+    response = _get(app, f"/plates/batch?ids={plates[0].id}&fields=plate_number,highest_bid")
+
+    assert response.json() == [{"id": plates[0].id, "plate_number": "AA001", "highest_bid": None}]
+
+
+def test_batch_rejects_malformed_ids(app):
+    assert _get(app, "/plates/batch?ids=1,two").status_code == 400
+    assert _get(app, "/plates/batch?ids=" + ",".join(map(str, range(101)))).status_code == 400
+
+
+def test_bids_with_plates_report_leading_bids(app, db, plates, bidders, auth):
+    bidder, rival = bidders
+    _bid(db, bidder, plates[0], 10)
+    _bid(db, bidder, plates[1], 30)
+    _bid(db, rival, plates[0], 15)
+
+    response = _get(app, "/bids/with-plates?fields=plate_number,highest_bid", headers=auth(bidder))
+
+    assert response.status_code == 200
+    listed = sorted(response.json(), key=lambda bid: bid["amount"])
+    assert [(bid["plate"]["plate_number"], bid["plate"]["highest_bid"], bid["is_leading"]) for bid in listed] == [
+        ("AA001", "15.00", False),
+        ("AB000", "30.00", True),
+    ]
+
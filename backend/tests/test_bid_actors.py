@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from app import crud, models, schemas
+from app.bid_actors import CreateBid, Execute, PlateActor
+
+
+def _user(db, name):
+    user = models.User(username=name, email=f"{name}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _second_plate(db, plate):
+    other = models.AutoPlate(plate_number="BB002", description="Other plate", deadline=plate.deadline,
+                             is_active=True, created_by_id=plate.created_by_id)
+    db.add(other)
+    db.commit()
+    return other
+
+
+def test_bids_committed_before_an_execute_stay_loaded(db, plate):
+    alice, bob = _user(db, "alice"), _user(db, "bob")
+    other = _second_plate(db, plate)
+    existing = crud.create_bid(db, schemas.BidCreate(plate_id=other.id, amount=Decimal("5")), bob.id)
+    update = schemas.BidUpdate(amount=Decimal("9"))
+
+    outcomes = PlateActor(0, 10)._process([
+        CreateBid(schemas.BidCreate(plate_id=plate.id, amount=Decimal("10")), alice.id, None),
+        Execute(other.id, lambda session: crud.update_bid(session, existing.id, update, bob.id)),
+    ])
+
+    created, updated = outcomes
+    assert (created.amount, created.user_id, created.created_at is not None) == (Decimal("10"), alice.id, True)
+    assert (updated.id, updated.amount) == (existing.id, Decimal("9"))
+
+
+def test_bids_of_several_groups_stay_loaded(db, plate):
+    alice, bob = _user(db, "alice"), _user(db, "bob")
+
+    outcomes = PlateActor(0, 10)._process([
+        CreateBid(schemas.BidCreate(plate_id=plate.id, amount=Decimal("10")), alice.id, None),
+        Execute(plate.id, lambda session: None),
+        CreateBid(schemas.BidCreate(plate_id=plate.id, amount=Decimal("20")), bob.id, None),
+    ])
+
+    assert [outcome.amount for outcome in (outcomes[0], outcomes[2])] == [Decimal("10"), Decimal("20")]
+    assert outcomes[0].created_at is not None
+
+
+def test_rejected_bid_does_not_affect_the_rest_of_the_batch(db, plate):
+    alice, bob = _user(db, "alice"), _user(db, "bob")
+
+    first, second = PlateActor(0, 10)._process([
+        CreateBid(schemas.BidCreate(plate_id=plate.id, amount=Decimal("10")), alice.id, None),
+        CreateBid(schemas.BidCreate(plate_id=plate.id, amount=Decimal("5")), bob.id, None),
+    ])
+
+    assert first.amount == Decimal("10")
+    assert second.status_code == 400
@@ -0,0 +1,54 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app import compression
+from app.compression import CompressionMiddleware, choose_encoding
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", "identity"),
+    ("br", "br"),
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("*", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("BR;Q=0, *", "gzip"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("gzip;q=0", "identity"),
+    ("*;q=0", "identity"),
+    ("gzip;q=0.5, identity", "identity"),
+    ("vnd.brotli-like, gzipped", "identity"),
+    ("br;q=oops, gzip", "gzip"),
+])
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+def test_without_brotli_gzip_is_chosen_over_br():
+    assert choose_encoding("br, gzip;q=0.5", available=("gzip",)) == "gzip"
+    assert choose_encoding("br", available=("gzip",)) == "identity"
+
+
+@pytest.mark.skipif(compression.brotli is None, reason="brotli is not installed")
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, br", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+])
+def test_middleware_responds_with_the_chosen_encoding(accept_encoding, expected):
+    app = Starlette(routes=[Route("/", lambda request: PlainTextResponse("plate " * 200))])
+    app = CompressionMiddleware(app, minimum_size=100)
+
+    async def get():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get("/", headers={"Accept-Encoding": accept_encoding})
+
+    response = asyncio.run(get())
+
+    assert response.headers.get("Content-Encoding") == expected
+    assert response.text == "plate " * 200
@@ -0,0 +1,11 @@
+import pytest
+
+from app import database
+
+
+def test_engines_cannot_be_rebound_to_another_database(engine):
+    assert database.init_engines() is engine
+    assert database.init_engines(database.SQLALCHEMY_DATABASE_URL) is engine
+
+    with pytest.raises(RuntimeError, match="one application per process"):
+        database.init_engines("sqlite:///another.db")
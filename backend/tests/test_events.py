@@ -0,0 +1,80 @@
+import asyncio
+import json
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app import models
+from app.database import SessionLocal
+from app.events import DatabaseEventBus
+
+
+async def _started(received):
+    bus = DatabaseEventBus(poll_interval=0.01, retention=60)
+    bus.GAP_TIMEOUT = 0.3
+
+    async def deliver(kind, action, data):
+        received.append((kind, action, data))
+
+    await bus.start(deliver)
+    return bus
+
+
+async def _wait_for(received, count, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if len(received) >= count:
+            return
+        await asyncio.sleep(0.01)
+
+
+def _insert_event(event_id, data):
+    db = SessionLocal()
+    try:
+        db.execute(insert(models.Event).values(
+            id=event_id, origin="another-worker", kind="bid", action="create",
+            payload=json.dumps(data), created_at=datetime.now(),
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_buses_on_one_database_deliver_each_others_events(db):
+    async def scenario():
+        first_received, second_received = [], []
+        first, second = await _started(first_received), await _started(second_received)
+        try:
+            await first.publish("bid", "create", {"id": 1})
+            await second.publish("plate", "update", {"id": 2})
+            await _wait_for(first_received, 1)
+            await _wait_for(second_received, 1)
+            await asyncio.sleep(0.05)
+        finally:
+            await first.stop()
+            await second.stop()
+        return first_received, second_received
+
+    first_received, second_received = asyncio.run(scenario())
+
+    assert first_received == [("plate", "update", {"id": 2})]
+    assert second_received == [("bid", "create", {"id": 1})]
+
+
+def test_event_after_a_gap_is_delivered_once_the_gap_times_out(db):
+    async def scenario():
+        received = []
+        bus = await _started(received)
+        try:
+            # The id before it was allocated by a transaction that never commits
+            _insert_event(bus.last_id + 2, {"id": 3})
+            await asyncio.sleep(0.1)
+            waited = list(received)
+            await _wait_for(received, 1)
+        finally:
+            await bus.stop()
+        return waited, received
+
+    waited, received = asyncio.run(scenario())
+
+    assert waited == []
+    assert received == [("bid", "create", {"id": 3})]
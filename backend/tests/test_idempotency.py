@@ -0,0 +1,74 @@
+import asyncio
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from app import idempotency, models
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    monkeypatch.setattr(idempotency, "store", idempotency.InMemoryStore())
+
+
+@pytest.fixture
+def bidder(db):
+    user = models.User(username="bidder", email="bidder@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _post_bids(app, bodies, headers):
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/bids/", json=body, headers=headers) for body in bodies))
+
+    return asyncio.run(post())
+
+
+def _bid_count(db):
+    db.expire_all()
+    return db.query(models.Bid).count()
+
+
+def test_concurrent_duplicates_place_one_bid(app, db, plate, bidder, auth):
+    headers = {**auth(bidder), "Idempotency-Key": "bid-1"}
+    body = {"plate_id": plate.id, "amount": "10"}
+
+    first, second = _post_bids(app, [body, body], headers)
+
+    assert (first.status_code, second.status_code) == (201, 201)
+    assert first.json() == second.json()
+    assert [response.headers.get("Idempotent-Replayed") for response in (first, second)] == [None, "true"]
+    assert _bid_count(db) == 1
+
+
+def test_retry_replays_and_a_different_body_is_rejected(app, db, plate, bidder, auth):
+    headers = {**auth(bidder), "Idempotency-Key": "bid-1"}
+
+    [created] = _post_bids(app, [{"plate_id": plate.id, "amount": "10"}], headers)
+    [retried] = _post_bids(app, [{"plate_id": plate.id, "amount": "10"}], headers)
+    [changed] = _post_bids(app, [{"plate_id": plate.id, "amount": "20"}], headers)
+
+    assert retried.json() == created.json() and retried.headers["Idempotent-Replayed"] == "true"
+    assert changed.status_code == 422
+    assert _bid_count(db) == 1
+    assert db.query(models.Bid).one().amount == Decimal("10")
+
+
+def test_rejected_request_is_replayed(app, db, plate, bidder, auth):
+    headers = {**auth(bidder), "Idempotency-Key": "bid-1"}
+    body = {"plate_id": plate.id + 1000, "amount": "10"}
+
+    [rejected] = _post_bids(app, [body], headers)
+    db.add(models.AutoPlate(id=plate.id + 1000, plate_number="ZZ999", description="Late plate",
+                            deadline=plate.deadline, is_active=True, created_by_id=plate.created_by_id))
+    db.commit()
+    [retried] = _post_bids(app, [body], headers)
+
+    assert rejected.status_code == retried.status_code == 404
+    assert retried.headers["Idempotent-Replayed"] == "true"
+    assert _bid_count(db) == 0
@@ -0,0 +1,13 @@
+from app.leader import FileLock
+
+
+def test_one_of_two_file_locks_leads(tmp_path):
+    path = str(tmp_path / "scheduler.lock")
+    first, second = FileLock(path), FileLock(path)
+
+    assert [first.acquire(), second.acquire()] == [True, False]
+
+    first.release()
+    assert second.acquire()
+    assert not first.acquire()
+    second.release()
@@ -0,0 +1,19 @@
+from sqlalchemy import create_engine, inspect
+
+from app import migrate
+
+
+def test_migrations_match_the_models():
+    assert migrate.check() == []
+
+
+def test_upgrade_creates_every_table(tmp_path):
+    from app.database import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path}/upgrade.db")
+    try:
+        migrate.upgrade(engine)
+        tables = set(inspect(engine).get_table_names())
+    finally:
+        engine.dispose()
+    assert set(Base.metadata.tables) | {"alembic_version"} == tables
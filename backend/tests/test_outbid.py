@@ -0,0 +1,54 @@
+import asyncio
+from decimal import Decimal
+
+from app import models
+from app.outbid import BidderIndex
+
+
+def _bids(db, plate, amounts):
+    """One bid per user, returns {username: bid}"""
+    bids = {}
+    for name, amount in amounts.items():
+        user = models.User(username=name, email=f"{name}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        bids[name] = models.Bid(amount=Decimal(amount), user_id=user.id, plate_id=plate.id)
+        db.add(bids[name])
+    db.commit()
+    return bids
+
+
+def _event(bid, **extra):
+    return {"id": bid.id, "amount": str(bid.amount), "user_id": bid.user_id, "plate_id": bid.plate_id, **extra}
+
+
+def _apply(action, bid_data):
+    return asyncio.run(BidderIndex().apply(action, bid_data))
+
+
+def test_leader_raising_their_own_bid_is_not_an_outbid(db, plate):
+    bids = _bids(db, plate, {"alice": "10", "bob": "20"})
+    bids["bob"].amount = Decimal("40")
+    db.commit()
+
+    assert _apply("update", _event(bids["bob"], previous_amount="20.00")) is None
+
+
+def test_new_bid_outbids_the_leader_before_it(db, plate):
+    bids = _bids(db, plate, {"alice": "10", "bob": "20", "carol": "30"})
+
+    previous = _apply("create", _event(bids["carol"]))
+
+    assert (previous.leader_id, previous.leader_amount) == (bids["bob"].user_id, Decimal("20"))
+
+
+def test_update_outbids_the_leader_before_it(db, plate):
+    bids = _bids(db, plate, {"alice": "10", "bob": "20"})
+    bids["alice"].amount = Decimal("50")
+    db.commit()
+
+    previous = _apply("update", _event(bids["alice"], previous_amount="10.00"))
+    assert (previous.leader_id, previous.leader_amount) == (bids["bob"].user_id, Decimal("20"))
+
+    # Without the previous amount the leader before the update is unknown
+    assert _apply("update", _event(bids["alice"])) is None
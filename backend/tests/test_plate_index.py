@@ -0,0 +1,102 @@
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from app import models
+from app.database import SessionLocal
+from app.plate_index import PlateIndex
+
+
+def _bid(plate, user, amount):
+    db = SessionLocal()
+    try:
+        db.add(models.Bid(amount=amount, user_id=user.id, plate_id=plate.id, created_at=datetime.now()))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_events_update_the_orderings(db, plate, staff):
+    index = PlateIndex(max_age=300)
+    index.rebuild(db)
+    _bid(plate, staff, 10)
+    index.apply_bid("create", {"plate_id": plate.id, "amount": "10.00"})
+
+    assert index.page("-highest_bid") == [plate.id]
+    assert index.plates[plate.id].highest_bid == Decimal("10.00")
+    assert index.plates[plate.id].bid_count == 1
+
+
+def test_event_applied_during_rebuild_is_not_lost(db, plate, staff):
+    index = PlateIndex(max_age=300)
+    query = index._query
+
+    def racing_query(session, plate_ids=None):
+        result = query(session, plate_ids)
+        # Committed and delivered after the rebuild read the tables
+        _bid(plate, staff, 50)
+        index.apply_bid("create", {"plate_id": plate.id, "amount": "50.00"})
+        return result
+
+    index._query = racing_query
+    index.rebuild(db)
+    index._query = query
+
+    assert plate.id in index.stale
+    [listed] = index.get_plates(db, "-highest_bid")
+    assert listed["highest_bid"] == Decimal("50.00")
+
+
+def test_page_is_filled_past_plates_removed_behind_the_index(db, plate, staff):
+    others = [
+        models.AutoPlate(plate_number=f"AB00{number}", description="Other plate", deadline=plate.deadline,
+                         is_active=True, created_by_id=staff.id)
+        for number in range(3)
+    ]
+    db.add_all(others)
+    db.commit()
+    index = PlateIndex(max_age=300)
+    index.rebuild(db)
+    first_two = index.page("bid_count", limit=2)
+    # Deleted by another worker, the index still lists them
+    db.query(models.AutoPlate).filter(models.AutoPlate.id.in_(first_two)).delete()
+    db.commit()
+
+    listed = index.get_plates(db, "bid_count", limit=2)
+
+    assert len(listed) == 2
+    assert not {row["id"] for row in listed} & set(first_two)
+    assert not set(first_two) & set(index.plates)
+
+
+def test_expired_index_is_rebuilt_by_one_listing(db, plate):
+    index = PlateIndex(max_age=300)
+    index.rebuild(db)
+    index.loaded_at -= 301
+    query = index._query
+    rebuilds = []
+
+    def slow_query(session, plate_ids=None):
+        if plate_ids is None:
+            rebuilds.append(1)
+            time.sleep(0.2)
+        return query(session, plate_ids)
+
+    index._query = slow_query
+
+    def list_plates():
+        session = SessionLocal()
+        try:
+            index.get_plates(session, "bid_count")
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=list_plates) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(rebuilds) == 1
+    assert not index._expired()
@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+import pytest
+
+from app import config, crud, models, proxy_bids, schemas
+
+
+@pytest.fixture
+def bidders(db):
+    users = [models.User(username=f"bidder{index}", email=f"bidder{index}@example.com", hashed_password="x")
+             for index in range(3)]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def _set_proxy(db, plate, user, max_amount):
+    return proxy_bids.set_proxy_bid(db, schemas.ProxyBidCreate(plate_id=plate.id, max_amount=max_amount), user.id)
+
+
+def _bids(db, plate):
+    return {bid.user_id: bid.amount for bid in db.query(models.Bid).filter(models.Bid.plate_id == plate.id)}
+
+
+def test_leader_pays_runner_up_plus_increment(db, plate, bidders):
+    leader, runner_up, _ = bidders
+    _set_proxy(db, plate, leader, Decimal(100))
+    _, bid, created = _set_proxy(db, plate, runner_up, Decimal(60))
+
+    assert created is False
+    assert bid.user_id == leader.id
+    # Losing proxies place no bid of their own
+    assert _bids(db, plate) == {leader.id: Decimal(60) + config.PROXY_BID_INCREMENT}
+
+
+def test_leader_price_is_capped_at_its_maximum(db, plate, bidders):
+    leader, runner_up, _ = bidders
+    _set_proxy(db, plate, runner_up, Decimal("99.50"))
+    _set_proxy(db, plate, leader, Decimal(100))
+
+    assert _bids(db, plate) == {runner_up.id: config.PROXY_BID_INCREMENT, leader.id: Decimal(100)}
+
+
+def test_earlier_proxy_wins_a_tie_at_its_maximum(db, plate, bidders):
+    first, second, _ = bidders
+    _set_proxy(db, plate, first, Decimal(80))
+    _, bid, _ = _set_proxy(db, plate, second, Decimal(80))
+
+    assert (bid.user_id, bid.amount) == (first.id, Decimal(80))
+
+
+def test_proxy_outbids_a_manual_bid_within_its_maximum(db, plate, bidders):
+    leader, runner_up, manual = bidders
+    _set_proxy(db, plate, leader, Decimal(100))
+    _set_proxy(db, plate, runner_up, Decimal(50))
+    crud.create_bid(db, schemas.BidCreate(plate_id=plate.id, amount=Decimal(70)), manual.id)
+
+    bid, created = proxy_bids.resolve(db, plate.id)
+
+    assert (bid.user_id, bid.amount, created) == (leader.id, Decimal(70) + config.PROXY_BID_INCREMENT, False)
+
+
+def test_manual_bid_above_every_maximum_is_left_standing(db, plate, bidders):
+    leader, _, manual = bidders
+    _set_proxy(db, plate, leader, Decimal(100))
+    crud.create_bid(db, schemas.BidCreate(plate_id=plate.id, amount=Decimal(150)), manual.id)
+
+    assert proxy_bids.resolve(db, plate.id) == (None, False)
+    assert _bids(db, plate) == {leader.id: config.PROXY_BID_INCREMENT, manual.id: Decimal(150)}
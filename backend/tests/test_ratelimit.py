@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app import config, ratelimit
+
+
+def test_bucket_refuses_hits_beyond_its_capacity():
+    backend = ratelimit.InMemoryBackend()
+
+    async def hits():
+        return [await backend.hit("user:1", capacity=2, rate=1) for _ in range(3)]
+
+    first, second, third = asyncio.run(hits())
+    assert first == second == 0
+    assert 0 < third <= 1
+
+
+def test_buckets_are_bounded_while_all_are_refilling():
+    backend = ratelimit.InMemoryBackend(max_keys=100)
+
+    async def hits():
+        for user_id in range(250):
+            await backend.hit(f"user:{user_id}", capacity=5, rate=0.001)
+        return await backend.hit("user:249", capacity=5, rate=0.001)
+
+    last = asyncio.run(hits())
+
+    assert len(backend.buckets) <= 100
+    # The newest buckets are kept with their state
+    assert backend.buckets["user:249"][0] == pytest.approx(3)
+    assert last == 0
+
+def test_check_limit_raises_429_with_retry_after(monkeypatch):
+    monkeypatch.setitem(config.RATE_LIMITS, "login", "1/minute")
+    monkeypatch.setattr(ratelimit, "backend", ratelimit.InMemoryBackend())
+
+    asyncio.run(ratelimit.check_limit("login", "ip:10.0.0.1"))
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(ratelimit.check_limit("login", "ip:10.0.0.1"))
+
+    assert raised.value.status_code == 429
+    assert raised.value.headers == {"Retry-After": "60"}
@@ -0,0 +1,54 @@
+from decimal import Decimal
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app import crud, models, schemas
+from app.plate_index import PlateIndex
+from app.responses import encode_rows
+
+
+def _listing(db, plate):
+    """A second plate with a non-ASCII description and no bids, and bids on `plate`"""
+    db.add(models.AutoPlate(plate_number="BB002", description="Номер «BB»", deadline=plate.deadline,
+                            is_active=False, created_by_id=plate.created_by_id))
+    users = [models.User(username=f"bidder{index}", email=f"bidder{index}@example.com", hashed_password="x")
+             for index in range(2)]
+    db.add_all(users)
+    db.flush()
+    db.add_all([models.Bid(amount=Decimal("10.5"), user_id=users[0].id, plate_id=plate.id),
+                models.Bid(amount=Decimal("20"), user_id=users[1].id, plate_id=plate.id)])
+    db.commit()
+    return users
+
+
+def _plates_through_pydantic(db, plate_ids) -> bytes:
+    adapter = TypeAdapter(List[schemas.AutoPlate])
+    plates = [crud.get_plate_with_highest_bid(db, plate_id) for plate_id in plate_ids]
+    return adapter.dump_json(adapter.validate_python(plates))
+
+
+def test_plate_rows_encode_like_the_response_model(db, plate):
+    _listing(db, plate)
+
+    rows = crud.get_plate_rows(db)
+    assert encode_rows(rows) == _plates_through_pydantic(db, [row.id for row in rows])
+
+    indexed = PlateIndex(max_age=300).get_plates(db, "-highest_bid")
+    assert encode_rows(indexed) == _plates_through_pydantic(db, [row["id"] for row in indexed])
+
+
+def test_bid_rows_encode_like_the_response_models(db, plate):
+    user = _listing(db, plate)[1]
+
+    adapter = TypeAdapter(List[schemas.Bid])
+    rows = crud.get_bids_by_user(db, user.id)
+    bids = db.query(models.Bid).filter(models.Bid.user_id == user.id).all()
+    assert encode_rows(rows) == adapter.dump_json(adapter.validate_python(bids, from_attributes=True))
+
+    # The bids of /bids/with-plates have the same fields as those of /bids/
+    with_plates = TypeAdapter(List[schemas.BidWithPlate]).validate_python(crud.get_bids_with_plates(db, user.id))
+    assert encode_rows(rows) == adapter.dump_json(
+        [schemas.Bid(**bid.model_dump(include=set(schemas.Bid.model_fields))) for bid in with_plates]
+    )
+    assert [bid.is_leading for bid in with_plates] == [True]
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app import sse
+from app.snapshot import PlateSnapshot
+
+
+@pytest.fixture
+def streams(monkeypatch):
+    monkeypatch.setattr(sse, "plate_snapshot", PlateSnapshot(max_age=0))
+    return sse.PlateStreams(replay_size=16, keepalive=5, max_duration=60, retry_ms=1000)
+
+
+def _bid(streams, plate, amount):
+    streams.apply_bid("create", {"plate_id": plate.id, "amount": amount})
+
+
+async def _frames(stream, count):
+    return [await asyncio.wait_for(stream.__anext__(), 1) for _ in range(count)]
+
+
+def _event_id(frame: bytes) -> str:
+    return frame.decode().split("\n", 1)[0].removeprefix("id: ")
+
+
+def test_resume_replays_the_missed_frames(streams, plate):
+    async def scenario():
+        first = streams.stream(plate.id)
+        await _frames(first, 2)  # retry, snapshot
+        _bid(streams, plate, "10")
+        [seen] = await _frames(first, 1)
+        _bid(streams, plate, "20")
+        _bid(streams, plate, "30")
+        resumed = streams.stream(plate.id, _event_id(seen))
+        frames = await _frames(resumed, 2)
+        await first.aclose()
+        await resumed.aclose()
+        return frames
+
+    _, replayed = asyncio.run(scenario())
+
+    assert b'"20"' in replayed and b'"30"' in replayed and b"snapshot" not in replayed
+
+
+def test_id_from_a_dropped_channel_gets_a_snapshot(streams, plate):
+    async def scenario():
+        first = streams.stream(plate.id)
+        await _frames(first, 2)
+        _bid(streams, plate, "10")
+        [seen] = await _frames(first, 1)
+        # The last subscriber leaves, events meanwhile go nowhere
+        await first.aclose()
+        _bid(streams, plate, "20")
+        # A new channel numbers its events from 1 again
+        second = streams.stream(plate.id)
+        await _frames(second, 2)
+        for amount in ("30", "40", "50"):
+            _bid(streams, plate, amount)
+        resumed = streams.stream(plate.id, _event_id(seen))
+        frames = await _frames(resumed, 2)
+        await second.aclose()
+        await resumed.aclose()
+        return frames
+
+    _, first_frame = asyncio.run(scenario())
+
+    assert first_frame.startswith(b"event: snapshot")
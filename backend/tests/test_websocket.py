@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+from fastapi import WebSocketDisconnect
+from starlette.datastructures import Address
+
+from app.websocket import ConnectionManager
+
+
+class _Socket:
+    def __init__(self, port: int, error: Exception = None, stalled: bool = False, delay: float = 0):
+        self.client = Address("10.0.0.1", port)
+        self.error = error
+        self.stalled = stalled
+        self.delay = delay
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self, *args, **kwargs):
+        pass
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.close_code = code
+
+    async def send_text(self, data: str):
+        if self.error:
+            raise self.error
+        if self.stalled:
+            await asyncio.sleep(3600)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(data)
+
+    send_bytes = send_text
+
+
+def _connected(*sockets, user_id=None, send_timeout=0):
+    manager = ConnectionManager(send_timeout=send_timeout)
+
+    async def connect():
+        for websocket in sockets:
+            await manager.connect(websocket, "bids", "json", user_id)
+
+    asyncio.run(connect())
+    return manager
+
+
+def _failing():
+    return [_Socket(1, WebSocketDisconnect(1006)), _Socket(2, OSError("Broken pipe")), _Socket(3, RuntimeError())]
+
+
+def test_broadcast_drops_failing_connections_and_reaches_the_rest():
+    healthy = _Socket(4)
+    manager = _connected(*_failing(), healthy)
+
+    asyncio.run(manager.broadcast({"action": "create"}, "bids"))
+
+    assert len(healthy.sent) == 1
+    assert manager.members("bids") == (manager._connection(healthy),)
+
+
+def test_send_to_user_and_ping_drop_failing_connections():
+    healthy = _Socket(4)
+    manager = _connected(*_failing(), healthy, user_id=7)
+
+    asyncio.run(manager.send_to_user(7, {"action": "outbid"}))
+    assert len(healthy.sent) == 1 and manager.count() == 1
+
+    manager = _connected(*_failing(), healthy)
+    asyncio.run(manager.ping_all())
+    assert len(healthy.sent) == 2 and manager.count() == 1
+
+
+def test_stalled_connection_does_not_hold_up_a_broadcast():
+    stalled, healthy = _Socket(1, stalled=True), _Socket(2)
+    manager = _connected(stalled, healthy, send_timeout=0.05)
+
+    async def broadcast():
+        started = time.monotonic()
+        await manager.broadcast({"action": "create"}, "bids")
+        elapsed = time.monotonic() - started
+        await asyncio.gather(*manager._closing)
+        return elapsed
+
+    assert asyncio.run(broadcast()) < 1
+    assert len(healthy.sent) == 1
+    assert manager.members("bids") == (manager._connection(healthy),)
+    assert stalled.close_code == 1008
+
+
+def test_slow_sends_that_each_finish_in_time_are_kept():
+    sockets = [_Socket(port, delay=0.03) for port in range(6)]
+    manager = _connected(*sockets, send_timeout=0.1)
+
+    asyncio.run(manager.broadcast({"action": "create"}, "bids"))
+
+    assert [len(websocket.sent) for websocket in sockets] == [1] * 6
+    assert manager.count() == 6
@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+from app import crud, models, schemas
+from app.write_batcher import PendingWrite, WriteBatcher
+
+
+def _user(db, name):
+    user = models.User(username=name, email=f"{name}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _failing_stage(db):
+    raise RuntimeError("database is locked")
+
+
+def test_fallback_results_stay_loaded_after_a_later_write_fails(db, plate):
+    alice, bob, carol = _user(db, "alice"), _user(db, "bob"), _user(db, "carol")
+
+    def create(user, amount):
+        bid = schemas.BidCreate(plate_id=plate.id, amount=Decimal(amount))
+        return PendingWrite(_failing_stage, lambda session: crud.create_bid(session, bid, user.id), None)
+
+    first, second, third = WriteBatcher(0, 10)._process([
+        create(alice, "10"), create(bob, "5"), create(carol, "30"),
+    ])
+
+    assert (first.amount, first.user_id, first.created_at is not None) == (Decimal("10"), alice.id, True)
+    assert second.status_code == 400
+    assert third.amount == Decimal("30")
@@ -26,10 +26,17 @@ class WebSocketService {
     this.baseUrl = apiUrl.replace(/^http/, 'ws');
   }
 
+  private socketUrl(socketType: 'plates' | 'bids') {
+    // Logged-in users also receive personal messages such as outbid notices
+    const token = localStorage.getItem("token");
+    const query = token ? `?token=${encodeURIComponent(token)}` : "";
+    return `${this.baseUrl}/ws/${socketType}${query}`;
+  }
+
   connectToPlates() {
     if (this.platesSocket?.readyState === WebSocket.OPEN) return;
 
-    this.platesSocket = new WebSocket(`${this.baseUrl}/ws/plates`);
+    this.platesSocket = new WebSocket(this.socketUrl('plates'));
 
     this.platesSocket.onopen = () => {
       console.log("Connected to plates WebSocket");
@@ -39,6 +46,11 @@ class WebSocketService {
     this.platesSocket.onmessage = (event) => {
       try {
         const message = JSON.parse(event.data) as WebSocketMessage;
+        if (message.action === "ping") {
+          // Heartbeat: the server closes connections that stay silent
+          this.platesSocket?.send(JSON.stringify({ action: "pong" }));
+          return;
+        }
         console.log("Received plates message:", message);
         this.platesListeners.forEach(listener => listener(message));
       } catch (error) {
@@ -60,7 +72,7 @@ class WebSocketService {
   connectToBids() {
     if (this.bidsSocket?.readyState === WebSocket.OPEN) return;
 
-    this.bidsSocket = new WebSocket(`${this.baseUrl}/ws/bids`);
+    this.bidsSocket = new WebSocket(this.socketUrl('bids'));
 
     this.bidsSocket.onopen = () => {
       console.log("Connected to bids WebSocket");
@@ -70,6 +82,11 @@ class WebSocketService {
     this.bidsSocket.onmessage = (event) => {
       try {
         const message = JSON.parse(event.data) as WebSocketMessage;
+        if (message.action === "ping") {
+          // Heartbeat: the server closes connections that stay silent
+          this.bidsSocket?.send(JSON.stringify({ action: "pong" }));
+          return;
+        }
         console.log("Received bids message:", message);
         this.bidsListeners.forEach(listener => listener(message));
       } catch (error) {